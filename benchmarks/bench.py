@@ -0,0 +1,234 @@
+"""Search and ingest benchmark.
+
+Generates a synthetic corpus, ingests it through the documents API into a
+local Postgres + pgvector database with the deterministic ``fake`` embeddings
+provider, then measures semantic, keyword and hybrid search.
+
+The app is served in-process (httpx ASGI transport, testing-mode auth), so the
+numbers cover the API, the database and the embeddings, but not the network.
+
+Usage:
+    python -m benchmarks.bench --documents 1000 --output results.json
+    python -m benchmarks.compare base.json results.json
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any
+
+from benchmarks.corpus import SyntheticCorpus
+from benchmarks.stats import summarize
+
+HEADERS = {"Authorization": "Bearer user1"}
+SEARCH_TYPES = ("semantic", "keyword", "hybrid")
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def configure_environment(embeddings_provider: str) -> None:
+    """Set the environment read by langconnect.config at import time."""
+    os.environ["IS_TESTING"] = "true"
+    os.environ["EMBEDDINGS_PROVIDER"] = embeddings_provider
+
+
+async def ingest(
+    client: Any,
+    collection_id: str,
+    corpus: SyntheticCorpus,
+    *,
+    documents: int,
+    words_per_document: int,
+    files_per_request: int,
+    chunk_size: int,
+    chunk_overlap: int,
+) -> dict[str, Any]:
+    """Upload the corpus and measure ingest throughput."""
+    docs = corpus.documents(documents, words_per_document=words_per_document)
+    latencies: list[float] = []
+    chunks = 0
+    start = time.perf_counter()
+    for i in range(0, len(docs), files_per_request):
+        batch = docs[i : i + files_per_request]
+        files = [
+            ("files", (doc.filename, doc.text.encode(), "text/plain")) for doc in batch
+        ]
+        request_start = time.perf_counter()
+        response = await client.post(
+            f"/collections/{collection_id}/documents",
+            files=files,
+            data={"chunk_size": str(chunk_size), "chunk_overlap": str(chunk_overlap)},
+            headers=HEADERS,
+        )
+        latencies.append(time.perf_counter() - request_start)
+        response.raise_for_status()
+        chunks += len(response.json()["added_chunk_ids"])
+    wall_time = time.perf_counter() - start
+    return {
+        "documents": len(docs),
+        "chunks": chunks,
+        "seconds": round(wall_time, 3),
+        "chunks_per_second": round(chunks / wall_time, 2),
+        "documents_per_second": round(len(docs) / wall_time, 2),
+        "requests": summarize(latencies, wall_time),
+    }
+
+
+async def search(
+    client: Any,
+    collection_id: str,
+    queries: list[str],
+    *,
+    search_type: str,
+    limit: int,
+    concurrency: int,
+    warmup: int,
+) -> dict[str, Any]:
+    """Run the queries with a fixed concurrency and summarize latencies."""
+    url = f"/collections/{collection_id}/documents/search"
+
+    async def _run(query: str) -> float:
+        start = time.perf_counter()
+        response = await client.post(
+            url,
+            json={"query": query, "limit": limit, "search_type": search_type},
+            headers=HEADERS,
+        )
+        elapsed = time.perf_counter() - start
+        response.raise_for_status()
+        return elapsed
+
+    for query in queries[:warmup]:
+        await _run(query)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _bounded(query: str) -> float:
+        async with semaphore:
+            return await _run(query)
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(_bounded(query) for query in queries))
+    return summarize(list(latencies), time.perf_counter() - start)
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run the benchmark and return the results."""
+    from httpx import ASGITransport, AsyncClient
+
+    from langconnect import config
+    from langconnect.server import APP, lifespan
+
+    corpus = SyntheticCorpus(seed=args.seed)
+    queries = corpus.queries(args.queries)
+    results: dict[str, Any] = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.datetime.now(datetime.UTC).isoformat(),
+            "python": platform.python_version(),
+            "embeddings_provider": config.EMBEDDINGS_PROVIDER,
+            "parameters": vars(args),
+        },
+    }
+
+    async with (
+        lifespan(APP),
+        AsyncClient(
+            base_url="http://benchmark", transport=ASGITransport(app=APP), timeout=None
+        ) as client,
+    ):
+        response = await client.post(
+            "/collections",
+            json={"name": f"benchmark-{int(time.time())}", "metadata": {}},
+            headers=HEADERS,
+        )
+        response.raise_for_status()
+        collection_id = response.json()["uuid"]
+        try:
+            print(f"Ingesting {args.documents} documents...", file=sys.stderr)
+            results["ingest"] = await ingest(
+                client,
+                collection_id,
+                corpus,
+                documents=args.documents,
+                words_per_document=args.words_per_document,
+                files_per_request=args.files_per_request,
+                chunk_size=args.chunk_size,
+                chunk_overlap=args.chunk_overlap,
+            )
+            results["search"] = {}
+            for search_type in args.search_types:
+                print(f"Running {search_type} search...", file=sys.stderr)
+                results["search"][search_type] = await search(
+                    client,
+                    collection_id,
+                    queries,
+                    search_type=search_type,
+                    limit=args.limit,
+                    concurrency=args.concurrency,
+                    warmup=args.warmup,
+                )
+        finally:
+            if not args.keep:
+                await client.delete(f"/collections/{collection_id}", headers=HEADERS)
+    return results
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench")
+    parser.add_argument("--documents", type=int, default=500)
+    parser.add_argument("--words-per-document", type=int, default=600)
+    parser.add_argument("--files-per-request", type=int, default=10)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--search-types", nargs="+", choices=SEARCH_TYPES, default=list(SEARCH_TYPES)
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--embeddings-provider",
+        default="fake",
+        help="Embeddings provider to benchmark with (default: fake).",
+    )
+    parser.add_argument(
+        "--keep", action="store_true", help="Keep the benchmark collection."
+    )
+    parser.add_argument("--output", help="Write the JSON results to this file.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the benchmark from the command line."""
+    args = parse_args(argv)
+    configure_environment(args.embeddings_provider)
+    results = asyncio.run(run(args))
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
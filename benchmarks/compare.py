@@ -0,0 +1,64 @@
+"""Compare two benchmark result files.
+
+Usage:
+    python -m benchmarks.compare base.json new.json
+"""
+
+import argparse
+import json
+from typing import Any
+
+# Metrics where a higher value is better; for the others lower is better.
+HIGHER_IS_BETTER = {"qps", "chunks_per_second", "documents_per_second"}
+
+
+def _flatten(results: dict[str, Any], prefix: str = "") -> dict[str, float]:
+    flat: dict[str, float] = {}
+    for key, value in results.items():
+        if key == "meta":
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, int | float) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare(base: dict[str, Any], new: dict[str, Any]) -> list[tuple[str, float, float, float]]:
+    """Return (metric, base, new, relative change %) for metrics in both files."""
+    base_flat, new_flat = _flatten(base), _flatten(new)
+    rows = []
+    for name in sorted(base_flat.keys() & new_flat.keys()):
+        before, after = base_flat[name], new_flat[name]
+        change = (after - before) / before * 100 if before else 0.0
+        rows.append((name, before, after, change))
+    return rows
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Print the comparison table."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    args = parser.parse_args(argv)
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    print(
+        f"base: {base.get('meta', {}).get('commit')}  "
+        f"new: {new.get('meta', {}).get('commit')}"
+    )
+    print(f"{'metric':<40} {'base':>12} {'new':>12} {'change':>9}")
+    for name, before, after, change in compare(base, new):
+        metric = name.rsplit(".", 1)[-1]
+        better = change >= 0 if metric in HIGHER_IS_BETTER else change <= 0
+        marker = "" if abs(change) < 5 else (" +" if better else " !")
+        print(f"{name:<40} {before:>12.3f} {after:>12.3f} {change:>8.1f}%{marker}")
+
+
+if __name__ == "__main__":
+    main()
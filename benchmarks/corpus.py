@@ -0,0 +1,126 @@
+"""Reproducible synthetic corpus for benchmarks.
+
+Documents are generated from a seeded random generator: each document belongs
+to a topic and draws most of its words from that topic's vocabulary with a
+Zipf-like distribution, plus words shared by all topics. Queries are built
+from the same topic vocabularies, so semantic, keyword and hybrid search all
+have relevant matches.
+"""
+
+import random
+from dataclasses import dataclass
+
+_CONSONANTS = "bcdfghjklmnprstvz"
+_VOWELS = "aeiou"
+
+
+@dataclass
+class SyntheticDocument:
+    """A generated document."""
+
+    filename: str
+    topic: int
+    text: str
+
+
+def _make_word(rng: random.Random) -> str:
+    syllables = rng.randint(2, 4)
+    return "".join(rng.choice(_CONSONANTS) + rng.choice(_VOWELS) for _ in range(syllables))
+
+
+def _make_vocabulary(rng: random.Random, size: int) -> list[str]:
+    words: set[str] = set()
+    while len(words) < size:
+        words.add(_make_word(rng))
+    return sorted(words)
+
+
+def _zipf_weights(size: int) -> list[float]:
+    return [1.0 / (rank + 1) for rank in range(size)]
+
+
+class SyntheticCorpus:
+    """Generator of documents and queries for a fixed seed."""
+
+    def __init__(
+        self,
+        *,
+        seed: int = 42,
+        topics: int = 20,
+        topic_vocabulary: int = 200,
+        common_vocabulary: int = 500,
+        topic_ratio: float = 0.6,
+    ) -> None:
+        """Initialize the corpus vocabularies.
+
+        Args:
+            seed: Random seed. The same seed always yields the same corpus.
+            topics: Number of topics.
+            topic_vocabulary: Number of words specific to each topic.
+            common_vocabulary: Number of words shared by all topics.
+            topic_ratio: Fraction of the words of a document drawn from its topic.
+        """
+        self.seed = seed
+        self.topic_ratio = topic_ratio
+        rng = random.Random(seed)
+        vocabulary = _make_vocabulary(
+            rng, topics * topic_vocabulary + common_vocabulary
+        )
+        rng.shuffle(vocabulary)
+        self.common_words = vocabulary[:common_vocabulary]
+        self.topic_words = [
+            vocabulary[
+                common_vocabulary + i * topic_vocabulary : common_vocabulary
+                + (i + 1) * topic_vocabulary
+            ]
+            for i in range(topics)
+        ]
+        self._common_weights = _zipf_weights(len(self.common_words))
+        self._topic_weights = _zipf_weights(topic_vocabulary)
+
+    def _words(self, rng: random.Random, topic: int, count: int) -> list[str]:
+        topic_count = sum(1 for _ in range(count) if rng.random() < self.topic_ratio)
+        words = rng.choices(
+            self.topic_words[topic], weights=self._topic_weights, k=topic_count
+        ) + rng.choices(
+            self.common_words, weights=self._common_weights, k=count - topic_count
+        )
+        rng.shuffle(words)
+        return words
+
+    def documents(
+        self, count: int, *, words_per_document: int = 600
+    ) -> list[SyntheticDocument]:
+        """Generate documents made of sentences of 8 to 20 words."""
+        rng = random.Random(f"{self.seed}-documents")
+        documents = []
+        for i in range(count):
+            topic = rng.randrange(len(self.topic_words))
+            words = self._words(rng, topic, words_per_document)
+            sentences = []
+            while words:
+                length = rng.randint(8, 20)
+                sentence, words = words[:length], words[length:]
+                sentences.append(" ".join(sentence).capitalize() + ".")
+            # Paragraph breaks give the text splitter natural split points.
+            paragraphs = [
+                " ".join(sentences[j : j + 5]) for j in range(0, len(sentences), 5)
+            ]
+            documents.append(
+                SyntheticDocument(
+                    filename=f"doc_{i:06d}.txt",
+                    topic=topic,
+                    text="\n\n".join(paragraphs),
+                )
+            )
+        return documents
+
+    def queries(self, count: int, *, words_per_query: int = 4) -> list[str]:
+        """Generate queries made of the most frequent words of a topic."""
+        rng = random.Random(f"{self.seed}-queries")
+        queries = []
+        for _ in range(count):
+            topic = rng.randrange(len(self.topic_words))
+            head = self.topic_words[topic][:20]
+            queries.append(" ".join(rng.sample(head, words_per_query)))
+        return queries
@@ -0,0 +1,321 @@
+"""Retrieval quality vs. latency evaluation.
+
+For every query, the exact top-k chunks by cosine distance are computed with a
+brute-force scan (index scans disabled). Each configured search mode is then
+run through ``Collection.search`` and scored against that ground truth with
+recall@k and nDCG@k, along with its latency.
+
+A mode is a JSON object::
+
+    {
+        "name": "hnsw-ef40",
+        "search_type": "semantic",          # semantic, keyword or hybrid
+        "index": {"method": "hnsw", "m": 16, "ef_construction": 64},
+        "settings": {"PGVECTOR_HNSW_EF_SEARCH": 40}
+    }
+
+``index`` is the ANN index to build before running the mode (null drops it,
+so the search is exact). The indexes are shared by all the collections of the
+database, so they are only rebuilt with ``--rebuild-indexes``, on a database
+dedicated to benchmarking; otherwise every mode runs on the existing indexes.
+``settings`` override ``langconnect.config`` values for the mode. Pass a list
+of modes with ``--modes modes.json``.
+
+Usage:
+    python -m benchmarks.evaluate --documents 2000 --queries 200 -k 10
+    python -m benchmarks.evaluate --collection-id <uuid> --queries-file q.txt
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any
+
+from benchmarks.bench import HEADERS, configure_environment, ingest
+from benchmarks.corpus import SyntheticCorpus
+from benchmarks.stats import ndcg_at_k, percentile, recall_at_k
+
+DEFAULT_MODES: list[dict[str, Any]] = [
+    {"name": "exact", "search_type": "semantic", "index": None},
+    {
+        "name": "hnsw-ef20",
+        "search_type": "semantic",
+        "index": {"method": "hnsw", "m": 16, "ef_construction": 64},
+        "settings": {"PGVECTOR_HNSW_EF_SEARCH": 20},
+    },
+    {
+        "name": "hnsw-ef40",
+        "search_type": "semantic",
+        "index": {"method": "hnsw", "m": 16, "ef_construction": 64},
+        "settings": {"PGVECTOR_HNSW_EF_SEARCH": 40},
+    },
+    {
+        "name": "hnsw-ef100",
+        "search_type": "semantic",
+        "index": {"method": "hnsw", "m": 16, "ef_construction": 64},
+        "settings": {"PGVECTOR_HNSW_EF_SEARCH": 100},
+    },
+    {
+        "name": "hybrid",
+        "search_type": "hybrid",
+        "index": {"method": "hnsw", "m": 16, "ef_construction": 64},
+        "settings": {"PGVECTOR_HNSW_EF_SEARCH": 40},
+    },
+    {"name": "keyword", "search_type": "keyword", "index": None},
+]
+
+COLLECTION_METADATA_SQL = """
+    SELECT cmetadata FROM langchain_pg_collection WHERE uuid = $1
+"""
+
+# The ordering expression follows the collection's vector layout.
+EXACT_SEARCH_SQL = """
+    SELECT e.id
+      FROM langchain_pg_embedding e
+     WHERE e.collection_id = $2
+     ORDER BY {embedding} <=> $1::vector
+     LIMIT $3
+"""
+
+
+async def exact_top_k(
+    collection_id: str, queries: list[str], k: int
+) -> list[list[str]]:
+    """Brute-force top-k chunk ids for each query."""
+    from langconnect.database import quantization
+    from langconnect.database.collections import Collection, embedding_expression
+    from langconnect.database.connection import get_db_connection
+
+    truth = []
+    async with get_db_connection() as conn, conn.transaction():
+        metadata = await conn.fetchval(COLLECTION_METADATA_SQL, collection_id)
+        sql = EXACT_SEARCH_SQL.format(
+            embedding=embedding_expression(quantization.layout_of(metadata))
+        )
+        embeddings = Collection._embeddings_of(metadata or {})
+        await conn.execute("SET LOCAL enable_indexscan = off")
+        await conn.execute("SET LOCAL enable_bitmapscan = off")
+        for query in queries:
+            embedding = await embeddings.aembed_query(query)
+            rows = await conn.fetch(sql, embedding, collection_id, k)
+            truth.append([str(row["id"]) for row in rows])
+    return truth
+
+
+async def _apply_index(index: dict[str, Any] | None, current: Any) -> Any:
+    from langconnect.database.indexes import create_vector_index, drop_vector_index
+
+    if index == current:
+        return current
+    await drop_vector_index()
+    if index:
+        params = {key: value for key, value in index.items() if key != "method"}
+        print(f"Building {index['method']} index {params}...", file=sys.stderr)
+        await create_vector_index(index["method"], **params)
+    return index
+
+
+async def evaluate_mode(
+    collection: Any,
+    mode: dict[str, Any],
+    queries: list[str],
+    truth: list[list[str]],
+    k: int,
+) -> dict[str, Any]:
+    """Run the queries of one mode and score them against the ground truth."""
+    from langconnect import config
+
+    overrides = mode.get("settings", {})
+    previous = {name: getattr(config, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    try:
+        # Warm up caches, so the first queries don't skew latency.
+        for query in queries[:5]:
+            await collection.search(query, limit=k, search_type=mode["search_type"])
+        latencies, recalls, ndcgs = [], [], []
+        for query, expected in zip(queries, truth, strict=True):
+            start = time.perf_counter()
+            results = await collection.search(
+                query, limit=k, search_type=mode["search_type"]
+            )
+            latencies.append(time.perf_counter() - start)
+            retrieved = [result["id"] for result in results]
+            recalls.append(recall_at_k(retrieved, expected, k))
+            ndcgs.append(ndcg_at_k(retrieved, expected, k))
+    finally:
+        for name, value in previous.items():
+            setattr(config, name, value)
+
+    scored = [r for r in recalls if r == r]  # drop NaN for empty ground truth
+    scored_ndcg = [n for n in ndcgs if n == n]
+    return {
+        "name": mode["name"],
+        "search_type": mode["search_type"],
+        "index": mode.get("index"),
+        "settings": overrides,
+        f"recall@{k}": round(sum(scored) / len(scored), 4) if scored else None,
+        f"ndcg@{k}": round(sum(scored_ndcg) / len(scored_ndcg), 4)
+        if scored_ndcg
+        else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+    }
+
+
+def format_table(rows: list[dict[str, Any]], k: int) -> str:
+    """Render the evaluation results as a text table."""
+    header = (
+        f"{'mode':<20} {'type':<9} {f'recall@{k}':>10} {f'ndcg@{k}':>9} "
+        f"{'p50 ms':>9} {'p95 ms':>9}"
+    )
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        recall = row[f"recall@{k}"]
+        ndcg = row[f"ndcg@{k}"]
+        lines.append(
+            f"{row['name']:<20} {row['search_type']:<9} "
+            f"{recall if recall is not None else '-':>10} "
+            f"{ndcg if ndcg is not None else '-':>9} "
+            f"{row['p50_ms']:>9} {row['p95_ms']:>9}"
+        )
+    return "\n".join(lines)
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run the evaluation and return the results."""
+    from httpx import ASGITransport, AsyncClient
+
+    from langconnect.database.collections import Collection
+    from langconnect.database.indexes import drop_vector_index
+    from langconnect.server import APP, lifespan
+
+    if args.modes:
+        with open(args.modes) as f:
+            modes = json.load(f)
+    else:
+        modes = DEFAULT_MODES
+
+    corpus = SyntheticCorpus(seed=args.seed)
+    if args.queries_file:
+        with open(args.queries_file) as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = corpus.queries(args.queries)
+
+    async with (
+        lifespan(APP),
+        AsyncClient(
+            base_url="http://evaluate", transport=ASGITransport(app=APP), timeout=None
+        ) as client,
+    ):
+        collection_id = args.collection_id
+        created = False
+        if not collection_id:
+            response = await client.post(
+                "/collections",
+                json={"name": f"evaluation-{int(time.time())}", "metadata": {}},
+                headers=HEADERS,
+            )
+            response.raise_for_status()
+            collection_id = response.json()["uuid"]
+            created = True
+            print(f"Ingesting {args.documents} documents...", file=sys.stderr)
+            await ingest(
+                client,
+                collection_id,
+                corpus,
+                documents=args.documents,
+                words_per_document=args.words_per_document,
+                files_per_request=10,
+                chunk_size=args.chunk_size,
+                chunk_overlap=args.chunk_overlap,
+            )
+        try:
+            print("Computing exact top-k...", file=sys.stderr)
+            truth = await exact_top_k(collection_id, queries, args.k)
+            collection = Collection(collection_id, args.user)
+            rows = []
+            current_index: Any = object()
+            if not args.rebuild_indexes:
+                print(
+                    "Running every mode on the existing indexes; pass "
+                    "--rebuild-indexes on a database dedicated to benchmarking "
+                    "to build the index of each mode.",
+                    file=sys.stderr,
+                )
+                modes = [{**mode, "index": "existing"} for mode in modes]
+            # Run modes sharing an index together, so each index is built once.
+            for mode in sorted(modes, key=lambda m: json.dumps(m.get("index"))):
+                if args.rebuild_indexes:
+                    current_index = await _apply_index(
+                        mode.get("index"), current_index
+                    )
+                print(f"Evaluating {mode['name']}...", file=sys.stderr)
+                rows.append(
+                    await evaluate_mode(collection, mode, queries, truth, args.k)
+                )
+            if args.rebuild_indexes and not args.keep_index:
+                await drop_vector_index()
+        finally:
+            if created and not args.keep:
+                await client.delete(f"/collections/{collection_id}", headers=HEADERS)
+
+    order = {mode["name"]: i for i, mode in enumerate(modes)}
+    rows.sort(key=lambda row: order[row["name"]])
+    return {"k": args.k, "queries": len(queries), "modes": rows}
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.evaluate")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument(
+        "--collection-id", help="Evaluate an existing collection instead."
+    )
+    parser.add_argument(
+        "--user", default="user1", help="Owner of --collection-id (default: user1)."
+    )
+    parser.add_argument("--queries-file", help="Queries, one per line.")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--words-per-document", type=int, default=600)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--modes", help="JSON file with the list of modes.")
+    parser.add_argument("--embeddings-provider", default="fake")
+    parser.add_argument("--keep", action="store_true")
+    parser.add_argument(
+        "--rebuild-indexes",
+        action="store_true",
+        help="Drop and build the index of each mode. This affects every "
+        "collection of the database: only use it on one dedicated to benchmarks.",
+    )
+    parser.add_argument(
+        "--keep-index",
+        action="store_true",
+        help="With --rebuild-indexes, keep the index of the last mode instead of "
+        "dropping it.",
+    )
+    parser.add_argument("--output", help="Write the JSON results to this file.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the evaluation from the command line."""
+    args = parse_args(argv)
+    configure_environment(args.embeddings_provider)
+    results = asyncio.run(run(args))
+    print(format_table(results["modes"], results["k"]))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+"""Concurrent load test against a running LangConnect server.
+
+Simulates ``--concurrency`` agents, each looping over a weighted mix of
+operations for ``--duration`` seconds:
+
+* ``search``: semantic, keyword or hybrid search.
+* ``list``: list collections and documents.
+* ``upload``: upload a small synthetic document.
+* ``delete``: delete a chunk uploaded earlier by the same agent.
+
+Agents alternate between the ``user1`` and ``user2`` testing tokens, so start
+the server with ``IS_TESTING=true``. Each user gets a seeded collection.
+
+With ``--target mcp`` the agents call the MCP ``search_documents`` and
+``multi_query`` tools instead, which go through the MCP server's HTTP client
+to the same API. ``multi_query`` calls the OpenAI API and needs
+``OPENAI_API_KEY``; leave it out of the mix otherwise.
+
+The report has throughput, latency percentiles and error rate per operation,
+plus the connection pool wait scraped from the server's ``/metrics``.
+
+Usage:
+    IS_TESTING=true EMBEDDINGS_PROVIDER=fake python -m langconnect &
+    python -m benchmarks.load --url http://localhost:8080 --concurrency 32
+    python -m benchmarks.load --target mcp --mix search_documents=1
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Any
+
+from benchmarks.corpus import SyntheticCorpus, SyntheticDocument
+from benchmarks.stats import summarize
+
+USERS = ("user1", "user2")
+DEFAULT_MIX = {"search": 0.6, "list": 0.15, "upload": 0.15, "delete": 0.1}
+DEFAULT_MCP_MIX = {"search_documents": 0.9, "multi_query": 0.1}
+SEARCH_TYPES = ("semantic", "keyword", "hybrid")
+POOL_WAIT_METRIC = "langconnect_db_pool_acquire_seconds"
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    """Parse ``name=weight,name=weight`` into a dict of weights."""
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = float(weight) if weight else 1.0
+    return mix
+
+
+def histogram_totals(exposition: str, name: str) -> tuple[float, float]:
+    """Sum ``<name>_sum`` and ``<name>_count`` over all label sets.
+
+    Args:
+        exposition: Prometheus text exposition, as served by ``/metrics``.
+        name: Histogram name.
+
+    Returns:
+        The total of the observed values and the number of observations.
+    """
+    total = count = 0.0
+    for line in exposition.splitlines():
+        if line.startswith("#"):
+            continue
+        metric, _, value = line.rpartition(" ")
+        metric = metric.split("{", 1)[0]
+        if metric == f"{name}_sum":
+            total += float(value)
+        elif metric == f"{name}_count":
+            count += float(value)
+    return total, count
+
+
+class Recorder:
+    """Collects per-operation latencies and errors."""
+
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, list[str]] = defaultdict(list)
+
+    async def measure(self, operation: str, call: Any) -> Any:
+        """Await ``call``, recording its latency, or the error it raised."""
+        start = time.perf_counter()
+        try:
+            result = await call
+        except Exception as e:
+            self.errors[operation].append(f"{type(e).__name__}: {e}")
+            return None
+        self.latencies[operation].append(time.perf_counter() - start)
+        return result
+
+    def report(self, wall_time: float) -> dict[str, Any]:
+        """Summarize the recorded operations over the wall time."""
+        operations = {}
+        for operation in sorted(set(self.latencies) | set(self.errors)):
+            errors = self.errors.get(operation, [])
+            summary = summarize(self.latencies.get(operation, []), wall_time)
+            total = summary["count"] + len(errors)
+            summary["errors"] = len(errors)
+            summary["error_rate"] = round(len(errors) / total, 4) if total else 0.0
+            if errors:
+                summary["sample_errors"] = sorted(set(errors))[:3]
+            operations[operation] = summary
+        all_latencies = [v for values in self.latencies.values() for v in values]
+        all_errors = sum(len(errors) for errors in self.errors.values())
+        overall = summarize(all_latencies, wall_time)
+        total = overall["count"] + all_errors
+        overall["errors"] = all_errors
+        overall["error_rate"] = round(all_errors / total, 4) if total else 0.0
+        return {"overall": overall, "operations": operations}
+
+
+class RestAgent:
+    """An agent exercising the REST API."""
+
+    def __init__(
+        self,
+        client: Any,
+        user: str,
+        collection_id: str,
+        documents: list[SyntheticDocument],
+        queries: list[str],
+        rng: random.Random,
+        recorder: Recorder,
+    ) -> None:
+        self.client = client
+        self.headers = {"Authorization": f"Bearer {user}"}
+        self.collection_id = collection_id
+        self.documents = documents
+        self.queries = queries
+        self.rng = rng
+        self.recorder = recorder
+        self.uploaded: list[str] = []
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> Any:
+        response = await self.client.request(
+            method, url, headers=self.headers, **kwargs
+        )
+        response.raise_for_status()
+        return response.json() if response.status_code != 204 else None
+
+    async def search(self) -> None:
+        search_type = self.rng.choice(SEARCH_TYPES)
+        await self.recorder.measure(
+            f"search_{search_type}",
+            self._request(
+                "POST",
+                f"/collections/{self.collection_id}/documents/search",
+                json={
+                    "query": self.rng.choice(self.queries),
+                    "limit": 10,
+                    "search_type": search_type,
+                },
+            ),
+        )
+
+    async def list(self) -> None:
+        if self.rng.random() < 0.5:
+            await self.recorder.measure(
+                "list_collections", self._request("GET", "/collections")
+            )
+        else:
+            await self.recorder.measure(
+                "list_documents",
+                self._request(
+                    "GET",
+                    f"/collections/{self.collection_id}/documents",
+                    params={"limit": 20},
+                ),
+            )
+
+    async def upload(self) -> None:
+        document = self.rng.choice(self.documents)
+        result = await self.recorder.measure(
+            "upload",
+            self._request(
+                "POST",
+                f"/collections/{self.collection_id}/documents",
+                files=[
+                    ("files", (document.filename, document.text.encode(), "text/plain"))
+                ],
+            ),
+        )
+        if result:
+            self.uploaded.extend(result["added_chunk_ids"])
+
+    async def delete(self) -> None:
+        if not self.uploaded:
+            await self.upload()
+            return
+        chunk_id = self.uploaded.pop(self.rng.randrange(len(self.uploaded)))
+        await self.recorder.measure(
+            "delete",
+            self._request(
+                "DELETE", f"/collections/{self.collection_id}/documents/{chunk_id}"
+            ),
+        )
+
+
+class McpAgent:
+    """An agent calling the MCP server tools."""
+
+    def __init__(
+        self,
+        tools: Any,
+        collection_id: str,
+        queries: list[str],
+        rng: random.Random,
+        recorder: Recorder,
+    ) -> None:
+        self.tools = tools
+        self.collection_id = collection_id
+        self.queries = queries
+        self.rng = rng
+        self.recorder = recorder
+
+    async def _call(self, name: str, *args: Any, **kwargs: Any) -> str:
+        tool = getattr(self.tools, name)
+        # FastMCP may wrap the function in a tool object.
+        output = await getattr(tool, "fn", tool)(*args, **kwargs)
+        # The tools report failures in their output instead of raising.
+        if output.startswith("Error") or output.startswith('{"error"'):
+            raise RuntimeError(output[:200])
+        return output
+
+    async def search_documents(self) -> None:
+        await self.recorder.measure(
+            "mcp_search_documents",
+            self._call(
+                "search_documents",
+                self.collection_id,
+                self.rng.choice(self.queries),
+                limit=5,
+                search_type=self.rng.choice(SEARCH_TYPES),
+            ),
+        )
+
+    async def multi_query(self) -> None:
+        await self.recorder.measure(
+            "mcp_multi_query", self._call("multi_query", self.rng.choice(self.queries))
+        )
+
+
+async def _drive(
+    agent: Any, mix: dict[str, float], rng: random.Random, deadline: float
+) -> None:
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.perf_counter() < deadline:
+        operation = rng.choices(names, weights)[0]
+        await getattr(agent, operation)()
+
+
+async def _pool_wait(client: Any) -> tuple[float, float]:
+    try:
+        response = await client.get("/metrics")
+        response.raise_for_status()
+    except Exception:
+        return 0.0, 0.0
+    return histogram_totals(response.text, POOL_WAIT_METRIC)
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    """Seed the collections, run the agents and return the report."""
+    import httpx
+
+    corpus = SyntheticCorpus(seed=args.seed)
+    queries = corpus.queries(200)
+    mix = args.mix or (DEFAULT_MCP_MIX if args.target == "mcp" else DEFAULT_MIX)
+    recorder = Recorder()
+    # Documents uploaded by the agents, distinct from the seeded ones.
+    seeded = corpus.documents(args.documents + 100, words_per_document=300)
+    seeded, uploads = seeded[: args.documents], seeded[args.documents :]
+
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(
+        base_url=args.url, timeout=args.timeout, limits=limits
+    ) as client:
+        collections = {}
+        for user in USERS:
+            headers = {"Authorization": f"Bearer {user}"}
+            response = await client.post(
+                "/collections",
+                json={"name": f"load-{user}-{int(time.time())}", "metadata": {}},
+                headers=headers,
+            )
+            response.raise_for_status()
+            collections[user] = response.json()["uuid"]
+            for i in range(0, len(seeded), 10):
+                files = [
+                    ("files", (doc.filename, doc.text.encode(), "text/plain"))
+                    for doc in seeded[i : i + 10]
+                ]
+                response = await client.post(
+                    f"/collections/{collections[user]}/documents",
+                    files=files,
+                    headers=headers,
+                )
+                response.raise_for_status()
+
+        try:
+            tools = None
+            if args.target == "mcp":
+                tools = _load_mcp_tools(args.url, USERS[0])
+
+            agents = []
+            for i in range(args.concurrency):
+                user = USERS[i % len(USERS)]
+                rng = random.Random(args.seed + i)
+                if tools is not None:
+                    # The MCP server authenticates with a single token.
+                    agent: Any = McpAgent(
+                        tools, collections[USERS[0]], queries, rng, recorder
+                    )
+                else:
+                    agent = RestAgent(
+                        client, user, collections[user], uploads, queries, rng, recorder
+                    )
+                agents.append((agent, rng))
+
+            print(
+                f"Running {args.concurrency} agents for {args.duration}s "
+                f"against {args.url} ({args.target})...",
+                file=sys.stderr,
+            )
+            wait_sum, wait_count = await _pool_wait(client)
+            start = time.perf_counter()
+            deadline = start + args.duration
+            await asyncio.gather(
+                *(_drive(agent, mix, rng, deadline) for agent, rng in agents)
+            )
+            wall_time = time.perf_counter() - start
+            end_sum, end_count = await _pool_wait(client)
+        finally:
+            if not args.keep:
+                for user, collection_id in collections.items():
+                    await client.delete(
+                        f"/collections/{collection_id}",
+                        headers={"Authorization": f"Bearer {user}"},
+                    )
+
+    report = recorder.report(wall_time)
+    acquires = end_count - wait_count
+    report["pool_wait"] = {
+        "acquires": int(acquires),
+        "mean_ms": round((end_sum - wait_sum) / acquires * 1000, 3)
+        if acquires
+        else None,
+        "total_seconds": round(end_sum - wait_sum, 3),
+    }
+    report["meta"] = {
+        "url": args.url,
+        "target": args.target,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "mix": mix,
+    }
+    return report
+
+
+def _load_mcp_tools(url: str, token: str) -> Any:
+    import os
+
+    # The MCP server reads its settings at import time.
+    os.environ["API_BASE_URL"] = url
+    os.environ["SUPABASE_JWT_SECRET"] = token
+    import mcpserver.mcp_server as tools
+
+    return tools
+
+
+def format_report(report: dict[str, Any]) -> str:
+    """Render the report as a text table."""
+    header = (
+        f"{'operation':<22} {'count':>7} {'qps':>8} {'p50 ms':>9} "
+        f"{'p95 ms':>9} {'p99 ms':>9} {'errors':>7}"
+    )
+    lines = [header, "-" * len(header)]
+    rows = [*report["operations"].items(), ("overall", report["overall"])]
+    for operation, summary in rows:
+        lines.append(
+            f"{operation:<22} {summary['count']:>7} {summary['qps'] or 0:>8} "
+            f"{summary['p50_ms'] or '-':>9} {summary['p95_ms'] or '-':>9} "
+            f"{summary['p99_ms'] or '-':>9} {summary['errors']:>7}"
+        )
+    pool = report["pool_wait"]
+    lines.append(
+        f"pool wait: {pool['acquires']} acquires, mean {pool['mean_ms']} ms, "
+        f"total {pool['total_seconds']} s"
+    )
+    return "\n".join(lines)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load")
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--target", choices=("rest", "mcp"), default="rest")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        help="Operation weights, e.g. search=0.6,list=0.15,upload=0.15,delete=0.1",
+    )
+    parser.add_argument(
+        "--documents", type=int, default=50, help="Documents seeded per user."
+    )
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true")
+    parser.add_argument(
+        "--max-error-rate",
+        type=float,
+        help="Exit with status 1 if the overall error rate is higher (for CI).",
+    )
+    parser.add_argument("--output", help="Write the JSON report to this file.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the load test from the command line."""
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    if (
+        args.max_error_rate is not None
+        and report["overall"]["error_rate"] > args.max_error_rate
+    ):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
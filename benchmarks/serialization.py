@@ -0,0 +1,107 @@
+"""Search response serialization benchmark.
+
+Compares the cost of turning search results into a response body:
+
+* ``validate``: validating the result dicts against ``list[SearchResult]``
+  and rendering with the standard library, as FastAPI does for plain dicts.
+* ``construct``: building the models with ``model_construct`` (no validation)
+  and rendering with ``langconnect.serialization`` (orjson when installed).
+
+No database is needed. Usage:
+    python -m benchmarks.serialization --results 100 --content-chars 1000
+"""
+
+import argparse
+import json
+import random
+import time
+import uuid
+from typing import Any
+
+from benchmarks.corpus import SyntheticCorpus
+from benchmarks.stats import percentile
+
+
+def make_results(count: int, content_chars: int, seed: int) -> list[dict[str, Any]]:
+    """Search results shaped like the rows returned by ``Collection.search``."""
+    rng = random.Random(seed)
+    documents = SyntheticCorpus(seed=seed).documents(
+        count, words_per_document=content_chars // 5
+    )
+    return [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "page_content": document.text[:content_chars],
+            "metadata": {
+                "file_id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "source": document.filename,
+                "topic": document.topic,
+            },
+            "score": rng.random(),
+        }
+        for document in documents
+    ]
+
+
+def _time(function: Any, repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(args: argparse.Namespace) -> dict[str, dict[str, float]]:
+    """Time both serialization paths and return their latency in ms."""
+    from pydantic import TypeAdapter
+
+    from langconnect import serialization
+    from langconnect.models import SearchResult
+
+    results = make_results(args.results, args.content_chars, args.seed)
+    adapter = TypeAdapter(list[SearchResult])
+
+    def validate() -> bytes:
+        models = adapter.validate_python(results)
+        content = adapter.dump_python(models, mode="json")
+        return json.dumps(content, ensure_ascii=False).encode()
+
+    def construct() -> bytes:
+        models = [SearchResult.model_construct(**result) for result in results]
+        content = adapter.dump_python(models, mode="json", exclude_unset=True)
+        return serialization.dumps(content)
+
+    report = {}
+    for name, function in (("validate", validate), ("construct", construct)):
+        _time(function, 10)  # warm up
+        timings = _time(function, args.repeat)
+        report[name] = {
+            "p50_ms": round(percentile(timings, 50) * 1000, 3),
+            "p95_ms": round(percentile(timings, 95) * 1000, 3),
+            "bytes": len(function()),
+        }
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.serialization")
+    parser.add_argument("--results", type=int, default=100)
+    parser.add_argument("--content-chars", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    from langconnect import serialization
+
+    print(f"orjson: {'yes' if serialization.orjson is not None else 'no'}")
+    for name, stats in run(args).items():
+        print(
+            f"{name:<10} p50 {stats['p50_ms']:>8} ms  p95 {stats['p95_ms']:>8} ms  "
+            f"{stats['bytes']} bytes"
+        )
+
+
+if __name__ == "__main__":
+    main()
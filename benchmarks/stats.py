@@ -0,0 +1,59 @@
+"""Latency statistics shared by the benchmark scripts."""
+
+import math
+from typing import Any
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Return the q-th percentile (0-100) using linear interpolation."""
+    if not values:
+        return math.nan
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * q / 100
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    if low == high:
+        return ordered[low]
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(latencies: list[float], wall_time: float) -> dict[str, Any]:
+    """Summarize request latencies (seconds) measured over a wall time.
+
+    Returns:
+        Count, throughput and latency percentiles in milliseconds.
+    """
+    count = len(latencies)
+    return {
+        "count": count,
+        "qps": round(count / wall_time, 2) if wall_time > 0 else None,
+        "mean_ms": round(sum(latencies) / count * 1000, 3) if count else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3) if count else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3) if count else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3) if count else None,
+        "max_ms": round(max(latencies) * 1000, 3) if count else None,
+    }
+
+
+def recall_at_k(retrieved: list[str], relevant: list[str], k: int) -> float:
+    """Fraction of the k relevant ids found in the first k retrieved ids."""
+    if not relevant:
+        return math.nan
+    expected = set(relevant[:k])
+    return len(expected.intersection(retrieved[:k])) / len(expected)
+
+
+def ndcg_at_k(retrieved: list[str], relevant: list[str], k: int) -> float:
+    """Normalized discounted cumulative gain with binary relevance."""
+    expected = set(relevant[:k])
+    if not expected:
+        return math.nan
+    dcg = sum(
+        1.0 / math.log2(rank + 2)
+        for rank, doc_id in enumerate(retrieved[:k])
+        if doc_id in expected
+    )
+    ideal = sum(1.0 / math.log2(rank + 2) for rank in range(len(expected)))
+    return dcg / ideal
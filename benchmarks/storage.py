@@ -0,0 +1,268 @@
+"""Vector storage modes: size, latency and recall.
+
+The same synthetic corpus is ingested into one collection per vector layout
+(``vector``, ``halfvec``, ``binary``, and ``vector``/``halfvec`` with a short
+vector, see ``langconnect.database.quantization``). For every layout the
+script reports the stored bytes per chunk of the embedding columns, the size
+of the ANN index it is searched on, search latency, and recall@k / nDCG@k
+against the exact float32 top-k of the ``vector`` collection. Chunks are
+matched across collections by their text, which is identical since the
+corpus and chunking are.
+
+Index sizes are those of the shared per-layout indexes, so run this on a
+database without other collections (and without partitioning). The indexes
+are kept afterwards unless ``--drop-index``. The short
+vectors must be shorter than the embeddings (``PGVECTOR_SHORT_DIMENSION``).
+
+Usage:
+    PGVECTOR_SHORT_DIMENSION=64 python -m benchmarks.storage --documents 2000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any
+
+from benchmarks.bench import HEADERS, configure_environment, ingest
+from benchmarks.corpus import SyntheticCorpus
+from benchmarks.stats import ndcg_at_k, percentile, recall_at_k
+
+# Collection options and searched index of each benchmarked layout.
+LAYOUTS: dict[str, tuple[dict[str, Any], str]] = {
+    "vector": ({"vector_storage": "vector"}, "vector"),
+    "halfvec": ({"vector_storage": "halfvec"}, "halfvec"),
+    "binary": ({"vector_storage": "binary"}, "binary"),
+    "vector-short": ({"vector_storage": "vector", "short_vector": True}, "short"),
+    "halfvec-short": ({"vector_storage": "halfvec", "short_vector": True}, "short"),
+}
+
+EXACT_SEARCH_SQL = """
+    SELECT document
+      FROM langchain_pg_embedding
+     WHERE collection_id = $2
+     ORDER BY embedding <=> $1::vector
+     LIMIT $3
+"""
+
+SIZE_SQL = """
+    SELECT COUNT(*) AS chunks,
+           AVG(COALESCE(pg_column_size(embedding), 0)
+               + COALESCE(pg_column_size(embedding_half), 0)
+               + COALESCE(pg_column_size(embedding_bit), 0)
+               + COALESCE(pg_column_size(embedding_short), 0)
+               + COALESCE(pg_column_size(embedding_unsized), 0)) AS bytes_per_chunk
+      FROM langchain_pg_embedding
+     WHERE collection_id = $1
+"""
+
+
+async def exact_top_k(
+    collection_id: str, queries: list[str], k: int
+) -> list[list[str]]:
+    """Brute-force top-k chunk texts of each query in a ``vector`` collection."""
+    from langconnect import config
+    from langconnect.database.connection import get_db_connection
+
+    embeddings = config.get_default_embeddings()
+    truth = []
+    async with get_db_connection() as conn, conn.transaction():
+        await conn.execute("SET LOCAL enable_indexscan = off")
+        await conn.execute("SET LOCAL enable_bitmapscan = off")
+        for query in queries:
+            embedding = await embeddings.aembed_query(query)
+            rows = await conn.fetch(EXACT_SEARCH_SQL, embedding, collection_id, k)
+            truth.append([row["document"] for row in rows])
+    return truth
+
+
+async def measure_size(collection_id: str, index: str) -> dict[str, Any]:
+    """Stored bytes per chunk of a collection and size of an index."""
+    from langconnect.database.connection import get_db_connection
+    from langconnect.database.quantization import INDEXES
+
+    async with get_db_connection() as conn:
+        row = await conn.fetchrow(SIZE_SQL, collection_id)
+        index_bytes = await conn.fetchval(
+            "SELECT pg_relation_size(to_regclass($1))", INDEXES[index].name
+        )
+    return {
+        "chunks": row["chunks"],
+        "bytes_per_chunk": round(float(row["bytes_per_chunk"] or 0), 1),
+        "index_mb": round(index_bytes / 2**20, 2) if index_bytes is not None else None,
+    }
+
+
+async def evaluate_storage(
+    collection: Any, queries: list[str], truth: list[list[str]], k: int
+) -> dict[str, Any]:
+    """Run the queries on one collection and score them against the truth."""
+    for query in queries[:5]:
+        await collection.search(query, limit=k)
+    latencies, recalls, ndcgs = [], [], []
+    for query, expected in zip(queries, truth, strict=True):
+        start = time.perf_counter()
+        results = await collection.search(query, limit=k)
+        latencies.append(time.perf_counter() - start)
+        retrieved = [result["page_content"] for result in results]
+        recalls.append(recall_at_k(retrieved, expected, k))
+        ndcgs.append(ndcg_at_k(retrieved, expected, k))
+    scored = [r for r in recalls if r == r]  # drop NaN for empty ground truth
+    scored_ndcg = [n for n in ndcgs if n == n]
+    return {
+        f"recall@{k}": round(sum(scored) / len(scored), 4) if scored else None,
+        f"ndcg@{k}": round(sum(scored_ndcg) / len(scored_ndcg), 4)
+        if scored_ndcg
+        else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+    }
+
+
+def format_table(rows: list[dict[str, Any]], k: int) -> str:
+    """Render the results as a text table."""
+    header = (
+        f"{'storage':<13} {'bytes/chunk':>11} {'index MB':>9} "
+        f"{f'recall@{k}':>10} {f'ndcg@{k}':>9} {'p50 ms':>9} {'p95 ms':>9}"
+    )
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        index_mb = row["index_mb"]
+        lines.append(
+            f"{row['storage']:<13} {row['bytes_per_chunk']:>11} "
+            f"{index_mb if index_mb is not None else '-':>9} "
+            f"{row[f'recall@{k}']:>10} {row[f'ndcg@{k}']:>9} "
+            f"{row['p50_ms']:>9} {row['p95_ms']:>9}"
+        )
+    return "\n".join(lines)
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run the benchmark and return the results."""
+    from httpx import ASGITransport, AsyncClient
+
+    from langconnect import config
+    from langconnect.database.collections import Collection
+    from langconnect.database.indexes import create_vector_index, drop_vector_index
+    from langconnect.server import APP, lifespan
+
+    config.PGVECTOR_BINARY_RERANK_FACTOR = args.rerank_factor
+    config.PGVECTOR_SHORT_RERANK_FACTOR = args.short_rerank_factor
+    corpus = SyntheticCorpus(seed=args.seed)
+    queries = corpus.queries(args.queries)
+    rows = []
+    async with (
+        lifespan(APP),
+        AsyncClient(
+            base_url="http://storage", transport=ASGITransport(app=APP), timeout=None
+        ) as client,
+    ):
+        collection_ids: dict[str, str] = {}
+        try:
+            for storage, (options, _) in LAYOUTS.items():
+                response = await client.post(
+                    "/collections",
+                    json={"name": f"storage-{storage}-{int(time.time())}", **options},
+                    headers=HEADERS,
+                )
+                response.raise_for_status()
+                collection_ids[storage] = response.json()["uuid"]
+                print(f"Ingesting {storage}...", file=sys.stderr)
+                await ingest(
+                    client,
+                    collection_ids[storage],
+                    corpus,
+                    documents=args.documents,
+                    words_per_document=args.words_per_document,
+                    files_per_request=10,
+                    chunk_size=args.chunk_size,
+                    chunk_overlap=args.chunk_overlap,
+                )
+            if args.index != "none":
+                print(f"Building {args.index} indexes...", file=sys.stderr)
+                await create_vector_index(args.index, **json.loads(args.index_params))
+            print("Computing exact top-k...", file=sys.stderr)
+            truth = await exact_top_k(collection_ids["vector"], queries, args.k)
+            for storage, collection_id in collection_ids.items():
+                print(f"Evaluating {storage}...", file=sys.stderr)
+                rows.append(
+                    {
+                        "storage": storage,
+                        **await measure_size(collection_id, LAYOUTS[storage][1]),
+                        **await evaluate_storage(
+                            Collection(collection_id, "user1"), queries, truth, args.k
+                        ),
+                    }
+                )
+            if args.index != "none" and args.drop_index:
+                await drop_vector_index()
+        finally:
+            if not args.keep:
+                for collection_id in collection_ids.values():
+                    await client.delete(
+                        f"/collections/{collection_id}", headers=HEADERS
+                    )
+    return {
+        "k": args.k,
+        "queries": len(queries),
+        "index": args.index,
+        "binary_rerank_factor": args.rerank_factor,
+        "short_rerank_factor": args.short_rerank_factor,
+        "modes": rows,
+    }
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.storage")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--words-per-document", type=int, default=600)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--index", choices=["hnsw", "ivfflat", "none"], default="hnsw"
+    )
+    parser.add_argument(
+        "--index-params", default="{}", help="Index build parameters as JSON."
+    )
+    parser.add_argument(
+        "--rerank-factor",
+        type=int,
+        default=10,
+        help="PGVECTOR_BINARY_RERANK_FACTOR for the binary collection.",
+    )
+    parser.add_argument(
+        "--short-rerank-factor",
+        type=int,
+        default=5,
+        help="PGVECTOR_SHORT_RERANK_FACTOR for the collections with short vectors.",
+    )
+    parser.add_argument("--embeddings-provider", default="fake")
+    parser.add_argument("--keep", action="store_true")
+    parser.add_argument(
+        "--drop-index",
+        action="store_true",
+        help="Drop the indexes afterwards, for every collection of the database.",
+    )
+    parser.add_argument("--output", help="Write the JSON results to this file.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the benchmark from the command line."""
+    args = parse_args(argv)
+    configure_environment(args.embeddings_provider)
+    results = asyncio.run(run(args))
+    print(format_table(results["modes"], results["k"]))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,51 @@
+import argparse
+import sys
+
 import uvicorn
 
-uvicorn.run("langconnect.server:APP", host="0.0.0.0", port=8080)
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the API server, or report its startup import time."""
+    parser = argparse.ArgumentParser(prog="python -m langconnect")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--startup-report",
+        action="store_true",
+        help="Print an import time breakdown of the server and exit.",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=20,
+        help="Number of packages and modules to show in the startup report.",
+    )
+    parser.add_argument(
+        "--startup-budget-ms",
+        type=float,
+        default=None,
+        help="Exit with an error if the server import takes longer than this.",
+    )
+    args = parser.parse_args(argv)
+
+    if args.startup_report:
+        from langconnect.startup import measure_import_time
+
+        report = measure_import_time()
+        print(report.format(top=args.top))
+        total_ms = report.total_us / 1000
+        if args.startup_budget_ms is not None and total_ms > args.startup_budget_ms:
+            print(
+                f"\nStartup import time {total_ms:.1f} ms exceeds the budget "
+                f"of {args.startup_budget_ms:.1f} ms.",
+                file=sys.stderr,
+            )
+            return 1
+        return 0
+
+    uvicorn.run("langconnect.server:APP", host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,7 +4,6 @@ from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, EmailStr
-from supabase import create_client
 
 from langconnect import config
 from langconnect.auth import resolve_user
@@ -54,6 +53,8 @@ async def sign_up(request: SignUpRequest) -> AuthResponse:
             detail="Authentication endpoints are disabled in testing mode",
         )
 
+    from supabase import create_client
+
     supabase = create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
 
     try:
@@ -99,6 +100,8 @@ async def sign_in(request: SignInRequest) -> AuthResponse:
             detail="Authentication endpoints are disabled in testing mode",
         )
 
+    from supabase import create_client
+
     supabase = create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
 
     try:
@@ -154,6 +157,8 @@ async def refresh_token(refresh_token: str) -> AuthResponse:
             detail="Authentication endpoints are disabled in testing mode",
         )
 
+    from supabase import create_client
+
     supabase = create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
 
     try:
@@ -1,11 +1,28 @@
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.responses import StreamingResponse
 
 from langconnect.auth import AuthenticatedUser, resolve_user
+from langconnect.database import transfer
 from langconnect.database.collections import CollectionsManager
-from langconnect.models import CollectionCreate, CollectionResponse, CollectionUpdate
+from langconnect.models import (
+    CollectionClone,
+    CollectionCreate,
+    CollectionResponse,
+    CollectionUpdate,
+)
 
 router = APIRouter(prefix="/collections", tags=["collections"])
 
@@ -21,13 +38,40 @@ async def collections_create(
 ):
     """Creates a new PGVector collection by name with optional metadata."""
     collection_info = await CollectionsManager(user.identity).create(
-        collection_data.name, collection_data.metadata
+        collection_data.name,
+        collection_data.metadata,
+        vector_storage=collection_data.vector_storage,
+        short_vector=collection_data.short_vector,
+        embeddings_provider=collection_data.embeddings_provider,
+        embeddings_model=collection_data.embeddings_model,
+        embeddings_dimension=collection_data.embeddings_dimension,
     )
     if not collection_info:
         raise HTTPException(status_code=500, detail="Failed to create collection")
     return CollectionResponse(**collection_info)
 
 
+@router.post(
+    "/import",
+    response_model=CollectionResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def collections_import(
+    user: Annotated[AuthenticatedUser, Depends(resolve_user)],
+    file: UploadFile = File(...),
+    name: str | None = Form(None),
+):
+    """Creates a collection from a Parquet or Arrow export, without re-embedding.
+
+    The collection gets the exported metadata, vector storage and embedding
+    model, and the name of the exported collection unless `name` is given.
+    """
+    collection_info = await transfer.import_collection(
+        user.identity, file.file, name
+    )
+    return CollectionResponse(**collection_info)
+
+
 @router.get("", response_model=list[CollectionResponse])
 async def collections_list(user: Annotated[AuthenticatedUser, Depends(resolve_user)]):
     """Lists all available PGVector collections (name and UUID)."""
@@ -51,13 +95,75 @@ async def collections_get(
     return CollectionResponse(**collection)
 
 
+@router.get("/{collection_id}/export")
+async def collections_export(
+    user: Annotated[AuthenticatedUser, Depends(resolve_user)],
+    collection_id: UUID,
+    format: transfer.TransferFormat = Query("parquet"),
+):
+    """Streams the chunks of a collection with their embeddings.
+
+    The file is Parquet or an Arrow IPC stream (`format=arrow`) and can be
+    loaded into another deployment with `POST /collections/import`.
+    """
+    collection = await CollectionsManager(user.identity).get(str(collection_id))
+    if not collection:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Collection '{collection_id}' not found",
+        )
+    filename = f"{collection_id}.{transfer.FILE_EXTENSIONS[format]}"
+    return StreamingResponse(
+        transfer.export_collection(collection, user.identity, format),
+        media_type=transfer.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post(
+    "/{collection_id}/clone",
+    response_model=CollectionResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def collections_clone(
+    user: Annotated[AuthenticatedUser, Depends(resolve_user)],
+    collection_id: UUID,
+    response: Response,
+    clone_data: CollectionClone | None = None,
+):
+    """Creates a copy of a collection, embeddings included.
+
+    The clone is returned at once; its chunks are copied in the database by
+    the background job linked in the Location header.
+    """
+    clone_data = clone_data or CollectionClone()
+    result = await CollectionsManager(user.identity).clone(
+        str(collection_id), name=clone_data.name, metadata=clone_data.metadata
+    )
+    if not result:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Collection '{collection_id}' not found",
+        )
+    clone, job = result
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return CollectionResponse(**clone)
+
+
 @router.delete("/{collection_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def collections_delete(
     user: Annotated[AuthenticatedUser, Depends(resolve_user)],
     collection_id: UUID,
+    response: Response,
 ):
-    """Deletes a specific PGVector collection by name."""
-    await CollectionsManager(user.identity).delete(str(collection_id))
+    """Deletes a specific PGVector collection by name.
+
+    The collection disappears immediately; its chunks are purged in the
+    background by the job linked in the Location header.
+    """
+    job = await CollectionsManager(user.identity).delete(str(collection_id))
+    if job:
+        response.headers["Location"] = f"/jobs/{job.id}"
     return "Collection deleted successfully."
 
 
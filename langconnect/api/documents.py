@@ -1,20 +1,47 @@
 import logging
-from typing import Annotated, Any
+from collections.abc import AsyncIterator
+from typing import Annotated, Any, Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.responses import StreamingResponse
 from langchain_core.documents import Document
 from pydantic import TypeAdapter, ValidationError
 
+from langconnect import config, serialization, timing
 from langconnect.auth import AuthenticatedUser, resolve_user
-from langconnect.database.collections import Collection
+from langconnect.database.collections import (
+    FULL_PROJECTION,
+    LIST_FIELDS,
+    Collection,
+    Projection,
+)
 from langconnect.models import (
+    DocumentRechunk,
     DocumentResponse,
+    JobResponse,
+    SearchDebugResponse,
     SearchQuery,
     SearchResult,
+    SearchStreamQuery,
     DocumentDelete,
 )
-from langconnect.services import process_document
+from langconnect.services import (
+    content_hash,
+    metadata_hash,
+    process_document,
+    source_file_id,
+)
 
 # Create a TypeAdapter that enforces “list of dict”
 _metadata_adapter = TypeAdapter(list[dict[str, Any]])
@@ -23,6 +50,9 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["documents"])
 
+# Fields of the documents returned by `documents_list`
+_DOCUMENT_FIELDS = tuple(DocumentResponse.model_fields)
+
 @router.delete(
     "/collections/{collection_id}/documents",
     response_model=dict[str, Any],
@@ -62,6 +92,8 @@ async def documents_create(
     metadatas_json: str | None = Form(None),
     chunk_size: int = Form(1000),
     chunk_overlap: int = Form(200),
+    mode: Annotated[Literal["append", "sync"], Form()] = "append",
+    dedup: Annotated[bool, Form()] = False,
 ):
     """Processes and indexes (adds) new document files with optional metadata.
 
@@ -72,6 +104,12 @@ async def documents_create(
         metadatas_json: JSON string containing metadata for each file
         chunk_size: Maximum number of characters in each chunk (default: 1000)
         chunk_overlap: Number of overlapping characters between chunks (default: 200)
+        mode: ``append`` adds the files as new documents. ``sync`` replaces the
+            previous version of each file, identified by its ``source_id``
+            metadata (default: the filename): unchanged files are skipped and
+            only changed chunks are embedded.
+        dedup: Drop chunks that are near-duplicates of other uploaded chunks
+            or of chunks already in the collection (``append`` mode).
     """
     # If no metadata JSON is provided, fill with None
     if not metadatas_json:
@@ -94,22 +132,36 @@ async def documents_create(
                 ),
             )
 
+    if mode == "sync":
+        return await _sync_files(
+            Collection(collection_id=str(collection_id), user_id=user.identity),
+            files,
+            metadatas,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+        )
+
     docs_to_index: list[Document] = []
+    parsed: dict[str, list[Document]] = {}
     processed_files_count = 0
     failed_files = []
 
     # Pair files with their corresponding metadata
     for file, metadata in zip(files, metadatas, strict=False):
         try:
+            file_parsed: list[Document] = []
             # Pass metadata and chunk parameters to process_document
             langchain_docs = await process_document(
                 file,
                 metadata=metadata,
                 chunk_size=chunk_size,
                 chunk_overlap=chunk_overlap,
+                parsed=file_parsed if config.STORE_PARSED_TEXT else None,
             )
             if langchain_docs:
                 docs_to_index.extend(langchain_docs)
+                if file_parsed:
+                    parsed[langchain_docs[0].metadata["file_id"]] = file_parsed
                 processed_files_count += 1
             else:
                 logger.info(
@@ -140,8 +192,23 @@ async def documents_create(
             collection_id=str(collection_id),
             user_id=user.identity,
         )
-        added_ids = await collection.upsert(docs_to_index)
-        if not added_ids:
+        signatures = None
+        duplicates: list[dict[str, Any]] = []
+        if dedup:
+            deduplicated = await collection.drop_near_duplicates(
+                docs_to_index, config.DEDUP_THRESHOLD
+            )
+            docs_to_index = deduplicated.documents
+            duplicates = deduplicated.duplicates
+            signatures = deduplicated.signatures
+        added_ids = (
+            await collection.upsert(
+                docs_to_index, signatures=signatures, parsed=parsed
+            )
+            if docs_to_index
+            else []
+        )
+        if not added_ids and not duplicates:
             # This might indicate a problem with the vector store itself
             raise HTTPException(
                 status_code=500,
@@ -158,6 +225,9 @@ async def documents_create(
             "message": success_message,
             "added_chunk_ids": added_ids,
         }
+        if dedup:
+            response_data["dropped_duplicates"] = len(duplicates)
+            response_data["duplicates"] = duplicates
 
         if failed_files:
             response_data["warnings"] = (
@@ -179,21 +249,186 @@ async def documents_create(
         )
 
 
+def _is_unchanged(
+    stored: dict[str, Any] | None,
+    file_hash: str,
+    metadata: dict | None,
+    chunk_size: int,
+    chunk_overlap: int,
+) -> bool:
+    """Whether a file's stored chunks were produced from the same upload.
+
+    The metadata is compared as a whole through its hash, so removed keys
+    count as a change too.
+    """
+    if not stored:
+        return False
+    expected = {
+        "metadata_hash": metadata_hash(metadata),
+        "file_hash": file_hash,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+    }
+    return all(stored.get(key) == value for key, value in expected.items())
+
+
+async def _sync_files(
+    collection: Collection,
+    files: list[UploadFile],
+    metadatas: list[dict] | list[None],
+    *,
+    chunk_size: int,
+    chunk_overlap: int,
+) -> dict[str, Any]:
+    """Replace the previous version of each file (``mode=sync``)."""
+    results = []
+    failed_files = []
+    added_ids: list[str] = []
+    for file, metadata in zip(files, metadatas, strict=False):
+        source_id = (metadata or {}).get("source_id") or file.filename
+        if not source_id:
+            failed_files.append(file.filename)
+            continue
+        metadata = {**(metadata or {}), "source_id": source_id}
+        file_id = source_file_id(source_id)
+        try:
+            contents = await file.read()
+            await file.seek(0)
+            stored = await collection.file_metadata(file_id)
+            if _is_unchanged(
+                stored, content_hash(contents), metadata, chunk_size, chunk_overlap
+            ):
+                results.append(
+                    {"source_id": source_id, "file_id": file_id, "status": "skipped"}
+                )
+                continue
+            parsed: list[Document] = []
+            docs = await process_document(
+                file,
+                metadata=metadata,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                file_id=file_id,
+                parsed=parsed if config.STORE_PARSED_TEXT else None,
+            )
+            stats = await collection.sync_file(file_id, docs, parsed=parsed)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.info(f"Error syncing file {file.filename}: {e}")
+            failed_files.append(file.filename)
+            continue
+        added_ids.extend(stats.pop("added_chunk_ids"))
+        results.append(
+            {
+                "source_id": source_id,
+                "file_id": file_id,
+                "status": "updated" if stored else "created",
+                **stats,
+            }
+        )
+
+    if not results:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                "Failed to sync any files. "
+                f"Files that failed: {', '.join(map(str, failed_files))}."
+            ),
+        )
+    skipped = sum(result["status"] == "skipped" for result in results)
+    response_data = {
+        "success": True,
+        "message": (
+            f"{len(results)} file(s) synced ({skipped} unchanged), "
+            f"{len(added_ids)} chunk(s) embedded."
+        ),
+        "added_chunk_ids": added_ids,
+        "files": results,
+    }
+    if failed_files:
+        response_data["warnings"] = (
+            f"Processing failed for files: {', '.join(map(str, failed_files))}"
+        )
+    return response_data
+
+
+@router.post(
+    "/collections/{collection_id}/documents/rechunk",
+    response_model=JobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def documents_rechunk(
+    user: Annotated[AuthenticatedUser, Depends(resolve_user)],
+    collection_id: UUID,
+    rechunk: DocumentRechunk,
+    response: Response,
+):
+    """Splits files again with other chunk parameters.
+
+    The files are split from the text stored when they were uploaded, and
+    only the chunks that changed are embedded again, by the background job
+    linked in the Location header. Files uploaded without stored text are
+    listed in the job's ``missing_files``.
+    """
+    job = await Collection(
+        collection_id=str(collection_id), user_id=user.identity
+    ).rechunk(
+        rechunk.chunk_size, rechunk.chunk_overlap, file_ids=rechunk.file_ids
+    )
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return JobResponse(**job.to_dict())
+
+
 @router.get(
-    "/collections/{collection_id}/documents", response_model=list[DocumentResponse]
+    "/collections/{collection_id}/documents",
+    # The response is returned as is, the model only documents it
+    response_model=None,
+    responses={200: {"model": list[DocumentResponse]}},
 )
 async def documents_list(
     user: Annotated[AuthenticatedUser, Depends(resolve_user)],
     collection_id: UUID,
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    fields: str | None = Query(
+        None,
+        description=(
+            "Comma-separated fields to return: content, metadata. The id and "
+            "collection_id are always returned, other fields are null."
+        ),
+    ),
+    snippet_chars: int | None = Query(
+        None, ge=1, description="Return at most this many characters of content."
+    ),
 ):
     """Lists documents within a specific collection."""
+    projection = FULL_PROJECTION
+    if fields is not None or snippet_chars is not None:
+        requested = None
+        if fields is not None:
+            requested = {field.strip() for field in fields.split(",") if field.strip()}
+            if unknown := requested - LIST_FIELDS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+                )
+            requested |= {"id", "collection_id"}
+        projection = Projection(
+            fields=frozenset(requested) if requested is not None else None,
+            content_chars=snippet_chars,
+        )
+
     collection = Collection(
         collection_id=str(collection_id),
         user_id=user.identity,
     )
-    return await collection.list(limit=limit, offset=offset)
+    docs = await collection.list(limit=limit, offset=offset, projection=projection)
+    # The rows come from the database, so skip validation; unrequested fields
+    # are null
+    return serialization.JSONResponse(
+        [{field: doc.get(field) for field in _DOCUMENT_FIELDS} for doc in docs]
+    )
 
 
 @router.delete(
@@ -230,15 +465,44 @@ async def documents_delete(
     return {"success": True}
 
 
+def _search_projection(
+    search_query: SearchQuery, content_chars: int | None = None
+) -> Projection:
+    """Projection of the fields requested by a search query."""
+    if (
+        search_query.fields is None
+        and search_query.snippet_chars is None
+        and content_chars is None
+    ):
+        return FULL_PROJECTION
+    fields = None
+    if search_query.fields is not None:
+        fields = frozenset({"id", *search_query.fields})
+    return Projection(
+        fields=fields,
+        content_chars=content_chars,
+        snippet_chars=search_query.snippet_chars,
+    )
+
+
 @router.post(
-    "/collections/{collection_id}/documents/search", response_model=list[SearchResult]
+    "/collections/{collection_id}/documents/search",
+    # The response is returned as is, the models only document it
+    response_model=None,
+    responses={200: {"model": list[SearchResult] | SearchDebugResponse}},
 )
 async def documents_search(
     user: Annotated[AuthenticatedUser, Depends(resolve_user)],
     collection_id: UUID,
     search_query: SearchQuery,
 ):
-    """Search for documents within a specific collection."""
+    """Search for documents within a specific collection.
+
+    Stage durations are always reported in the Server-Timing response header.
+    With `debug` (or `explain`) the results are wrapped together with the
+    timing breakdown (and query plans). `fields` and `snippet_chars` reduce
+    the size of each result; unrequested columns are not read.
+    """
     if not search_query.query:
         raise HTTPException(status_code=400, detail="Search query cannot be empty")
 
@@ -247,10 +511,101 @@ async def documents_search(
         user_id=user.identity,
     )
 
+    # Collect stage timings even when not served through the middleware
+    request_timing = timing.current_or_start()
     results = await collection.search(
         search_query.query,
         limit=search_query.limit or 10,
         search_type=search_query.search_type,
         filter=search_query.filter,
+        explain=search_query.explain,
+        projection=_search_projection(search_query),
+        diversify=search_query.diversify,
+        mmr_lambda=search_query.mmr_lambda,
+        max_per_file=search_query.max_per_file,
+        rerank=search_query.rerank,
+        rerank_budget_ms=search_query.rerank_budget_ms,
+    )
+    # The rows come from the database in the response shape, with only the
+    # requested fields, so they are serialized without validation.
+    if search_query.debug or search_query.explain:
+        return serialization.JSONResponse(
+            {
+                "results": results,
+                "timings": request_timing.as_dict(),
+                "plans": request_timing.plans or None,
+            }
+        )
+    return serialization.JSONResponse(results)
+
+
+async def _encode_stream(
+    results: AsyncIterator[dict[str, Any]], search_query: SearchStreamQuery
+) -> AsyncIterator[str]:
+    """Serialize streamed search results as NDJSON lines or SSE events."""
+    sse = search_query.format == "sse"
+    count = 0
+    try:
+        async for result in results:
+            data = serialization.dumps_str(result)
+            yield f"event: result\ndata: {data}\n\n" if sse else f"{data}\n"
+            count += 1
+    except Exception as e:
+        # The status line is already sent, report the failure in the stream.
+        logger.exception("Streamed search failed")
+        error = serialization.dumps_str({"error": str(e)})
+        yield f"event: error\ndata: {error}\n\n" if sse else f"{error}\n"
+        return
+    finally:
+        # Release the database connection if the client went away early.
+        await results.aclose()
+    if sse:
+        yield f"event: end\ndata: {serialization.dumps_str({'count': count})}\n\n"
+
+
+@router.post("/collections/{collection_id}/documents/search/stream")
+async def documents_search_stream(
+    user: Annotated[AuthenticatedUser, Depends(resolve_user)],
+    collection_id: UUID,
+    search_query: SearchStreamQuery,
+):
+    """Search for documents, streaming the results as they are ranked.
+
+    Results are sent as newline-delimited JSON (`application/x-ndjson`) or as
+    server-sent events (`text/event-stream`), so clients can start on the first
+    results before the last ones are read. `fields`, `snippet_chars` and
+    `max_content_chars` reduce the size of each result.
+    """
+    if not search_query.query:
+        raise HTTPException(status_code=400, detail="Search query cannot be empty")
+    if search_query.debug or search_query.explain:
+        raise HTTPException(
+            status_code=400,
+            detail="debug and explain are not supported by streamed searches.",
+        )
+
+    collection = Collection(
+        collection_id=str(collection_id),
+        user_id=user.identity,
+    )
+    # Errors such as a missing collection are raised before streaming starts
+    results = await collection.search_stream(
+        search_query.query,
+        limit=search_query.limit or 10,
+        search_type=search_query.search_type,
+        filter=search_query.filter,
+        projection=_search_projection(search_query, search_query.max_content_chars),
+        diversify=search_query.diversify,
+        mmr_lambda=search_query.mmr_lambda,
+        max_per_file=search_query.max_per_file,
+        rerank=search_query.rerank,
+        rerank_budget_ms=search_query.rerank_budget_ms,
+    )
+    media_type = (
+        "text/event-stream" if search_query.format == "sse" else "application/x-ndjson"
+    )
+    return StreamingResponse(
+        _encode_stream(results, search_query),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache"},
     )
-    return results
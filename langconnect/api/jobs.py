@@ -0,0 +1,30 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from langconnect import jobs
+from langconnect.auth import AuthenticatedUser, resolve_user
+from langconnect.models import JobResponse
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.get("", response_model=list[JobResponse])
+async def jobs_list(user: Annotated[AuthenticatedUser, Depends(resolve_user)]):
+    """Lists the background jobs of the user running on this worker."""
+    return [JobResponse(**job.to_dict()) for job in jobs.list_jobs(user.identity)]
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def jobs_get(
+    user: Annotated[AuthenticatedUser, Depends(resolve_user)],
+    job_id: str,
+):
+    """Retrieves the status and progress of a background job."""
+    job = jobs.get(job_id, user.identity)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job '{job_id}' not found",
+        )
+    return JobResponse(**job.to_dict())
@@ -1,16 +1,17 @@
 """Auth to resolve user object."""
 
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated
 
 from fastapi import Depends
 from fastapi.exceptions import HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from gotrue.types import User
 from starlette.authentication import BaseUser
-from supabase import create_client
 
 from langconnect import config
 
+if TYPE_CHECKING:
+    from gotrue.types import User
+
 security = HTTPBearer()
 
 
@@ -43,7 +44,7 @@ class AuthenticatedUser(BaseUser):
         return self.user_id
 
 
-def get_current_user(authorization: str) -> User:
+def get_current_user(authorization: str) -> "User":
     """Authenticate a user by validating their JWT token against Supabase.
 
     This function verifies the provided JWT token by making a request to Supabase.
@@ -60,6 +61,9 @@ def get_current_user(authorization: str) -> User:
         HTTPException: With status code 500 if Supabase configuration is missing
         HTTPException: With status code 401 if token is invalid or authentication fails
     """
+    # The supabase client is slow to import and unused in testing mode.
+    from supabase import create_client
+
     supabase = create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
     response = supabase.auth.get_user(authorization)
     user = response.user
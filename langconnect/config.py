@@ -1,8 +1,14 @@
+import functools
 import json
+from typing import TYPE_CHECKING, Any
 
-from langchain_core.embeddings import Embeddings
 from starlette.config import Config, undefined
 
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+
+    from langconnect.rerankers import CachedReranker
+
 env = Config()
 
 IS_TESTING = env("IS_TESTING", cast=str, default="").lower() == "true"
@@ -15,14 +21,119 @@ else:
     SUPABASE_KEY = env("SUPABASE_KEY", cast=str, default=undefined)
 
 
-def get_embeddings() -> Embeddings:
+# Embeddings configuration
+# Provider is one of the names registered in langconnect.embeddings
+# ("openai", "local", "fake"). An empty model or a zero dimension selects
+# the provider default.
+EMBEDDINGS_PROVIDER = env("EMBEDDINGS_PROVIDER", cast=str, default="openai")
+EMBEDDINGS_MODEL = env("EMBEDDINGS_MODEL", cast=str, default="")
+EMBEDDINGS_DIMENSION = env("EMBEDDINGS_DIMENSION", cast=int, default=0)
+EMBEDDINGS_BATCH_SIZE = env("EMBEDDINGS_BATCH_SIZE", cast=int, default=32)
+EMBEDDINGS_MAX_WORKERS = env("EMBEDDINGS_MAX_WORKERS", cast=int, default=1)
+EMBEDDINGS_LOCAL_BACKEND = env("EMBEDDINGS_LOCAL_BACKEND", cast=str, default="torch")
+EMBEDDINGS_QUERY_CACHE_SIZE = env("EMBEDDINGS_QUERY_CACHE_SIZE", cast=int, default=1024)
+# Collections can be created with their own embedding model; at most this many
+# of those models are kept loaded, the least recently used is released.
+EMBEDDINGS_MAX_MODELS = env("EMBEDDINGS_MAX_MODELS", cast=int, default=8)
+
+# Reranker applied to searches with `rerank`, one of the names registered in
+# langconnect.rerankers ("cross-encoder", "fake"); empty disables reranking.
+RERANKER_PROVIDER = env("RERANKER_PROVIDER", cast=str, default="")
+RERANKER_MODEL = env("RERANKER_MODEL", cast=str, default="")
+RERANKER_BATCH_SIZE = env("RERANKER_BATCH_SIZE", cast=int, default=32)
+RERANKER_MAX_WORKERS = env("RERANKER_MAX_WORKERS", cast=int, default=1)
+RERANKER_CACHE_SIZE = env("RERANKER_CACHE_SIZE", cast=int, default=10000)
+# Reranked searches score this many times more candidates than requested.
+RERANKER_FETCH_FACTOR = env("RERANKER_FETCH_FACTOR", cast=int, default=4)
+# Reranking is skipped (results keep their retrieval order) when it would end
+# after this many milliseconds since the start of the request.
+RERANKER_BUDGET_MS = env("RERANKER_BUDGET_MS", cast=float, default=500.0)
+
+
+def get_embeddings() -> "Embeddings":
     """Get the embeddings instance based on the environment."""
-    from langchain_openai import OpenAIEmbeddings
+    from langconnect.embeddings import InstrumentedEmbeddings, create_embeddings
+
+    embeddings = create_embeddings(
+        EMBEDDINGS_PROVIDER,
+        EMBEDDINGS_MODEL,
+        EMBEDDINGS_DIMENSION or None,
+    )
+    return InstrumentedEmbeddings(
+        embeddings, query_cache_size=EMBEDDINGS_QUERY_CACHE_SIZE
+    )
+
+
+def get_embedding_dimension(embeddings: "Embeddings") -> int | None:
+    """Get the vector size used for the vector schema."""
+    if EMBEDDINGS_DIMENSION:
+        return EMBEDDINGS_DIMENSION
+
+    from langconnect.embeddings import get_embedding_dimension as _dimension
+
+    return _dimension(embeddings)
+
+
+@functools.cache
+def get_default_embeddings() -> "Embeddings":
+    """Get the shared embeddings instance, creating it on first use."""
+    return get_embeddings()
+
+
+def get_collection_embeddings(
+    provider: str | None = None, model: str | None = None, dimension: int | None = None
+) -> "Embeddings":
+    """Get the embeddings instance of a collection's model.
+
+    Collections without a model of their own use the shared instance.
+    """
+    if not provider or (
+        provider == EMBEDDINGS_PROVIDER
+        and (model or "") in ("", EMBEDDINGS_MODEL)
+        and (dimension or None) in (None, EMBEDDINGS_DIMENSION or None)
+    ):
+        return get_default_embeddings()
+    return _get_model_embeddings(provider, model or "", dimension or None)
 
-    return OpenAIEmbeddings(model="text-embedding-3-small")
+
+@functools.lru_cache(maxsize=EMBEDDINGS_MAX_MODELS)
+def _get_model_embeddings(
+    provider: str, model: str, dimension: int | None
+) -> "Embeddings":
+    from langconnect.embeddings import InstrumentedEmbeddings, create_embeddings
+
+    return InstrumentedEmbeddings(
+        create_embeddings(provider, model, dimension),
+        query_cache_size=EMBEDDINGS_QUERY_CACHE_SIZE,
+    )
+
+
+@functools.cache
+def get_default_reranker() -> "CachedReranker | None":
+    """Get the shared reranker, or None when reranking is disabled."""
+    if not RERANKER_PROVIDER:
+        return None
+    from langconnect.rerankers import CachedReranker, create_reranker
+
+    return CachedReranker(
+        create_reranker(RERANKER_PROVIDER, RERANKER_MODEL),
+        cache_size=RERANKER_CACHE_SIZE,
+    )
+
+
+def __getattr__(name: str) -> Any:
+    """Resolve DEFAULT_EMBEDDINGS and EMBEDDING_DIMENSION lazily.
+
+    Creating the embeddings client is slow, so it is deferred until the first
+    request that needs it instead of happening at import time.
+    """
+    if name == "DEFAULT_EMBEDDINGS":
+        return get_default_embeddings()
+    if name == "EMBEDDING_DIMENSION":
+        return get_embedding_dimension(get_default_embeddings())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-DEFAULT_EMBEDDINGS = get_embeddings()
 DEFAULT_COLLECTION_NAME = "default_collection"
 
 
@@ -32,6 +143,107 @@ POSTGRES_PORT = env("POSTGRES_PORT", cast=int, default="5432")
 POSTGRES_USER = env("POSTGRES_USER", cast=str, default="langchain")
 POSTGRES_PASSWORD = env("POSTGRES_PASSWORD", cast=str, default="langchain")
 POSTGRES_DB = env("POSTGRES_DB", cast=str, default="langchain_test")
+POSTGRES_POOL_MIN_SIZE = env("POSTGRES_POOL_MIN_SIZE", cast=int, default=10)
+POSTGRES_POOL_MAX_SIZE = env("POSTGRES_POOL_MAX_SIZE", cast=int, default=10)
+# Idle connections above the minimum size are closed after this many seconds.
+POSTGRES_POOL_MAX_INACTIVE_LIFETIME = env(
+    "POSTGRES_POOL_MAX_INACTIVE_LIFETIME", cast=float, default=300.0
+)
+# Default timeout of each statement in seconds, 0 to disable.
+POSTGRES_COMMAND_TIMEOUT = env("POSTGRES_COMMAND_TIMEOUT", cast=float, default=60.0)
+# Prepared statements cached per connection, 0 to disable.
+POSTGRES_STATEMENT_CACHE_SIZE = env(
+    "POSTGRES_STATEMENT_CACHE_SIZE", cast=int, default=100
+)
+# Set when connecting through PgBouncer in transaction or statement pooling
+# mode, where prepared statements can't be reused across transactions. This
+# disables the statement cache and the statement warm-up.
+POSTGRES_PGBOUNCER = env("POSTGRES_PGBOUNCER", cast=str, default="false").lower() == "true"
+
+# Read replica used for searches and listings. Disabled when the host is empty;
+# the other settings default to those of the primary.
+POSTGRES_READ_HOST = env("POSTGRES_READ_HOST", cast=str, default="")
+POSTGRES_READ_PORT = env("POSTGRES_READ_PORT", cast=int, default=POSTGRES_PORT)
+POSTGRES_READ_USER = env("POSTGRES_READ_USER", cast=str, default=POSTGRES_USER)
+POSTGRES_READ_PASSWORD = env(
+    "POSTGRES_READ_PASSWORD", cast=str, default=POSTGRES_PASSWORD
+)
+POSTGRES_READ_DB = env("POSTGRES_READ_DB", cast=str, default=POSTGRES_DB)
+POSTGRES_READ_POOL_MIN_SIZE = env(
+    "POSTGRES_READ_POOL_MIN_SIZE", cast=int, default=POSTGRES_POOL_MIN_SIZE
+)
+POSTGRES_READ_POOL_MAX_SIZE = env(
+    "POSTGRES_READ_POOL_MAX_SIZE", cast=int, default=POSTGRES_POOL_MAX_SIZE
+)
+# After a user's own write, their reads go to the primary for this many
+# seconds, so they see the write despite replication lag. Only reads served by
+# the worker that made the write are routed so, see `mark_write`.
+POSTGRES_READ_YOUR_WRITES_SECONDS = env(
+    "POSTGRES_READ_YOUR_WRITES_SECONDS", cast=float, default=5.0
+)
+
+# Approximate nearest neighbor index on the embedding column, created at
+# startup: "" (none, exact search), "hnsw" or "ivfflat". Build parameters are
+# given as JSON, e.g. {"m": 16, "ef_construction": 64} or {"lists": 100}.
+PGVECTOR_INDEX = env("PGVECTOR_INDEX", cast=str, default="")
+PGVECTOR_INDEX_PARAMS = json.loads(env("PGVECTOR_INDEX_PARAMS", cast=str, default="{}"))
+# Search parameters of the index, 0 keeps the server default.
+PGVECTOR_HNSW_EF_SEARCH = env("PGVECTOR_HNSW_EF_SEARCH", cast=int, default=0)
+PGVECTOR_IVFFLAT_PROBES = env("PGVECTOR_IVFFLAT_PROBES", cast=int, default=0)
+# List-partition the embedding table by collection, so every collection gets
+# its own (smaller) indexes and deleting a collection drops its partition.
+# See langconnect/database/partitions.py for migrating an existing table.
+PGVECTOR_PARTITION_BY_COLLECTION = (
+    env("PGVECTOR_PARTITION_BY_COLLECTION", cast=str, default="false").lower()
+    == "true"
+)
+# Storage of new collections' vectors: "vector" (float32), "halfvec"
+# (float16) or "binary" (1 bit per dimension, rescored on float16 values),
+# see langconnect/database/quantization.py. Searches of "binary" collections
+# rescore this many times more candidates than requested.
+PGVECTOR_DEFAULT_STORAGE = env("PGVECTOR_DEFAULT_STORAGE", cast=str, default="vector")
+PGVECTOR_BINARY_RERANK_FACTOR = env(
+    "PGVECTOR_BINARY_RERANK_FACTOR", cast=int, default=10
+)
+# Collections created with `short_vector` also store the first this many
+# dimensions of each embedding, search those first and rescore this many
+# times more candidates than requested with the full vectors. The dimension
+# sizes a table column, so it can't be changed once the column exists.
+PGVECTOR_SHORT_DIMENSION = env("PGVECTOR_SHORT_DIMENSION", cast=int, default=256)
+PGVECTOR_SHORT_RERANK_FACTOR = env("PGVECTOR_SHORT_RERANK_FACTOR", cast=int, default=5)
+
+# Deleted collections are hidden at once and their chunks purged in the
+# background, in batches of this many chunks with a pause (seconds) between
+# batches so autovacuum and replicas keep up.
+COLLECTION_PURGE_BATCH_SIZE = env("COLLECTION_PURGE_BATCH_SIZE", cast=int, default=5000)
+COLLECTION_PURGE_PAUSE = env("COLLECTION_PURGE_PAUSE", cast=float, default=0.1)
+# Collections are cloned in batches of this many chunks, each copied by one
+# INSERT ... SELECT in its own transaction.
+COLLECTION_CLONE_BATCH_SIZE = env(
+    "COLLECTION_CLONE_BATCH_SIZE", cast=int, default=10000
+)
+# The parsed text of uploaded files is stored (compressed) so they can be
+# split again with other chunk parameters without uploading them again.
+STORE_PARSED_TEXT = env("STORE_PARSED_TEXT", cast=str, default="true").lower() == "true"
+# Collection exports and imports read and write this many chunks at a time.
+COLLECTION_TRANSFER_BATCH_SIZE = env(
+    "COLLECTION_TRANSFER_BATCH_SIZE", cast=int, default=1000
+)
+
+# Diversified searches (`diversify` or `max_per_file`) pick the results among
+# this many times more candidates than requested.
+SEARCH_MMR_FETCH_FACTOR = env("SEARCH_MMR_FETCH_FACTOR", cast=int, default=4)
+
+# Uploads with `dedup` drop chunks whose estimated Jaccard similarity (of word
+# shingles) with another chunk reaches this threshold.
+DEDUP_THRESHOLD = env("DEDUP_THRESHOLD", cast=float, default=0.9)
+
+# Startup warm-up. Computing an embedding at startup loads local models and
+# opens the connection to the embeddings API before the first search.
+WARMUP_EMBEDDINGS = env("WARMUP_EMBEDDINGS", cast=str, default="true").lower() == "true"
+# Seconds the /ready database ping, pool wait included, may take before the
+# worker is reported down.
+READY_DB_TIMEOUT = env("READY_DB_TIMEOUT", cast=float, default=2.0)
 
 # Read allowed origins from environment variable
 ALLOW_ORIGINS_JSON = env("ALLOW_ORIGINS", cast=str, default="")
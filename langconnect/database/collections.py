@@ -8,20 +8,598 @@ The current implementations are based on langchain-postgres PGVector class.
 Replace with your own implementation or favorite vectorstore if needed.
 """
 
+import asyncio
 import builtins
-import json
+import functools
 import logging
+import time
 import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field, replace
 from typing import Any, Literal, NotRequired, Optional, TypedDict
 
+import asyncpg
 from fastapi import status
 from fastapi.exceptions import HTTPException
 from langchain_core.documents import Document
-
-from langconnect.database.connection import get_db_connection, get_vectorstore
+from langchain_core.embeddings import Embeddings
+
+from langconnect import config, jobs, metrics, timing
+from langconnect.database import partitions, quantization
+from langconnect.database.connection import (
+    get_db_connection,
+    get_vectorstore,
+    mark_write,
+    warm_up_pool,
+)
+from langconnect.database.indexes import (
+    create_dimension_index,
+    create_vector_index,
+    index_exists,
+    vector_search_settings,
+)
 
 logger = logging.getLogger(__name__)
 
+# Queries on the request hot path. They are module constants so that asyncpg's
+# per-connection statement cache reuses their prepared statements, and so the
+# pool can prepare them ahead of the first request (see `warm_up`).
+COLLECTIONS_LIST_SQL = """
+    SELECT c.uuid,
+           c.cmetadata,
+           COUNT(DISTINCT e.cmetadata->>'file_id') AS document_count,
+           COUNT(e.id) AS chunk_count
+      FROM langchain_pg_collection c
+      LEFT JOIN langchain_pg_embedding e ON c.uuid = e.collection_id
+     WHERE c.cmetadata->>'owner_id' = $1
+       AND c.cmetadata->>'deleted_at' IS NULL
+     GROUP BY c.uuid
+     ORDER BY c.cmetadata->>'name'
+"""
+
+COLLECTION_GET_SQL = """
+    SELECT uuid, name, cmetadata
+      FROM langchain_pg_collection
+     WHERE uuid = $1
+       AND cmetadata->>'owner_id' = $2
+       AND cmetadata->>'deleted_at' IS NULL
+"""
+
+# Collection metadata key marking a deleted collection (see `delete`).
+DELETED_AT_KEY = "deleted_at"
+# Keys that callers can't set in collection metadata.
+RESERVED_METADATA_KEYS = (*quantization.METADATA_KEYS, DELETED_AT_KEY)
+
+# Metadata update. The keys set at creation (vector layout and embedding model,
+# see `quantization.METADATA_KEYS`) are kept from the current metadata.
+COLLECTION_METADATA_UPDATE_SQL = """
+    UPDATE langchain_pg_collection
+       SET cmetadata = $1::jsonb || jsonb_strip_nulls(
+             jsonb_build_object({kept})
+           )
+     WHERE uuid = $2
+       AND cmetadata->>'owner_id' = $3
+       AND cmetadata->>'deleted_at' IS NULL
+    RETURNING uuid, cmetadata;
+""".format(
+    kept=", ".join(
+        f"'{key}', cmetadata::jsonb->'{key}'" for key in quantization.METADATA_KEYS
+    )
+)
+
+# Chunk upsert. The partitioned embedding table's primary key includes the
+# partition key, so the conflict target differs (see `partitions`). The
+# embedding ($3) is written to the columns of the collection's vector layout
+# (see `quantization`).
+_EMBEDDING_UPSERT_TEMPLATE = """
+    INSERT INTO langchain_pg_embedding
+           (id, collection_id, {columns}, document, cmetadata)
+    VALUES ($1, $2, {values}, $4, $5)
+    ON CONFLICT ({conflict}) DO UPDATE
+       SET {updates},
+           document = EXCLUDED.document,
+           cmetadata = EXCLUDED.cmetadata
+"""
+_EMBEDDING_COLUMNS = {
+    "vector": {"embedding": "{embedding}"},
+    "halfvec": {quantization.HALFVEC_COLUMN: "{embedding}::vector::halfvec"},
+    "binary": {
+        quantization.HALFVEC_COLUMN: "{embedding}::vector::halfvec",
+        quantization.BIT_COLUMN: "binary_quantize({embedding}::vector)",
+    },
+}
+
+
+def embedding_columns(
+    layout: quantization.VectorLayout = quantization.DEFAULT_LAYOUT,
+    embedding: str = "$3",
+) -> dict[str, str]:
+    """Columns of a vector layout and their values computed from an embedding."""
+    if layout.dimension:
+        columns = {quantization.UNSIZED_COLUMN: "{embedding}::vector"}
+    else:
+        columns = dict(_EMBEDDING_COLUMNS[layout.storage])
+    if layout.short_dimension:
+        columns[quantization.SHORT_COLUMN] = (
+            f"subvector({{embedding}}::vector, 1, {int(layout.short_dimension)})"
+        )
+    return {
+        column: value.format(embedding=embedding) for column, value in columns.items()
+    }
+
+
+@functools.cache
+def embedding_upsert_sql(
+    layout: quantization.VectorLayout = quantization.DEFAULT_LAYOUT,
+    partitioned: bool = False,
+) -> str:
+    """Chunk upsert statement for a vector layout."""
+    columns = embedding_columns(layout)
+    return _EMBEDDING_UPSERT_TEMPLATE.format(
+        columns=", ".join(columns),
+        values=", ".join(columns.values()),
+        updates=",\n           ".join(
+            f"{column} = EXCLUDED.{column}" for column in columns
+        ),
+        conflict="collection_id, id" if partitioned else "id",
+    )
+
+
+EMBEDDING_UPSERT_SQL = embedding_upsert_sql()
+EMBEDDING_UPSERT_PARTITIONED_SQL = embedding_upsert_sql(partitioned=True)
+
+# Chunks of a file, for incremental re-ingestion (see `Collection.sync_file`).
+FILE_METADATA_SQL = """
+    SELECT e.cmetadata
+      FROM langchain_pg_embedding e
+      JOIN langchain_pg_collection c ON e.collection_id = c.uuid
+     WHERE c.uuid = $1
+       AND c.cmetadata->>'owner_id' = $2
+       AND c.cmetadata->>'deleted_at' IS NULL
+       AND e.cmetadata->>'file_id' = $3
+     LIMIT 1
+"""
+
+FILE_CHUNKS_SQL = """
+    SELECT id, cmetadata
+      FROM langchain_pg_embedding
+     WHERE collection_id = $1
+       AND cmetadata->>'file_id' = $2
+"""
+
+# MinHash signatures of chunks for near-duplicate detection (see
+# `Collection.drop_near_duplicates`). Rows are deleted with their chunks, see
+# `CHUNK_DELETE_TEMPLATE`, and with their collection.
+SIGNATURE_TABLE_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS langconnect_chunk_signature (
+        collection_id uuid NOT NULL
+            REFERENCES langchain_pg_collection (uuid) ON DELETE CASCADE,
+        chunk_id varchar NOT NULL,
+        signature bytea NOT NULL,
+        bands bigint[] NOT NULL,
+        PRIMARY KEY (collection_id, chunk_id)
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_langconnect_chunk_signature_bands
+        ON langconnect_chunk_signature USING gin (bands)
+    """,
+]
+
+SIGNATURE_CANDIDATES_SQL = """
+    SELECT s.chunk_id, s.signature
+      FROM langconnect_chunk_signature s
+      JOIN langchain_pg_embedding e
+        ON e.collection_id = s.collection_id AND e.id = s.chunk_id
+     WHERE s.collection_id = $1
+       AND s.bands && $2::bigint[]
+"""
+
+SIGNATURE_UPSERT_SQL = """
+    INSERT INTO langconnect_chunk_signature
+           (collection_id, chunk_id, signature, bands)
+    VALUES ($1, $2, $3, $4)
+    ON CONFLICT (collection_id, chunk_id) DO UPDATE
+       SET signature = EXCLUDED.signature,
+           bands = EXCLUDED.bands
+"""
+
+SIGNATURE_DELETE_SQL = """
+    DELETE FROM langconnect_chunk_signature
+     WHERE collection_id = $1
+       AND chunk_id = ANY($2::varchar[])
+"""
+
+# Deletes the chunks of collection $1 returned by `{delete}` (a DELETE ...
+# RETURNING lpe.id) with their signatures, and counts them.
+CHUNK_DELETE_TEMPLATE = """
+    WITH deleted AS ({delete}),
+         signatures AS (
+           DELETE FROM langconnect_chunk_signature
+            WHERE collection_id = $1
+              AND chunk_id IN (SELECT id FROM deleted)
+         )
+    SELECT COUNT(*) FROM deleted
+"""
+
+# Parsed text of each file before splitting, compressed (see
+# `services.compress_parsed`), so files can be split again with other
+# parameters without the original upload (see `Collection.rechunk`).
+FILE_TEXT_TABLE_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS langconnect_file_text (
+        collection_id uuid NOT NULL
+            REFERENCES langchain_pg_collection (uuid) ON DELETE CASCADE,
+        file_id varchar NOT NULL,
+        file_hash varchar NOT NULL,
+        parsed bytea NOT NULL,
+        PRIMARY KEY (collection_id, file_id)
+    )
+    """,
+]
+
+FILE_TEXT_UPSERT_SQL = """
+    INSERT INTO langconnect_file_text (collection_id, file_id, file_hash, parsed)
+    VALUES ($1, $2, $3, $4)
+    ON CONFLICT (collection_id, file_id) DO UPDATE
+       SET file_hash = EXCLUDED.file_hash,
+           parsed = EXCLUDED.parsed
+"""
+
+FILE_TEXT_DELETE_SQL = """
+    DELETE FROM langconnect_file_text AS t
+    USING langchain_pg_collection AS lpc
+    WHERE t.collection_id = lpc.uuid
+      AND lpc.uuid = $1
+      AND lpc.cmetadata->>'owner_id' = $2
+      AND t.file_id = ANY($3::varchar[])
+"""
+
+FILE_TEXT_IDS_SQL = """
+    SELECT file_id
+      FROM langconnect_file_text
+     WHERE collection_id = $1
+"""
+
+# One batch of the purge of a deleted collection (see `purge_collection`).
+PURGE_BATCH_SQL = """
+    DELETE FROM langchain_pg_embedding
+     WHERE collection_id = $1
+       AND id IN (
+             SELECT id
+               FROM langchain_pg_embedding
+              WHERE collection_id = $1
+              LIMIT $2
+                FOR UPDATE SKIP LOCKED
+           )
+"""
+
+# One batch of a collection clone ($1 into $2): the chunks after id $3 with
+# all their vector columns and their near-duplicate signatures, under new ids.
+# Returns the last copied id and the number of copied chunks.
+_CLONE_BATCH_TEMPLATE = """
+    WITH batch AS MATERIALIZED (
+           SELECT gen_random_uuid()::text AS new_id, e.*
+             FROM langchain_pg_embedding e
+            WHERE e.collection_id = $1
+              AND e.id > $3
+            ORDER BY e.id
+            LIMIT $4
+         ),
+         chunks AS (
+           INSERT INTO langchain_pg_embedding
+                  (id, collection_id, {columns}, document, cmetadata)
+           SELECT new_id, $2, {columns}, document, cmetadata
+             FROM batch
+         ),
+         signatures AS (
+           INSERT INTO langconnect_chunk_signature
+                  (collection_id, chunk_id, signature, bands)
+           SELECT $2, b.new_id, s.signature, s.bands
+             FROM batch b
+             JOIN langconnect_chunk_signature s
+               ON s.collection_id = $1 AND s.chunk_id = b.id
+         )
+    SELECT max(id) AS last_id, COUNT(*) AS copied
+      FROM batch
+"""
+
+# Projected queries take their select list as `{columns}`. The number of
+# variants is small (one per combination of requested fields), so they still
+# fit asyncpg's statement cache. The `*_SQL` constants are the full projection.
+DOCUMENTS_LIST_TEMPLATE = """
+    SELECT lpe.id{columns}
+      FROM langchain_pg_embedding lpe
+      JOIN langchain_pg_collection lpc
+        ON lpe.collection_id = lpc.uuid
+     WHERE lpc.uuid = $1
+       AND lpc.cmetadata->>'owner_id' = $2
+       AND lpc.cmetadata->>'deleted_at' IS NULL
+     ORDER BY lpe.cmetadata->>'file_id', lpe.id
+     LIMIT $3
+    OFFSET $4
+"""
+
+# Queries of the search stages. `score` is the cosine distance for the vector
+# query (as returned by PGVector) and the ts_rank for the keyword query. The
+# vector query depends on the collection's vector layout, see
+# `vector_search_template`.
+_VECTOR_SEARCH_TEMPLATE = """
+    SELECT e.id AS id,{{columns}}
+           {distance} AS score
+      FROM langchain_pg_embedding e
+      JOIN langchain_pg_collection c ON e.collection_id = c.uuid
+     WHERE c.uuid = $2
+       AND c.cmetadata->>'owner_id' = $3
+       AND c.cmetadata->>'deleted_at' IS NULL
+       AND {where}
+     ORDER BY {distance}
+     LIMIT $4
+"""
+
+# Two-stage vector search: the nearest candidates by a cheaper distance on a
+# smaller index, rescored by the collection's distance.
+_RESCORED_VECTOR_SEARCH_TEMPLATE = """
+    SELECT e.id AS id,{{columns}}
+           {distance} AS score
+      FROM (
+            SELECT e.*
+              FROM langchain_pg_embedding e
+              JOIN langchain_pg_collection c ON e.collection_id = c.uuid
+             WHERE c.uuid = $2
+               AND c.cmetadata->>'owner_id' = $3
+               AND c.cmetadata->>'deleted_at' IS NULL
+             ORDER BY {candidate_distance}
+             LIMIT $4 * {rerank_factor}
+           ) e
+     ORDER BY score
+     LIMIT $4
+"""
+
+# Cosine distance of a chunk to the query ($1) by storage mode.
+_DISTANCES = {
+    "vector": "e.embedding <=> $1::vector",
+    "halfvec": "e.embedding_half <=> $1::vector::halfvec",
+    "binary": "e.embedding_half <=> $1::vector::halfvec",
+}
+# Float embedding of a chunk, read to diversify results.
+EMBEDDING_EXPRESSIONS = {
+    "vector": "e.embedding",
+    "halfvec": "e.embedding_half::vector",
+    "binary": "e.embedding_half::vector",
+}
+
+
+def embedding_expression(
+    layout: quantization.VectorLayout = quantization.DEFAULT_LAYOUT,
+) -> str:
+    """Float embedding of a chunk in a vector layout."""
+    if layout.dimension:
+        return f"e.{quantization.UNSIZED_COLUMN}"
+    return EMBEDDING_EXPRESSIONS[layout.storage]
+
+
+@functools.cache
+def vector_search_template(
+    layout: quantization.VectorLayout = quantization.DEFAULT_LAYOUT,
+    rerank_factor: int = 1,
+) -> str:
+    """Vector search query of a vector layout, with its select list as `{columns}`.
+
+    ``vector`` and ``halfvec`` collections are searched on their own index,
+    with the index predicate so the partial index matches. Collections with a
+    short vector are searched on the short vectors, and ``binary`` ones by
+    Hamming distance; ``rerank_factor`` times more candidates than requested
+    are then rescored. Collections of a model with another dimension than
+    the table are searched on the unsized column, cast to their dimension so
+    the expression index of that dimension matches.
+    """
+    if layout.dimension:
+        dimension = int(layout.dimension)
+        distance = (
+            f"e.{quantization.UNSIZED_COLUMN}::vector({dimension}) "
+            f"<=> $1::vector({dimension})"
+        )
+    else:
+        distance = _DISTANCES[layout.storage]
+    if layout.short_dimension:
+        candidate_distance = (
+            f"e.{quantization.SHORT_COLUMN} <=> "
+            f"subvector($1::vector, 1, {int(layout.short_dimension)})"
+        )
+    elif layout.storage == "binary":
+        candidate_distance = (
+            f"e.{quantization.BIT_COLUMN} <~> binary_quantize($1::vector)"
+        )
+    else:
+        return _VECTOR_SEARCH_TEMPLATE.format(
+            distance=distance, where=layout.index.where
+        )
+    return _RESCORED_VECTOR_SEARCH_TEMPLATE.format(
+        distance=distance,
+        candidate_distance=candidate_distance,
+        rerank_factor=int(rerank_factor),
+    )
+
+
+VECTOR_SEARCH_TEMPLATE = vector_search_template()
+
+KEYWORD_SEARCH_TEMPLATE = """
+    SELECT e.id AS id,{columns}
+           ts_rank(to_tsvector('english', e.document),
+                   plainto_tsquery('english', $1)) AS score
+      FROM langchain_pg_embedding e
+      JOIN langchain_pg_collection c ON e.collection_id = c.uuid
+     WHERE c.uuid = $2
+       AND c.cmetadata->>'owner_id' = $3
+       AND c.cmetadata->>'deleted_at' IS NULL
+       AND to_tsvector('english', e.document) @@ plainto_tsquery('english', $1)
+     ORDER BY score DESC
+     LIMIT $4
+"""
+
+SEARCH_FIELDS = frozenset({"id", "page_content", "metadata", "score", "snippet"})
+LIST_FIELDS = frozenset({"id", "content", "metadata", "collection_id"})
+# Snippet length when `snippet` is requested without `snippet_chars`.
+DEFAULT_SNIPPET_CHARS = 200
+
+
+@dataclass(frozen=True)
+class Projection:
+    """Fields returned by search and list queries.
+
+    Attributes:
+        fields: Fields to return, all the default ones when None.
+        content_chars: Truncate the content to this many characters.
+        snippet_chars: Add a ``snippet`` of about this many characters. For
+            keyword matches it is built by ``ts_headline`` and highlights the
+            matched terms with ``<b>``, otherwise it is the start of the text.
+    """
+
+    fields: frozenset[str] | None = None
+    content_chars: int | None = None
+    snippet_chars: int | None = None
+
+    def wants(self, field: str) -> bool:
+        """Check whether the field is returned."""
+        if field == "snippet":
+            return self.snippet_chars is not None or bool(
+                self.fields and "snippet" in self.fields
+            )
+        return self.fields is None or field in self.fields
+
+    def apply(self, result: dict[str, Any]) -> dict[str, Any]:
+        """Drop the fields that were only fetched to filter or rank results."""
+        if self.fields is None:
+            return result
+        return {key: value for key, value in result.items() if self.wants(key)}
+
+    def search_columns(
+        self,
+        *,
+        keyword: bool,
+        fetch_metadata: bool,
+        fetch_embedding: bool = False,
+        layout: quantization.VectorLayout = quantization.DEFAULT_LAYOUT,
+    ) -> tuple[str, builtins.list[Any]]:
+        """Select list and extra parameters ($5 on) of a search query."""
+        columns, args = [], []
+        if self.wants("page_content"):
+            if self.content_chars is None:
+                columns.append("e.document AS page_content")
+            else:
+                args.append(self.content_chars)
+                columns.append(f"left(e.document, ${4 + len(args)}) AS page_content")
+        if fetch_metadata or self.wants("metadata"):
+            columns.append("e.cmetadata AS metadata")
+        if self.wants("snippet"):
+            chars = self.snippet_chars or DEFAULT_SNIPPET_CHARS
+            if keyword:
+                # ts_headline counts words; assume ~6 characters per word.
+                max_words = max(chars // 6, 4)
+                args.append(
+                    f"MaxWords={max_words}, MinWords={max_words // 2}, MaxFragments=1"
+                )
+                columns.append(
+                    "ts_headline('english', e.document, "
+                    f"plainto_tsquery('english', $1), ${4 + len(args)}) AS snippet"
+                )
+            else:
+                args.append(chars)
+                columns.append(f"left(e.document, ${4 + len(args)}) AS snippet")
+        if fetch_embedding:
+            columns.append(f"{embedding_expression(layout)} AS embedding")
+        select = "".join(f"\n           {column}," for column in columns)
+        return select, args
+
+    def list_columns(self) -> tuple[str, builtins.list[Any]]:
+        """Select list and extra parameters ($5 on) of the list query."""
+        columns, args = [], []
+        if self.wants("content"):
+            if self.content_chars is None:
+                columns.append("lpe.document")
+            else:
+                args.append(self.content_chars)
+                columns.append("left(lpe.document, $5) AS document")
+        if self.wants("metadata"):
+            columns.append("lpe.cmetadata")
+        return "".join(f",\n           {column}" for column in columns), args
+
+
+FULL_PROJECTION = Projection()
+
+DOCUMENTS_LIST_SQL = DOCUMENTS_LIST_TEMPLATE.format(
+    columns=FULL_PROJECTION.list_columns()[0]
+)
+VECTOR_SEARCH_SQL = VECTOR_SEARCH_TEMPLATE.format(
+    columns=FULL_PROJECTION.search_columns(keyword=False, fetch_metadata=True)[0]
+)
+KEYWORD_SEARCH_SQL = KEYWORD_SEARCH_TEMPLATE.format(
+    columns=FULL_PROJECTION.search_columns(keyword=True, fetch_metadata=True)[0]
+)
+
+
+# Rows fetched at a time by the cursor of streamed searches.
+STREAM_PREFETCH = 20
+
+
+def _metadata_matches(metadata: dict[str, Any], filter_dict: dict[str, Any]) -> bool:
+    """Check that the metadata has every key/value pair of the filter."""
+    return all(
+        key in metadata and metadata[key] == value
+        for key, value in filter_dict.items()
+    )
+
+
+def _select(
+    results: list[dict[str, Any]],
+    limit: int,
+    *,
+    search_type: str,
+    diversify: bool,
+    mmr_lambda: float,
+    max_per_file: int | None,
+) -> list[dict[str, Any]]:
+    """Pick the returned results among the ranked candidates.
+
+    Without diversification this is the top ``limit``. Otherwise results are
+    picked with maximal marginal relevance and/or at most ``max_per_file`` per
+    file, see ``langconnect.services.diversity``.
+    """
+    if not (diversify or max_per_file):
+        return results[:limit]
+    from langconnect.services import diversity
+
+    if search_type == "semantic":
+        # Cosine distance to cosine similarity
+        relevance = [1 - result["score"] for result in results]
+    else:
+        # Scale to [0, 1]; reranker scores can be negative
+        scores = [result["score"] for result in results]
+        low, high = min(scores, default=0), max(scores, default=0)
+        relevance = [(score - low) / ((high - low) or 1) for score in scores]
+    picked = diversity.select(
+        relevance,
+        limit,
+        embeddings=[result.pop("embedding") for result in results]
+        if diversify
+        else None,
+        lambda_mult=mmr_lambda,
+        groups=[(result.get("metadata") or {}).get("file_id") for result in results]
+        if max_per_file
+        else None,
+        max_per_group=max_per_file,
+    )
+    return [results[index] for index in picked]
+
+
+async def _iterate(
+    results: list[dict[str, Any]],
+) -> AsyncIterator[dict[str, Any]]:
+    for result in results:
+        yield result
+
 
 class CollectionDetails(TypedDict):
     """TypedDict for collection details."""
@@ -33,6 +611,217 @@ class CollectionDetails(TypedDict):
     table_id: NotRequired[str]
 
 
+@dataclass
+class DedupResult:
+    """Outcome of `Collection.drop_near_duplicates`."""
+
+    documents: list[Document] = field(default_factory=list)
+    duplicates: list[dict[str, Any]] = field(default_factory=list)
+    signatures: dict[str, Any] = field(default_factory=dict)
+
+
+async def purge_collection(collection_id: str, job: jobs.Job) -> None:
+    """Delete the chunks of a deleted collection, then the collection itself.
+
+    Chunks are deleted in batches of `COLLECTION_PURGE_BATCH_SIZE`, each in
+    its own short transaction, with a pause in between, which keeps locks
+    short and lets autovacuum and replicas keep up. Batches skip rows locked
+    by another worker purging the same collection. With partitioning, the
+    collection's partition is dropped instead.
+    """
+    if partitions.enabled():
+        await partitions.drop_partition(collection_id)
+    else:
+        async with get_db_connection() as conn:
+            job.progress["remaining_chunks"] = await conn.fetchval(
+                "SELECT COUNT(*) FROM langchain_pg_embedding WHERE collection_id = $1",
+                collection_id,
+            )
+        batch_size = config.COLLECTION_PURGE_BATCH_SIZE
+        while True:
+            async with get_db_connection() as conn:
+                result = await conn.execute(
+                    PURGE_BATCH_SQL, collection_id, batch_size
+                )
+            deleted = int(result.split()[-1])
+            job.progress["deleted_chunks"] += deleted
+            job.progress["remaining_chunks"] = max(
+                job.progress["remaining_chunks"] - deleted, 0
+            )
+            if deleted < batch_size:
+                break
+            await asyncio.sleep(config.COLLECTION_PURGE_PAUSE)
+    async with get_db_connection() as conn:
+        await conn.execute(
+            """
+            DELETE FROM langchain_pg_collection
+             WHERE uuid = $1
+               AND cmetadata->>'deleted_at' IS NOT NULL
+            """,
+            collection_id,
+        )
+    job.progress["remaining_chunks"] = 0
+    logger.info(f"Purged collection {collection_id}.")
+
+
+async def clone_collection(
+    source_id: str, target_id: str, owner_id: str, job: jobs.Job
+) -> None:
+    """Copy the chunks of a collection into another one of the same layout.
+
+    Chunks are copied server-side, embeddings included, in batches of
+    `COLLECTION_CLONE_BATCH_SIZE` chunks, each by one statement in its own
+    short transaction, followed by the parsed texts of the files. If the copy
+    fails or is cancelled, e.g. by a shutdown, the clone is deleted.
+    """
+    sql = _CLONE_BATCH_TEMPLATE.format(
+        columns=", ".join(quantization.vector_columns())
+    )
+    batch_size = config.COLLECTION_CLONE_BATCH_SIZE
+    try:
+        async with get_db_connection() as conn:
+            job.progress["total_chunks"] = await conn.fetchval(
+                "SELECT COUNT(*) FROM langchain_pg_embedding WHERE collection_id = $1",
+                source_id,
+            )
+        last_id = ""
+        while True:
+            async with get_db_connection() as conn:
+                row = await conn.fetchrow(
+                    sql, source_id, target_id, last_id, batch_size
+                )
+            job.progress["copied_chunks"] += row["copied"]
+            mark_write(owner_id)
+            if row["copied"] < batch_size:
+                break
+            last_id = row["last_id"]
+        async with get_db_connection() as conn:
+            await conn.execute(
+                """
+                INSERT INTO langconnect_file_text
+                       (collection_id, file_id, file_hash, parsed)
+                SELECT $2, file_id, file_hash, parsed
+                  FROM langconnect_file_text
+                 WHERE collection_id = $1
+                """,
+                source_id,
+                target_id,
+            )
+    except BaseException:
+        # A partial clone would look complete. Its purge resumes at startup if
+        # the shutdown cuts it short.
+        await CollectionsManager(owner_id).delete(target_id)
+        raise
+    logger.info(f"Cloned collection {source_id} into {target_id}.")
+
+
+async def rechunk_files(
+    collection: "Collection",
+    file_ids: Optional[list[str]],
+    chunk_size: int,
+    chunk_overlap: int,
+    job: jobs.Job,
+) -> None:
+    """Split the stored parsed text of files again and sync their chunks.
+
+    Each file is split with the new parameters and synced with
+    `Collection.sync_file`, so chunks whose text didn't change keep their
+    embedding and only the others are embedded. Files without stored text,
+    e.g. uploaded before it was stored, are listed in ``missing_files``.
+    """
+    from langconnect.services import decompress_parsed, split_documents
+
+    async with get_db_connection() as conn:
+        stored = {
+            row["file_id"]
+            for row in await conn.fetch(FILE_TEXT_IDS_SQL, collection.collection_id)
+        }
+        if file_ids is None:
+            file_ids = [
+                row["file_id"]
+                for row in await conn.fetch(
+                    """
+                    SELECT DISTINCT cmetadata->>'file_id' AS file_id
+                      FROM langchain_pg_embedding
+                     WHERE collection_id = $1
+                    """,
+                    collection.collection_id,
+                )
+            ]
+    job.progress["missing_files"] = sorted(set(file_ids) - stored)
+    todo = sorted(set(file_ids) & stored)
+    job.progress["total_files"] = len(todo)
+    for file_id in todo:
+        async with get_db_connection() as conn:
+            row = await conn.fetchrow(
+                """
+                SELECT file_hash, parsed
+                  FROM langconnect_file_text
+                 WHERE collection_id = $1
+                   AND file_id = $2
+                """,
+                collection.collection_id,
+                file_id,
+            )
+        if row is None:
+            # Deleted since the job started
+            job.progress["missing_files"].append(file_id)
+            continue
+        parsed = await asyncio.to_thread(decompress_parsed, row["parsed"])
+        chunks = await asyncio.to_thread(
+            functools.partial(
+                split_documents,
+                parsed,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                file_id=file_id,
+                file_hash=row["file_hash"],
+            )
+        )
+        stats = await collection.sync_file(file_id, chunks)
+        job.progress["rechunked_files"] += 1
+        job.progress["embedded_chunks"] += stats["added"]
+        job.progress["reused_chunks"] += stats["updated"] + stats["unchanged"]
+        job.progress["deleted_chunks"] += stats["deleted"]
+    logger.info(
+        f"Rechunked {job.progress['rechunked_files']} files of collection "
+        f"{collection.collection_id}."
+    )
+
+
+async def _build_vector_indexes(job: jobs.Job) -> None:
+    """Build the configured ANN indexes without blocking writes."""
+    await create_vector_index(
+        config.PGVECTOR_INDEX,
+        concurrently=True,
+        progress=job.progress,
+        **config.PGVECTOR_INDEX_PARAMS,
+    )
+
+
+async def _build_dimension_index(dimension: int, job: jobs.Job) -> None:
+    """Build the ANN index of a new embedding dimension without blocking writes."""
+    await create_dimension_index(
+        dimension,
+        config.PGVECTOR_INDEX,
+        concurrently=True,
+        progress=job.progress,
+        **config.PGVECTOR_INDEX_PARAMS,
+    )
+
+
+def start_purge(collection_id: str, owner_id: str) -> jobs.Job:
+    """Purge a deleted collection in a background job."""
+    return jobs.start(
+        "purge_collection",
+        owner_id,
+        functools.partial(purge_collection, collection_id),
+        collection_id=collection_id,
+        deleted_chunks=0,
+        remaining_chunks=None,
+    )
+
+
 class CollectionsManager:
     """Use to create, delete, update, and list document collections."""
 
@@ -48,32 +837,53 @@ class CollectionsManager:
         """
         logger.info("Starting database initialization...")
         get_vectorstore()
+        dimension = config.get_embedding_dimension(config.get_default_embeddings())
+        async with get_db_connection() as conn:
+            await quantization.setup(
+                conn, dimension, config.PGVECTOR_SHORT_DIMENSION
+            )
+            for statement in SIGNATURE_TABLE_DDL + FILE_TEXT_TABLE_DDL:
+                await conn.execute(statement)
+        if config.PGVECTOR_PARTITION_BY_COLLECTION:
+            await partitions.setup()
+        if config.PGVECTOR_INDEX:
+            # Searches scan exactly until the indexes are built; building them
+            # concurrently neither delays startup nor blocks writes.
+            jobs.start("build_vector_index", "", _build_vector_indexes, built_indexes=0)
         logger.info("Database initialization complete.")
 
+    @staticmethod
+    async def warm_up() -> None:
+        """Prepare the hot path statements on every pooled connection.
+
+        The statements run with arguments that match no rows, which fills
+        asyncpg's statement cache so the first requests skip the parse and
+        plan round trip.
+        """
+        nil_uuid = str(uuid.UUID(int=0))
+        dimension = config.get_embedding_dimension(config.get_default_embeddings())
+        statements: list[tuple[str, tuple[Any, ...]]] = [
+            (COLLECTIONS_LIST_SQL, ("",)),
+            (COLLECTION_GET_SQL, (nil_uuid, "")),
+            (DOCUMENTS_LIST_SQL, (nil_uuid, "", 1, 0)),
+            (KEYWORD_SEARCH_SQL, ("", nil_uuid, "", 1)),
+        ]
+        if dimension:
+            statements.append(
+                (VECTOR_SEARCH_SQL, ([1.0] * dimension, nil_uuid, "", 1))
+            )
+        await warm_up_pool(statements)
+
     async def list(
         self,
     ) -> list[CollectionDetails]:
         """List all collections owned by the given user, ordered by logical name."""
-        async with get_db_connection() as conn:
-            records = await conn.fetch(
-                """
-                SELECT 
-                    c.uuid, 
-                    c.cmetadata,
-                    COUNT(DISTINCT e.cmetadata->>'file_id') AS document_count,
-                    COUNT(e.id) AS chunk_count
-                FROM langchain_pg_collection c
-                LEFT JOIN langchain_pg_embedding e ON c.uuid = e.collection_id
-                WHERE c.cmetadata->>'owner_id' = $1
-                GROUP BY c.uuid
-                ORDER BY c.cmetadata->>'name';
-                """,
-                self.user_id,
-            )
+        async with get_db_connection(read_only=True, user_id=self.user_id) as conn:
+            records = await conn.fetch(COLLECTIONS_LIST_SQL, self.user_id)
 
         result: list[CollectionDetails] = []
         for r in records:
-            metadata = json.loads(r["cmetadata"])
+            metadata = r["cmetadata"]
             name = metadata.pop("name", "Unnamed")
             result.append(
                 {
@@ -91,22 +901,13 @@ class CollectionsManager:
         collection_id: str,
     ) -> CollectionDetails | None:
         """Fetch a single collection by UUID, ensuring the user owns it."""
-        async with get_db_connection() as conn:
-            rec = await conn.fetchrow(
-                """
-                SELECT uuid, name, cmetadata
-                  FROM langchain_pg_collection
-                 WHERE uuid = $1
-                   AND cmetadata->>'owner_id' = $2;
-                """,
-                collection_id,
-                self.user_id,
-            )
+        async with get_db_connection(read_only=True, user_id=self.user_id) as conn:
+            rec = await conn.fetchrow(COLLECTION_GET_SQL, collection_id, self.user_id)
 
         if not rec:
             return None
 
-        metadata = json.loads(rec["cmetadata"])
+        metadata = rec["cmetadata"]
         name = metadata.pop("name", "Unnamed")
         return {
             "uuid": str(rec["uuid"]),
@@ -119,20 +920,89 @@ class CollectionsManager:
         self,
         collection_name: str,
         metadata: Optional[dict[str, Any]] = None,
+        *,
+        vector_storage: Optional[str] = None,
+        short_vector: bool = False,
+        embeddings_provider: Optional[str] = None,
+        embeddings_model: Optional[str] = None,
+        embeddings_dimension: Optional[int] = None,
     ) -> CollectionDetails | None:
         """Create a new collection.
 
         Args:
             collection_name: The name of the new collection.
             metadata: Optional metadata for the collection.
+            vector_storage: How the collection's vectors are stored:
+                ``vector``, ``halfvec`` or ``binary`` (see
+                `langconnect.database.quantization`). Defaults to
+                ``PGVECTOR_DEFAULT_STORAGE``. It can't be changed afterwards.
+            short_vector: Also store the first ``PGVECTOR_SHORT_DIMENSION``
+                dimensions of each embedding and search those first, see
+                `langconnect.database.quantization`. Only useful with models
+                trained for shortened embeddings, and not available with
+                ``binary`` storage.
+            embeddings_provider: Embeddings provider of the collection, one
+                of those registered in `langconnect.embeddings`. Defaults to
+                the ``EMBEDDINGS_PROVIDER`` model, shared by all collections.
+            embeddings_model: Model of the provider, its default if empty.
+            embeddings_dimension: Vector size requested from the model, for
+                models that support several. Collections of a model with
+                another dimension than the default one only support
+                ``vector`` storage.
 
         Returns:
             Details of the created collection or None if creation failed.
         """
+        storage = vector_storage or config.PGVECTOR_DEFAULT_STORAGE
+        if storage not in quantization.STORAGE_MODES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid vector storage: {storage}. Must be one of "
+                f"{', '.join(quantization.STORAGE_MODES)}.",
+            )
+        if storage != quantization.DEFAULT_STORAGE and not quantization.available():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"'{storage}' vector storage requires a known embedding "
+                "dimension (EMBEDDINGS_DIMENSION).",
+            )
+        # Loading a local model to check its dimension blocks
+        model_metadata = await asyncio.to_thread(
+            self._embeddings_metadata,
+            embeddings_provider,
+            embeddings_model,
+            embeddings_dimension,
+        )
+        dimension = model_metadata.get(quantization.DIMENSION_METADATA_KEY)
+        if quantization.needs_unsized(dimension):
+            if storage != quantization.DEFAULT_STORAGE:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"'{storage}' vector storage requires a model with "
+                    "the default embedding dimension.",
+                )
+        else:
+            dimension = config.get_embedding_dimension(config.get_default_embeddings())
+        short_dimension = config.PGVECTOR_SHORT_DIMENSION if short_vector else None
+        if short_dimension:
+            if storage == "binary" or (dimension and short_dimension >= dimension):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Short vectors require 'vector' or 'halfvec' storage "
+                    "and a PGVECTOR_SHORT_DIMENSION smaller than the embedding "
+                    "dimension.",
+                )
         # check for existing name
         metadata = metadata.copy() if metadata else {}
         metadata["owner_id"] = self.user_id
         metadata["name"] = collection_name
+        for key in RESERVED_METADATA_KEYS:
+            metadata.pop(key, None)
+        if storage != quantization.DEFAULT_STORAGE:
+            metadata[quantization.METADATA_KEY] = storage
+        if short_dimension:
+            metadata[quantization.SHORT_METADATA_KEY] = short_dimension
+        metadata.update(model_metadata)
 
         # For now assign a table identifier safe for SQL naming
         # Use hex string and prefix to avoid leading digits/hyphens
@@ -140,6 +1010,7 @@ class CollectionsManager:
 
         # triggers PGVector to create both the vectorstore and DB entry
         get_vectorstore(table_id, collection_metadata=metadata)
+        mark_write(self.user_id)
 
         # Fetch the newly created table.
         async with get_db_connection() as conn:
@@ -155,10 +1026,74 @@ class CollectionsManager:
             )
         if not rec:
             return None
-        metadata = json.loads(rec["cmetadata"])
+        if partitions.enabled():
+            async with get_db_connection() as conn:
+                await partitions.create_partition(conn, rec["uuid"])
+        if (
+            config.PGVECTOR_INDEX
+            and quantization.needs_unsized(dimension)
+            and not await index_exists(quantization.unsized_index(dimension).name)
+        ):
+            # The first collection of a dimension is searched exactly until
+            # the index is built in the background.
+            jobs.start(
+                "build_vector_index",
+                self.user_id,
+                functools.partial(_build_dimension_index, dimension),
+                dimension=dimension,
+                built_indexes=0,
+            )
+        metadata = rec["cmetadata"]
         name = metadata.pop("name")
         return {"uuid": str(rec["uuid"]), "name": name, "metadata": metadata}
 
+    @staticmethod
+    def _embeddings_metadata(
+        provider: Optional[str], model: Optional[str], dimension: Optional[int]
+    ) -> dict[str, Any]:
+        """Metadata keys of a collection's own embedding model, if any."""
+        from langconnect import embeddings
+
+        if not provider:
+            if model or dimension:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="An embeddings model or dimension requires an "
+                    "embeddings provider.",
+                )
+            return {}
+        if provider not in embeddings.available_providers():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid embeddings provider: {provider}. Must be one of "
+                f"{', '.join(embeddings.available_providers())}.",
+            )
+        model = model or embeddings.DEFAULT_MODELS.get(provider, "")
+        try:
+            produced = embeddings.get_embedding_dimension(
+                config.get_collection_embeddings(provider, model, dimension)
+            )
+        except (ImportError, ValueError) as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        if dimension and produced and produced != dimension:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"The {provider} model '{model}' produces {produced}-"
+                f"dimensional vectors, not {dimension}.",
+            )
+        dimension = dimension or produced
+        if not dimension:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"The dimension of {provider} model '{model}' is unknown; "
+                "set embeddings_dimension.",
+            )
+        return {
+            quantization.PROVIDER_METADATA_KEY: provider,
+            quantization.MODEL_METADATA_KEY: model,
+            quantization.DIMENSION_METADATA_KEY: int(dimension),
+        }
+
     async def update(
         self,
         collection_id: str,
@@ -187,6 +1122,10 @@ class CollectionsManager:
             # merge in owner_id + optional new name
             merged = metadata.copy()
             merged["owner_id"] = self.user_id
+            # The vector layout is kept from the current metadata, and only
+            # `delete` marks a collection deleted
+            for key in RESERVED_METADATA_KEYS:
+                merged.pop(key, None)
 
             if name is not None:
                 merged["name"] = name
@@ -200,18 +1139,10 @@ class CollectionsManager:
                     )
                 merged["name"] = existing["name"]
 
-            metadata_json = json.dumps(merged)
-
             async with get_db_connection() as conn:
                 rec = await conn.fetchrow(
-                    """
-                    UPDATE langchain_pg_collection
-                       SET cmetadata = $1::jsonb
-                     WHERE uuid = $2
-                       AND cmetadata->>'owner_id' = $3
-                    RETURNING uuid, cmetadata;
-                    """,
-                    metadata_json,
+                    COLLECTION_METADATA_UPDATE_SQL,
+                    merged,
                     collection_id,
                     self.user_id,
                 )
@@ -230,6 +1161,7 @@ class CollectionsManager:
                            )
                      WHERE uuid = $2
                        AND cmetadata->>'owner_id' = $3
+                       AND cmetadata->>'deleted_at' IS NULL
                     RETURNING uuid, cmetadata;
                     """,
                     name,
@@ -242,8 +1174,9 @@ class CollectionsManager:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Collection '{collection_id}' not found or not owned by you.",
             )
+        mark_write(self.user_id)
 
-        full_meta = json.loads(rec["cmetadata"])
+        full_meta = rec["cmetadata"]
         friendly_name = full_meta.pop("name", "Unnamed")
 
         return {
@@ -255,22 +1188,102 @@ class CollectionsManager:
     async def delete(
         self,
         collection_id: str,
-    ) -> int:
+    ) -> Optional[jobs.Job]:
         """Delete a collection by UUID.
-        Returns number of rows deleted (1).
-        Raises 404 if no such collection.
+
+        The collection is marked deleted, which hides it from every query right
+        away, and its chunks are purged by a background job (see
+        `purge_collection`), so the request doesn't wait on, or hold locks for,
+        the deletion of a large collection's chunks.
+
+        Returns:
+            The purge job, or None if the user owns no such collection.
         """
         async with get_db_connection() as conn:
-            result = await conn.execute(
+            deleted = await conn.fetchval(
                 """
-                DELETE FROM langchain_pg_collection
+                UPDATE langchain_pg_collection
+                   SET cmetadata = jsonb_set(
+                         cmetadata::jsonb, '{deleted_at}', to_jsonb(now())
+                       )
                  WHERE uuid = $1
-                   AND cmetadata->>'owner_id' = $2;
+                   AND cmetadata->>'owner_id' = $2
+                   AND cmetadata->>'deleted_at' IS NULL
+                RETURNING uuid;
                 """,
                 collection_id,
                 self.user_id,
             )
-        return int(result.split()[-1])
+        if deleted is None:
+            return None
+        mark_write(self.user_id)
+        return start_purge(collection_id, self.user_id)
+
+    async def clone(
+        self,
+        collection_id: str,
+        *,
+        name: Optional[str] = None,
+        metadata: Optional[dict[str, Any]] = None,
+    ) -> tuple[CollectionDetails, jobs.Job] | None:
+        """Create a copy of a collection, chunks and embeddings included.
+
+        The clone is created at once with the source's metadata, vector
+        layout and embedding model; its chunks are copied by a background job
+        (see `clone_collection`) without passing through this process or the
+        embeddings API.
+
+        Args:
+            collection_id: The collection to copy.
+            name: Name of the clone. Defaults to the source's name.
+            metadata: Metadata merged over the source's.
+
+        Returns:
+            The clone and the copy job, or None if the user owns no such
+            collection.
+        """
+        source = await self.get(collection_id)
+        if not source:
+            return None
+        layout = source["metadata"]
+        clone = await self.create(
+            name or source["name"],
+            {**source["metadata"], **(metadata or {})},
+            vector_storage=quantization.storage_of(layout),
+            short_vector=bool(layout.get(quantization.SHORT_METADATA_KEY)),
+            embeddings_provider=layout.get(quantization.PROVIDER_METADATA_KEY),
+            embeddings_model=layout.get(quantization.MODEL_METADATA_KEY),
+            embeddings_dimension=layout.get(quantization.DIMENSION_METADATA_KEY),
+        )
+        if not clone:
+            return None
+        job = jobs.start(
+            "clone_collection",
+            self.user_id,
+            functools.partial(
+                clone_collection, collection_id, clone["uuid"], self.user_id
+            ),
+            collection_id=clone["uuid"],
+            source_collection_id=collection_id,
+            copied_chunks=0,
+            total_chunks=None,
+        )
+        return clone, job
+
+    @staticmethod
+    async def resume_purges() -> None:
+        """Restart the purge of collections deleted before the last shutdown."""
+        async with get_db_connection() as conn:
+            records = await conn.fetch(
+                """
+                SELECT uuid, cmetadata->>'owner_id' AS owner_id
+                  FROM langchain_pg_collection
+                 WHERE cmetadata->>'deleted_at' IS NOT NULL
+                """
+            )
+        for r in records:
+            logger.info(f"Resuming the purge of collection {r['uuid']}.")
+            start_purge(str(r["uuid"]), r["owner_id"])
 
 
 class Collection:
@@ -291,13 +1304,365 @@ class Collection:
             raise HTTPException(status_code=404, detail="Collection not found")
         return details
 
-    async def upsert(self, documents: list[Document]) -> list[str]:
-        """Add one or more documents to the collection."""
-        details = await self._get_details_or_raise()
-        store = get_vectorstore(collection_name=details["table_id"])
-        added_ids = store.add_documents(documents)
+    @staticmethod
+    def _embeddings_of(metadata: dict[str, Any]) -> Embeddings:
+        """Embeddings of the collection's model, see `CollectionsManager.create`."""
+        return config.get_collection_embeddings(
+            metadata.get(quantization.PROVIDER_METADATA_KEY),
+            metadata.get(quantization.MODEL_METADATA_KEY),
+            metadata.get(quantization.DIMENSION_METADATA_KEY),
+        )
+
+    async def upsert(
+        self,
+        documents: list[Document],
+        *,
+        signatures: Optional[dict[str, Any]] = None,
+        parsed: Optional[dict[str, builtins.list[Document]]] = None,
+    ) -> list[str]:
+        """Add one or more documents to the collection.
+
+        Documents with an id replace the chunk with that id, the others get a
+        new id.
+
+        Args:
+            documents: The chunks to add.
+            signatures: MinHash signatures by chunk id, from
+                `drop_near_duplicates`, stored for the detection of
+                near-duplicates in later uploads.
+            parsed: Parsed documents by file id, from `process_document`,
+                stored to split the files again later (see `rechunk`).
+        """
+        with metrics.UPSERT_LATENCY.time():
+            details = await self._get_details_or_raise()
+            added_ids = [doc.id or str(uuid.uuid4()) for doc in documents]
+            embeddings = await self._embeddings_of(
+                details["metadata"]
+            ).aembed_documents([doc.page_content for doc in documents])
+            async with get_db_connection() as conn, conn.transaction():
+                await self._write_chunks(
+                    conn,
+                    added_ids,
+                    embeddings,
+                    documents,
+                    quantization.layout_of(details["metadata"]),
+                )
+                if signatures:
+                    await self._write_signatures(conn, signatures)
+                if parsed:
+                    await self._write_parsed(conn, parsed, documents)
+        mark_write(self.user_id)
+        metrics.UPSERT_CHUNKS.inc(len(added_ids))
         return added_ids
 
+    async def _write_chunks(
+        self,
+        conn: asyncpg.Connection,
+        ids: builtins.list[str],
+        embeddings: builtins.list[builtins.list[float]],
+        documents: builtins.list[Document],
+        layout: quantization.VectorLayout = quantization.DEFAULT_LAYOUT,
+    ) -> None:
+        """Insert or replace chunks with their embeddings."""
+        await conn.executemany(
+            embedding_upsert_sql(layout, partitions.enabled()),
+            [
+                (doc_id, self.collection_id, embedding, doc.page_content, doc.metadata)
+                for doc_id, embedding, doc in zip(
+                    ids, embeddings, documents, strict=True
+                )
+            ],
+        )
+
+    async def _write_signatures(
+        self, conn: asyncpg.Connection, signatures: dict[str, Any]
+    ) -> None:
+        from langconnect.services import dedup
+
+        await conn.executemany(
+            SIGNATURE_UPSERT_SQL,
+            [
+                (
+                    self.collection_id,
+                    chunk_id,
+                    signature.tobytes(),
+                    dedup.band_keys(signature),
+                )
+                for chunk_id, signature in signatures.items()
+            ],
+        )
+
+    async def _write_parsed(
+        self,
+        conn: asyncpg.Connection,
+        parsed: dict[str, builtins.list[Document]],
+        documents: builtins.list[Document],
+    ) -> None:
+        from langconnect.services import compress_parsed
+
+        file_hashes = {
+            doc.metadata.get("file_id"): doc.metadata.get("file_hash")
+            for doc in documents
+        }
+        await conn.executemany(
+            FILE_TEXT_UPSERT_SQL,
+            [
+                (
+                    self.collection_id,
+                    file_id,
+                    file_hashes[file_id],
+                    compress_parsed(docs),
+                )
+                for file_id, docs in parsed.items()
+                if file_hashes.get(file_id)
+            ],
+        )
+
+    async def drop_near_duplicates(
+        self, documents: builtins.list[Document], threshold: float
+    ) -> "DedupResult":
+        """Drop chunks that are near-duplicates of other chunks.
+
+        Chunks are compared with each other and with the chunks already in the
+        collection that have a stored signature. The first of a group of
+        near-duplicates is kept.
+
+        Args:
+            documents: The chunks about to be added. Kept chunks without an id
+                are given one, under which their signature is returned.
+            threshold: Estimated Jaccard similarity of word shingles from which
+                chunks are near-duplicates.
+
+        Returns:
+            The kept chunks, the dropped ones and the signatures to pass to
+            `upsert`.
+        """
+        import numpy as np
+
+        from langconnect.services import dedup
+
+        signatures = [dedup.minhash(doc.page_content) for doc in documents]
+        keys = sorted(
+            {
+                key
+                for signature in signatures
+                if signature is not None
+                for key in dedup.band_keys(signature)
+            }
+        )
+        index = dedup.NearDuplicateIndex(threshold)
+        if keys:
+            async with get_db_connection(
+                read_only=True, user_id=self.user_id
+            ) as conn:
+                rows = await conn.fetch(
+                    SIGNATURE_CANDIDATES_SQL, self.collection_id, keys
+                )
+            for row in rows:
+                index.add(row["chunk_id"], np.frombuffer(row["signature"], np.uint32))
+
+        result = DedupResult()
+        for doc, signature in zip(documents, signatures, strict=True):
+            if signature is None:
+                result.documents.append(doc)
+                continue
+            duplicate_of = index.find(signature)
+            if duplicate_of is not None:
+                result.duplicates.append(
+                    {
+                        "file_id": doc.metadata.get("file_id"),
+                        "duplicate_of": duplicate_of,
+                    }
+                )
+                continue
+            doc.id = doc.id or str(uuid.uuid4())
+            index.add(doc.id, signature)
+            result.documents.append(doc)
+            result.signatures[doc.id] = signature
+        metrics.DEDUP_DROPPED_CHUNKS.inc(len(result.duplicates))
+        return result
+
+    async def file_metadata(self, file_id: str) -> dict[str, Any] | None:
+        """Metadata of one chunk of a file, or None if the file has no chunks.
+
+        Chunks of a file share the file level metadata (``file_hash``, the
+        splitter parameters and the metadata given at upload).
+        """
+        async with get_db_connection(read_only=True, user_id=self.user_id) as conn:
+            return await conn.fetchval(
+                FILE_METADATA_SQL, self.collection_id, self.user_id, file_id
+            )
+
+    async def sync_file(
+        self,
+        file_id: str,
+        documents: builtins.list[Document],
+        *,
+        parsed: Optional[builtins.list[Document]] = None,
+    ) -> dict[str, Any]:
+        """Replace the chunks of a file, only embedding the chunks that changed.
+
+        The new chunks are matched to the stored ones by ``chunk_hash``.
+        Matching chunks are kept (with their metadata updated if it changed),
+        new ones are embedded and inserted, and the stored chunks left over
+        are deleted, all in one transaction.
+
+        Args:
+            file_id: The file's id, shared by all its chunks.
+            documents: The new chunks, from `process_document`.
+            parsed: The parsed documents of the file, stored to split it
+                again later (see `rechunk`).
+
+        Returns:
+            The ids of the inserted chunks and the number of inserted,
+            updated, deleted and unchanged chunks.
+        """
+        with metrics.UPSERT_LATENCY.time():
+            details = await self._get_details_or_raise()
+            embeddings = self._embeddings_of(details["metadata"])
+            embedded: dict[str, builtins.list[float]] = {}
+
+            async def embed(docs: builtins.list[Document]) -> None:
+                texts = list({doc.page_content for doc in docs} - embedded.keys())
+                if texts:
+                    vectors = await embeddings.aembed_documents(texts)
+                    embedded.update(zip(texts, vectors, strict=True))
+
+            # Embed the new chunks before taking the lock, so concurrent syncs
+            # don't wait for the embedding calls of each other.
+            async with get_db_connection() as conn:
+                rows = await conn.fetch(FILE_CHUNKS_SQL, self.collection_id, file_id)
+            await embed(self._diff_file_chunks(rows, documents)[0])
+            async with get_db_connection() as conn, conn.transaction():
+                # Serializes concurrent syncs of the same file, which then
+                # diff against the chunks left by the previous one.
+                await conn.execute(
+                    "SELECT pg_advisory_xact_lock(hashtext($1))",
+                    f"{self.collection_id}:{file_id}",
+                )
+                rows = await conn.fetch(FILE_CHUNKS_SQL, self.collection_id, file_id)
+                new_docs, updates, unchanged, removed = self._diff_file_chunks(
+                    rows, documents
+                )
+                # Chunks removed by a concurrent sync since the first diff
+                await embed(new_docs)
+                new_ids = [str(uuid.uuid4()) for _ in new_docs]
+                if removed:
+                    await conn.execute(
+                        """
+                        DELETE FROM langchain_pg_embedding
+                         WHERE collection_id = $1
+                           AND id = ANY($2::varchar[])
+                        """,
+                        self.collection_id,
+                        removed,
+                    )
+                    await conn.execute(
+                        SIGNATURE_DELETE_SQL, self.collection_id, removed
+                    )
+                if updates:
+                    await conn.executemany(
+                        """
+                        UPDATE langchain_pg_embedding
+                           SET cmetadata = $3
+                         WHERE collection_id = $1
+                           AND id = $2
+                        """,
+                        updates,
+                    )
+                if new_docs:
+                    await self._write_chunks(
+                        conn,
+                        new_ids,
+                        [embedded[doc.page_content] for doc in new_docs],
+                        new_docs,
+                        quantization.layout_of(details["metadata"]),
+                    )
+                if parsed and documents:
+                    await self._write_parsed(conn, {file_id: parsed}, documents)
+        mark_write(self.user_id)
+        metrics.UPSERT_CHUNKS.inc(len(new_ids))
+        return {
+            "added_chunk_ids": new_ids,
+            "added": len(new_ids),
+            "updated": len(updates),
+            "deleted": len(removed),
+            "unchanged": unchanged,
+        }
+
+    def _diff_file_chunks(
+        self,
+        rows: builtins.list[asyncpg.Record],
+        documents: builtins.list[Document],
+    ) -> tuple[builtins.list[Document], builtins.list[tuple], int, builtins.list[str]]:
+        """Match the new chunks of a file to its stored ones by ``chunk_hash``.
+
+        Returns:
+            The chunks to insert, the metadata updates of the kept chunks, the
+            number of unchanged chunks and the ids of the chunks to delete.
+        """
+        stored: dict[str, builtins.list[asyncpg.Record]] = {}
+        for row in rows:
+            chunk_hash = (row["cmetadata"] or {}).get("chunk_hash")
+            stored.setdefault(chunk_hash, []).append(row)
+
+        new_docs, updates, unchanged = [], [], 0
+        for doc in documents:
+            matches = stored.get(doc.metadata["chunk_hash"])
+            if not matches:
+                new_docs.append(doc)
+                continue
+            row = matches.pop()
+            if row["cmetadata"] == doc.metadata:
+                unchanged += 1
+            else:
+                updates.append((self.collection_id, row["id"], doc.metadata))
+        removed = [row["id"] for rows in stored.values() for row in rows]
+        return new_docs, updates, unchanged, removed
+
+    async def rechunk(
+        self,
+        chunk_size: int,
+        chunk_overlap: int,
+        file_ids: Optional[builtins.list[str]] = None,
+    ) -> jobs.Job:
+        """Split files again with other parameters, in a background job.
+
+        The files are split from their parsed text stored at upload, so the
+        originals aren't needed, and only the chunks whose text changed are
+        embedded (see `rechunk_files`).
+
+        Args:
+            chunk_size: Maximum number of characters in each chunk.
+            chunk_overlap: Number of overlapping characters between chunks.
+            file_ids: The files to split again, all files by default.
+
+        Returns:
+            The job splitting the files.
+        """
+        await self._get_details_or_raise()
+        if chunk_overlap >= chunk_size:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="chunk_overlap must be smaller than chunk_size.",
+            )
+        return jobs.start(
+            "rechunk_collection",
+            self.user_id,
+            functools.partial(
+                rechunk_files, self, file_ids, chunk_size, chunk_overlap
+            ),
+            collection_id=self.collection_id,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            total_files=None,
+            rechunked_files=0,
+            embedded_chunks=0,
+            reused_chunks=0,
+            deleted_chunks=0,
+            missing_files=[],
+        )
+
     async def delete(
         self,
         *,
@@ -319,15 +1684,16 @@ class Collection:
                     WHERE lpe.collection_id = lpc.uuid
                       AND lpc.uuid = $1
                       AND lpc.cmetadata->>'owner_id' = $2
+                      AND lpc.cmetadata->>'deleted_at' IS NULL
                       AND lpe.id = $3
+                    RETURNING lpe.id
                 """
-                result = await conn.execute(
-                    delete_sql,
+                deleted_count = await conn.fetchval(
+                    CHUNK_DELETE_TEMPLATE.format(delete=delete_sql),
                     self.collection_id,
                     self.user_id,
                     document_id,
                 )
-                deleted_count = int(result.split()[-1])
                 logger.info(
                     f"Deleted {deleted_count} document with id {document_id!r}."
                 )
@@ -339,18 +1705,23 @@ class Collection:
                     WHERE lpe.collection_id   = lpc.uuid
                       AND lpc.uuid             = $1
                       AND lpc.cmetadata->>'owner_id' = $2
+                      AND lpc.cmetadata->>'deleted_at' IS NULL
                       AND lpe.cmetadata->>'file_id'   = $3
+                    RETURNING lpe.id
                 """
-                result = await conn.execute(
-                    delete_sql,
+                deleted_count = await conn.fetchval(
+                    CHUNK_DELETE_TEMPLATE.format(delete=delete_sql),
                     self.collection_id,
                     self.user_id,
                     file_id,
                 )
-                deleted_count = int(result.split()[-1])
+                await conn.execute(
+                    FILE_TEXT_DELETE_SQL, self.collection_id, self.user_id, [file_id]
+                )
                 logger.info(f"Deleted {deleted_count} embeddings for file {file_id!r}.")
             else:
                 raise ValueError("Either file_id or document_id must be provided")
+            mark_write(self.user_id)
 
             # For now if deleted count is 0, let's verify that the collection exists.
             if deleted_count == 0:
@@ -370,75 +1741,89 @@ class Collection:
         deleted_count = 0
         async with get_db_connection() as conn:
             if document_ids:
-                result = await conn.execute(
-                    """
+                delete_sql = """
                     DELETE FROM langchain_pg_embedding AS lpe
                     USING langchain_pg_collection AS lpc
                     WHERE lpe.collection_id = lpc.uuid
                       AND lpc.uuid = $1
                       AND lpc.cmetadata->>'owner_id' = $2
+                      AND lpc.cmetadata->>'deleted_at' IS NULL
                       AND lpe.id = ANY($3::text[])
-                    """,
+                    RETURNING lpe.id
+                """
+                deleted_count += await conn.fetchval(
+                    CHUNK_DELETE_TEMPLATE.format(delete=delete_sql),
                     self.collection_id,
                     self.user_id,
                     document_ids,
                 )
-                deleted_count += int(result.split()[-1])
 
             if file_ids:
-                result = await conn.execute(
-                    """
+                delete_sql = """
                     DELETE FROM langchain_pg_embedding AS lpe
                     USING langchain_pg_collection AS lpc
                     WHERE lpe.collection_id = lpc.uuid
                       AND lpc.uuid = $1
                       AND lpc.cmetadata->>'owner_id' = $2
+                      AND lpc.cmetadata->>'deleted_at' IS NULL
                       AND lpe.cmetadata->>'file_id' = ANY($3::text[])
-                    """,
+                    RETURNING lpe.id
+                """
+                deleted_count += await conn.fetchval(
+                    CHUNK_DELETE_TEMPLATE.format(delete=delete_sql),
                     self.collection_id,
                     self.user_id,
                     file_ids,
                 )
-                deleted_count += int(result.split()[-1])
-        
+                await conn.execute(
+                    FILE_TEXT_DELETE_SQL, self.collection_id, self.user_id, file_ids
+                )
+        mark_write(self.user_id)
+
         return deleted_count
 
-    async def list(self, *, limit: int = 10, offset: int = 0) -> list[dict[str, Any]]:
-        """List all document chunks in this collection."""
-        async with get_db_connection() as conn:
+    async def list(
+        self,
+        *,
+        limit: int = 10,
+        offset: int = 0,
+        projection: Projection = FULL_PROJECTION,
+    ) -> list[dict[str, Any]]:
+        """List all document chunks in this collection.
+
+        Args:
+            limit: Maximum number of chunks to return
+            offset: Number of chunks to skip
+            projection: Fields to return (``LIST_FIELDS``); unrequested
+                columns are not read from the database
+        """
+        if projection is FULL_PROJECTION:
+            sql, extra_args = DOCUMENTS_LIST_SQL, []
+        else:
+            columns, extra_args = projection.list_columns()
+            sql = DOCUMENTS_LIST_TEMPLATE.format(columns=columns)
+        async with get_db_connection(read_only=True, user_id=self.user_id) as conn:
             rows = await conn.fetch(
-                """
-                SELECT lpe.id,
-                       lpe.document,
-                       lpe.cmetadata
-                  FROM langchain_pg_embedding lpe
-                  JOIN langchain_pg_collection lpc
-                    ON lpe.collection_id = lpc.uuid
-                 WHERE lpc.uuid = $1
-                   AND lpc.cmetadata->>'owner_id' = $2
-                 ORDER BY lpe.cmetadata->>'file_id', lpe.id
-                 LIMIT  $3
-                OFFSET $4
-                """,
+                sql,
                 self.collection_id,
                 self.user_id,
                 limit,
                 offset,
+                *extra_args,
             )
 
         docs: list[dict[str, Any]] = []
         for r in rows:
-            metadata = json.loads(r["cmetadata"]) if r["cmetadata"] else {}
-            docs.append(
-                {
-                    "id": str(r["id"]),
-                    "content": r["document"],
-                    "metadata": metadata,
-                    "collection_id": str(self.collection_id),
-                    # For compatibility with UI expecting 'page_content'
-                    "page_content": r["document"],
-                }
-            )
+            doc: dict[str, Any] = {"id": str(r["id"])}
+            if projection.wants("content"):
+                doc["content"] = r["document"]
+                # For compatibility with UI expecting 'page_content'
+                doc["page_content"] = r["document"]
+            if projection.wants("metadata"):
+                doc["metadata"] = r["cmetadata"] or {}
+            if projection.wants("collection_id"):
+                doc["collection_id"] = str(self.collection_id)
+            docs.append(doc)
 
         if not docs:
             # For now, if no documents, let's check that the collection exists.
@@ -450,7 +1835,7 @@ class Collection:
 
     async def get(self, document_id: str) -> dict[str, Any]:
         """Fetch a single chunk by its UUID, verifying collection ownership."""
-        async with get_db_connection() as conn:
+        async with get_db_connection(read_only=True, user_id=self.user_id) as conn:
             row = await conn.fetchrow(
                 """
                 SELECT e.uuid, e.document, e.cmetadata
@@ -459,6 +1844,7 @@ class Collection:
                     ON e.collection_id = c.uuid
                  WHERE e.uuid = $1
                    AND c.cmetadata->>'owner_id' = $2
+                   AND c.cmetadata->>'deleted_at' IS NULL
                    AND c.uuid = $3
                 """,
                 document_id,
@@ -468,13 +1854,154 @@ class Collection:
         if not row:
             raise HTTPException(status_code=404, detail="Document not found")
 
-        metadata = json.loads(row["cmetadata"]) if row["cmetadata"] else {}
+        metadata = row["cmetadata"] or {}
         return {
             "id": str(row["uuid"]),
             "content": row["document"],
             "metadata": metadata,
         }
 
+    async def _embed_query(
+        self, query: str, embeddings: Optional[Embeddings] = None
+    ) -> builtins.list[float]:
+        """Embed the search query, with the default model unless given."""
+        with timing.stage("embed"):
+            embeddings = embeddings or config.get_default_embeddings()
+            return await embeddings.aembed_query(query)
+
+    async def _fetch_stage(
+        self,
+        stage: str,
+        histogram: metrics.Histogram,
+        sql: str,
+        *args: Any,
+        explain: bool = False,
+        settings: builtins.list[str] | None = None,
+    ) -> builtins.list[asyncpg.Record]:
+        """Run the query of a search stage, optionally capturing its plan.
+
+        The plan is obtained with ``EXPLAIN (ANALYZE, BUFFERS)``, which executes
+        the query a second time, so it is only collected on request.
+
+        ``settings`` are ``SET LOCAL`` statements applied in a transaction
+        around the query.
+        """
+        async with get_db_connection(read_only=True, user_id=self.user_id) as conn:
+            if settings:
+                transaction = conn.transaction()
+                await transaction.start()
+                for setting in settings:
+                    await conn.execute(setting)
+            try:
+                with timing.stage(stage, histogram):
+                    rows = await conn.fetch(sql, *args)
+                if explain:
+                    plan = await conn.fetchval(
+                        f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", *args
+                    )
+                    timing.add_plan(stage, plan)
+            finally:
+                if settings:
+                    await transaction.rollback()
+        return rows
+
+    @staticmethod
+    def _format_row(row: asyncpg.Record) -> dict[str, Any]:
+        result = dict(row.items())
+        result["id"] = str(result["id"])
+        if "metadata" in result:
+            result["metadata"] = result["metadata"] or {}
+        result["score"] = float(result["score"])
+        return result
+
+    def _search_query(
+        self,
+        keyword: bool,
+        first_arg: Any,
+        k: int,
+        projection: Projection,
+        fetch_metadata: bool,
+        fetch_embedding: bool = False,
+        layout: quantization.VectorLayout = quantization.DEFAULT_LAYOUT,
+    ) -> tuple[str, builtins.list[Any]]:
+        """SQL and arguments of the vector or keyword search query."""
+        if (
+            projection is FULL_PROJECTION
+            and not fetch_embedding
+            and (keyword or layout == quantization.DEFAULT_LAYOUT)
+        ):
+            sql = KEYWORD_SEARCH_SQL if keyword else VECTOR_SEARCH_SQL
+            extra_args: builtins.list[Any] = []
+        else:
+            columns, extra_args = projection.search_columns(
+                keyword=keyword,
+                fetch_metadata=fetch_metadata,
+                fetch_embedding=fetch_embedding,
+                layout=layout,
+            )
+            if keyword:
+                template = KEYWORD_SEARCH_TEMPLATE
+            else:
+                template = vector_search_template(
+                    layout,
+                    config.PGVECTOR_SHORT_RERANK_FACTOR
+                    if layout.short_dimension
+                    else config.PGVECTOR_BINARY_RERANK_FACTOR,
+                )
+            sql = template.format(columns=columns)
+        return sql, [first_arg, self.collection_id, self.user_id, k, *extra_args]
+
+    async def _vector_search(
+        self,
+        query: str,
+        k: int,
+        *,
+        explain: bool = False,
+        projection: Projection = FULL_PROJECTION,
+        fetch_metadata: bool = True,
+        fetch_embedding: bool = False,
+        layout: quantization.VectorLayout = quantization.DEFAULT_LAYOUT,
+        embeddings: Optional[Embeddings] = None,
+    ) -> builtins.list[dict[str, Any]]:
+        """Return the k nearest chunks by cosine distance to the query."""
+        embedding = await self._embed_query(query, embeddings)
+        sql, args = self._search_query(
+            False, embedding, k, projection, fetch_metadata, fetch_embedding, layout
+        )
+        rows = await self._fetch_stage(
+            "vector",
+            metrics.VECTOR_QUERY_LATENCY,
+            sql,
+            *args,
+            explain=explain,
+            settings=vector_search_settings(),
+        )
+        return [self._format_row(row) for row in rows]
+
+    async def _keyword_search(
+        self,
+        query: str,
+        k: int,
+        *,
+        explain: bool = False,
+        projection: Projection = FULL_PROJECTION,
+        fetch_metadata: bool = True,
+        fetch_embedding: bool = False,
+        layout: quantization.VectorLayout = quantization.DEFAULT_LAYOUT,
+    ) -> builtins.list[dict[str, Any]]:
+        """Return the k best full-text matches for the query."""
+        sql, args = self._search_query(
+            True, query, k, projection, fetch_metadata, fetch_embedding, layout
+        )
+        rows = await self._fetch_stage(
+            "keyword",
+            metrics.KEYWORD_QUERY_LATENCY,
+            sql,
+            *args,
+            explain=explain,
+        )
+        return [self._format_row(row) for row in rows]
+
     async def search(
         self,
         query: str,
@@ -482,14 +2009,39 @@ class Collection:
         limit: int = 4,
         search_type: Literal["semantic", "keyword", "hybrid"] = "semantic",
         filter: Optional[dict[str, Any]] = None,
+        explain: bool = False,
+        projection: Projection = FULL_PROJECTION,
+        diversify: bool = False,
+        mmr_lambda: float = 0.5,
+        max_per_file: Optional[int] = None,
+        rerank: bool = False,
+        rerank_budget_ms: Optional[float] = None,
     ) -> builtins.list[dict[str, Any]]:
         """Run a search in the collection.
 
+        The duration of each stage (embed, vector, keyword, merge) is recorded
+        in the current request timing, see ``langconnect.timing``.
+
         Args:
             query: The search query string
             limit: Maximum number of results to return
             search_type: Type of search - "semantic", "keyword", or "hybrid"
             filter: Optional metadata filter to apply to results
+            explain: Capture the Postgres plan of each query stage in the
+                current request timing
+            projection: Fields to return (``SEARCH_FIELDS``); unrequested
+                columns are not read from the database
+            diversify: Pick the results among ``SEARCH_MMR_FETCH_FACTOR``
+                times more candidates with maximal marginal relevance, using
+                the candidates' embeddings read by the same query
+            mmr_lambda: Weight of relevance vs. diversity when diversifying,
+                1 is relevance only
+            max_per_file: Return at most this many chunks of the same file
+            rerank: Reorder ``RERANKER_FETCH_FACTOR`` times more candidates
+                with the configured reranker, whose score becomes the result
+                score. Skipped when it would not finish within the budget
+            rerank_budget_ms: Time since the start of the request by which
+                reranking must be done (default: ``RERANKER_BUDGET_MS``)
 
         Returns:
             List of search results with id, page_content, metadata, and score
@@ -499,8 +2051,283 @@ class Collection:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Invalid search type: {search_type}. Must be 'semantic', 'keyword', or 'hybrid'.",
             )
+        if rerank and config.get_default_reranker() is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Reranking is not configured (RERANKER_PROVIDER).",
+            )
+
+        with metrics.SEARCH_LATENCY.labels(search_type=search_type).time():
+            results = await self._search(
+                query,
+                limit=limit,
+                search_type=search_type,
+                filter=filter,
+                explain=explain,
+                projection=projection,
+                diversify=diversify,
+                mmr_lambda=mmr_lambda,
+                max_per_file=max_per_file,
+                rerank=rerank,
+                rerank_budget_ms=rerank_budget_ms,
+            )
+        return [projection.apply(result) for result in results]
+
+    async def search_stream(
+        self,
+        query: str,
+        *,
+        limit: int = 4,
+        search_type: Literal["semantic", "keyword", "hybrid"] = "semantic",
+        filter: Optional[dict[str, Any]] = None,
+        projection: Projection = FULL_PROJECTION,
+        diversify: bool = False,
+        mmr_lambda: float = 0.5,
+        max_per_file: Optional[int] = None,
+        rerank: bool = False,
+        rerank_budget_ms: Optional[float] = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Run a search, yielding results as they are read from the database.
+
+        Semantic and keyword results are read through a cursor, so the first
+        result is available as soon as Postgres produces it, without holding
+        the database connection while the client reads. Hybrid, diversified and
+        reranked results have to be ranked together, so they are yielded once
+        ranked.
+
+        The collection is checked and the query embedded before this returns,
+        so those errors are raised here rather than while iterating.
+
+        Args:
+            query: The search query string
+            limit: Maximum number of results to return
+            search_type: Type of search - "semantic", "keyword", or "hybrid"
+            filter: Optional metadata filter to apply to results
+            projection: Fields to return, see ``search``
+            diversify: See ``search``
+            mmr_lambda: See ``search``
+            max_per_file: See ``search``
+            rerank: See ``search``
+            rerank_budget_ms: See ``search``
+
+        Returns:
+            An async iterator over the results, in rank order.
+        """
+        if search_type == "hybrid" or diversify or max_per_file or rerank:
+            return _iterate(
+                await self.search(
+                    query,
+                    limit=limit,
+                    search_type=search_type,
+                    filter=filter,
+                    projection=projection,
+                    diversify=diversify,
+                    mmr_lambda=mmr_lambda,
+                    max_per_file=max_per_file,
+                    rerank=rerank,
+                    rerank_budget_ms=rerank_budget_ms,
+                )
+            )
+        if search_type not in ["semantic", "keyword"]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid search type: {search_type}. Must be 'semantic', 'keyword', or 'hybrid'.",
+            )
 
+        started = time.perf_counter()
         details = await self._get_details_or_raise()
+        search_limit = limit * 3 if filter else limit
+        keyword = search_type == "keyword"
+        if keyword:
+            first_arg: Any = query
+            settings = []
+        else:
+            first_arg = await self._embed_query(
+                query, self._embeddings_of(details["metadata"])
+            )
+            settings = vector_search_settings()
+        sql, args = self._search_query(
+            keyword,
+            first_arg,
+            search_limit,
+            projection,
+            bool(filter),
+            layout=quantization.layout_of(details["metadata"]),
+        )
+        return self._stream_rows(
+            sql,
+            args,
+            settings=settings,
+            limit=limit,
+            filter=filter,
+            projection=projection,
+            search_type=search_type,
+            started=started,
+        )
+
+    async def _rerank(
+        self,
+        query: str,
+        results: builtins.list[dict[str, Any]],
+        budget_ms: Optional[float],
+    ) -> tuple[builtins.list[dict[str, Any]], bool]:
+        """Reorder the candidates by reranker score, within the latency budget.
+
+        Reranking is skipped when the time left until the budget is spent is
+        shorter than the predicted scoring time of the uncached candidates, or
+        when scoring runs past the budget or fails. The candidates then keep
+        their retrieval order.
+
+        Returns:
+            The candidates and whether they were reranked.
+        """
+        reranker = config.get_default_reranker()
+        if not results or reranker is None:
+            return results, False
+        texts = [
+            result.get("page_content") or result.get("snippet") or ""
+            for result in results
+        ]
+        budget = (budget_ms or config.RERANKER_BUDGET_MS) / 1000
+        request = timing.current()
+        remaining = budget - (request.elapsed_ms() / 1000 if request else 0)
+        if remaining <= 0 or reranker.estimate_seconds(
+            reranker.missing(query, texts)
+        ) > remaining:
+            metrics.RERANK_SKIPPED.labels(reason="budget").inc()
+            return results, False
+        try:
+            with timing.stage("rerank"):
+                scores = await asyncio.wait_for(
+                    reranker.ascore(query, texts), timeout=remaining
+                )
+        except TimeoutError:
+            metrics.RERANK_SKIPPED.labels(reason="timeout").inc()
+            return results, False
+        except Exception as e:
+            logger.warning(f"Reranking failed: {e}")
+            metrics.RERANK_SKIPPED.labels(reason="error").inc()
+            return results, False
+        for result, score in zip(results, scores, strict=True):
+            result["score"] = score
+        return sorted(results, key=lambda result: result["score"], reverse=True), True
+
+    async def _stream_rows(
+        self,
+        sql: str,
+        args: builtins.list[Any],
+        *,
+        settings: builtins.list[str],
+        limit: int,
+        filter: Optional[dict[str, Any]],
+        projection: Projection,
+        search_type: str,
+        started: float,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield the formatted rows of a search query read through a cursor.
+
+        The rows are read by a separate task as fast as Postgres produces them,
+        so the connection is released once the query is done rather than when
+        a slow client has consumed the results. At most the query's LIMIT rows
+        are buffered.
+        """
+        buffer: asyncio.Queue = asyncio.Queue()
+        reader = asyncio.create_task(
+            self._read_rows(
+                sql, args, buffer, settings=settings, limit=limit, filter=filter
+            )
+        )
+        try:
+            while (row := await buffer.get()) is not None:
+                yield projection.apply(row)
+            # Raise the reader's error, if any.
+            await reader
+            metrics.SEARCH_LATENCY.labels(search_type=search_type).observe(
+                time.perf_counter() - started
+            )
+        finally:
+            reader.cancel()
+
+    async def _read_rows(
+        self,
+        sql: str,
+        args: builtins.list[Any],
+        buffer: asyncio.Queue,
+        *,
+        settings: builtins.list[str],
+        limit: int,
+        filter: Optional[dict[str, Any]],
+    ) -> None:
+        """Put the formatted rows of a search query in a buffer, then None."""
+        try:
+            # Cursors only exist inside a transaction.
+            async with (
+                get_db_connection(read_only=True, user_id=self.user_id) as conn,
+                conn.transaction(),
+            ):
+                for setting in settings:
+                    await conn.execute(setting)
+                count = 0
+                async for row in conn.cursor(sql, *args, prefetch=STREAM_PREFETCH):
+                    result = self._format_row(row)
+                    if filter and not _metadata_matches(result["metadata"], filter):
+                        continue
+                    buffer.put_nowait(result)
+                    count += 1
+                    if count >= limit:
+                        break
+        finally:
+            buffer.put_nowait(None)
+
+    async def _search(
+        self,
+        query: str,
+        *,
+        limit: int,
+        search_type: Literal["semantic", "keyword", "hybrid"],
+        filter: Optional[dict[str, Any]],
+        explain: bool,
+        projection: Projection,
+        diversify: bool = False,
+        mmr_lambda: float = 0.5,
+        max_per_file: Optional[int] = None,
+        rerank: bool = False,
+        rerank_budget_ms: Optional[float] = None,
+    ) -> builtins.list[dict[str, Any]]:
+        """Run a search in the collection. See `search` for the arguments."""
+        details = await self._get_details_or_raise()
+        if rerank and not projection.wants("page_content"):
+            # The reranker reads the text even when it isn't returned
+            projection = replace(
+                projection, fields=projection.fields | {"page_content"}
+            )
+        # Metadata is read to filter results even when it isn't returned
+        stage_options = {
+            "explain": explain,
+            "projection": projection,
+            "fetch_metadata": bool(filter or max_per_file),
+            "fetch_embedding": diversify,
+            "layout": quantization.layout_of(details["metadata"]),
+        }
+        embeddings = self._embeddings_of(details["metadata"])
+        select_options = {
+            "search_type": search_type,
+            "diversify": diversify,
+            "mmr_lambda": mmr_lambda,
+            "max_per_file": max_per_file,
+        }
+
+        async def select(
+            results: list[dict[str, Any]],
+        ) -> list[dict[str, Any]]:
+            """Rerank the candidates if requested, then pick the results."""
+            if rerank:
+                results, reranked = await self._rerank(
+                    query, results, rerank_budget_ms
+                )
+                if reranked:
+                    select_options["search_type"] = "reranked"
+            return _select(results, limit, **select_options)
 
         # Helper function to apply metadata filter
         def apply_metadata_filter(
@@ -510,150 +2337,83 @@ class Collection:
             if not filter_dict:
                 return results
 
-            filtered_results = []
-            for result in results:
-                result_metadata = result.get("metadata", {})
-                # Check if all filter conditions are met
-                match = True
-                for key, value in filter_dict.items():
-                    if key not in result_metadata or result_metadata[key] != value:
-                        match = False
-                        break
-                if match:
-                    filtered_results.append(result)
-            return filtered_results
-
-        if search_type == "semantic":
-            # Current semantic search implementation
-            store = get_vectorstore(collection_name=details["table_id"])
-            # Get more results initially if filter is applied
-            k = limit * 3 if filter else limit
-            results = store.similarity_search_with_score(query, k=k)
-
-            # Convert to standard format
-            formatted_results = [
-                {
-                    "id": doc.id,
-                    "page_content": doc.page_content,
-                    "metadata": doc.metadata,
-                    "score": score,
-                }
-                for doc, score in results
+            return [
+                result
+                for result in results
+                if _metadata_matches(result.get("metadata", {}), filter_dict)
             ]
 
-            # Apply metadata filter
-            filtered_results = apply_metadata_filter(formatted_results, filter)
+        # Get more results initially if filter is applied
+        search_limit = limit * 3 if filter else limit
+        # and pick the results among more candidates if diversifying
+        candidates = limit
+        if diversify or max_per_file:
+            candidates = limit * config.SEARCH_MMR_FETCH_FACTOR
+        if rerank:
+            candidates = max(candidates, limit * config.RERANKER_FETCH_FACTOR)
+        search_limit = max(search_limit, candidates)
 
-            # Return only the requested limit
-            return filtered_results[:limit]
+        if search_type == "semantic":
+            results = await self._vector_search(
+                query, search_limit, embeddings=embeddings, **stage_options
+            )
+            # Apply metadata filter and return only the requested limit
+            results = apply_metadata_filter(results, filter)[:candidates]
+            return await select(results)
 
         if search_type == "keyword":
             # Full-text search using PostgreSQL
-            # Get more results initially if filter is applied
-            search_limit = limit * 3 if filter else limit
-
-            async with get_db_connection() as conn:
-                rows = await conn.fetch(
-                    """
-                    SELECT e.id as id,
-                           e.document as page_content,
-                           e.cmetadata as metadata,
-                           ts_rank(to_tsvector('english', e.document), 
-                                  plainto_tsquery('english', $1)) as score
-                    FROM langchain_pg_embedding e
-                    JOIN langchain_pg_collection c ON e.collection_id = c.uuid
-                    WHERE c.uuid = $2
-                      AND c.cmetadata->>'owner_id' = $3
-                      AND to_tsvector('english', e.document) @@ plainto_tsquery('english', $1)
-                    ORDER BY score DESC
-                    LIMIT $4
-                    """,
-                    query,
-                    self.collection_id,
-                    self.user_id,
-                    search_limit,
-                )
-
-            formatted_results = [
-                {
-                    "id": str(row["id"]),
-                    "page_content": row["page_content"],
-                    "metadata": json.loads(row["metadata"]) if row["metadata"] else {},
-                    "score": float(row["score"]),
-                }
-                for row in rows
-            ]
-
-            # Apply metadata filter
-            filtered_results = apply_metadata_filter(formatted_results, filter)
-
-            # Return only the requested limit
-            return filtered_results[:limit]
+            results = await self._keyword_search(query, search_limit, **stage_options)
+            # Apply metadata filter and return only the requested limit
+            results = apply_metadata_filter(results, filter)[:candidates]
+            return await select(results)
 
         # hybrid
-        # Get semantic search results
-        store = get_vectorstore(collection_name=details["table_id"])
-        semantic_results = store.similarity_search_with_score(query, k=limit * 2)
-
-        # Get keyword search results
-        async with get_db_connection() as conn:
-            keyword_rows = await conn.fetch(
-                """
-                    SELECT e.id as id,
-                           e.document as page_content,
-                           e.cmetadata as metadata,
-                           ts_rank(to_tsvector('english', e.document), 
-                                  plainto_tsquery('english', $1)) as score
-                    FROM langchain_pg_embedding e
-                    JOIN langchain_pg_collection c ON e.collection_id = c.uuid
-                    WHERE c.uuid = $2
-                      AND c.cmetadata->>'owner_id' = $3
-                      AND to_tsvector('english', e.document) @@ plainto_tsquery('english', $1)
-                    ORDER BY score DESC
-                    LIMIT $4
-                    """,
-                query,
-                self.collection_id,
-                self.user_id,
-                limit * 2,
-            )
+        # Run semantic and keyword search concurrently on separate connections
+        semantic_results, keyword_results = await asyncio.gather(
+            self._vector_search(
+                query, candidates * 2, embeddings=embeddings, **stage_options
+            ),
+            self._keyword_search(query, candidates * 2, **stage_options),
+        )
 
-        # Combine and deduplicate results
-        combined_results = {}
+        with timing.stage("merge"):
+            # Combine and deduplicate results
+            combined_results: dict[str, dict[str, Any]] = {}
 
-        # Add semantic results with normalized scores
-        max_semantic_score = max(
-            (score for _, score in semantic_results), default=1.0
-        )
-        for doc, score in semantic_results:
-            normalized_score = (
-                score / max_semantic_score if max_semantic_score > 0 else 0
-            )
-            combined_results[doc.id] = {
-                "id": doc.id,
-                "page_content": doc.page_content,
-                "metadata": doc.metadata,
-                "semantic_score": normalized_score,
-                "keyword_score": 0,
-                "combined_score": normalized_score * 0.7,  # 70% weight for semantic
-            }
+            # Add semantic results with normalized scores
+            max_semantic_score = max(
+                (result["score"] for result in semantic_results), default=1.0
+            )
+            for result in semantic_results:
+                normalized_score = (
+                    result["score"] / max_semantic_score
+                    if max_semantic_score > 0
+                    else 0
+                )
+                combined_results[result["id"]] = {
+                    **result,
+                    "semantic_score": normalized_score,
+                    "keyword_score": 0,
+                    "combined_score": normalized_score * 0.7,  # 70% weight for semantic
+                }
 
-        # Add keyword results with normalized scores
-        if keyword_rows:
+            # Add keyword results with normalized scores
             max_keyword_score = max(
-                (float(row["score"]) for row in keyword_rows), default=1.0
+                (result["score"] for result in keyword_results), default=1.0
             )
-            for row in keyword_rows:
-                doc_id = str(row["id"])
+            for result in keyword_results:
+                doc_id = result["id"]
                 normalized_score = (
-                    float(row["score"]) / max_keyword_score
-                    if max_keyword_score > 0
-                    else 0
+                    result["score"] / max_keyword_score if max_keyword_score > 0 else 0
                 )
 
                 if doc_id in combined_results:
                     # Document exists, update scores
                     combined_results[doc_id]["keyword_score"] = normalized_score
+                    if "snippet" in result:
+                        # Prefer the highlighted keyword snippet
+                        combined_results[doc_id]["snippet"] = result["snippet"]
                     combined_results[doc_id]["combined_score"] = (
                         combined_results[doc_id]["semantic_score"] * 0.7
                         + normalized_score * 0.3  # 30% weight for keyword
@@ -661,33 +2421,25 @@ class Collection:
                 else:
                     # New document from keyword search
                     combined_results[doc_id] = {
-                        "id": doc_id,
-                        "page_content": row["page_content"],
-                        "metadata": json.loads(row["metadata"])
-                        if row["metadata"]
-                        else {},
+                        **result,
                         "semantic_score": 0,
                         "keyword_score": normalized_score,
                         "combined_score": normalized_score * 0.3,
                     }
 
-        # Convert combined results to list format
-        all_results = [
-            {
-                "id": result["id"],
-                "page_content": result["page_content"],
-                "metadata": result["metadata"],
-                "score": result["combined_score"],
-            }
-            for result in combined_results.values()
-        ]
+            # Convert combined results to list format
+            all_results = []
+            for result in combined_results.values():
+                result["score"] = result.pop("combined_score")
+                del result["semantic_score"], result["keyword_score"]
+                all_results.append(result)
 
-        # Apply metadata filter
-        filtered_results = apply_metadata_filter(all_results, filter)
+            # Apply metadata filter
+            filtered_results = apply_metadata_filter(all_results, filter)
 
-        # Sort by combined score and return top results
-        sorted_results = sorted(
-            filtered_results, key=lambda x: x["score"], reverse=True
-        )[:limit]
+            # Sort by combined score and return top results
+            sorted_results = sorted(
+                filtered_results, key=lambda x: x["score"], reverse=True
+            )[:candidates]
 
-        return sorted_results
+        return await select(sorted_results)
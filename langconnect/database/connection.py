@@ -1,21 +1,89 @@
+import asyncio
 import logging
-from collections.abc import AsyncGenerator
+import time
+from collections.abc import AsyncGenerator, Sequence
 from contextlib import asynccontextmanager
-from typing import Any, Optional, Union
+from typing import TYPE_CHECKING, Any, Optional, Union
 
 import asyncpg
-import sqlalchemy
-from langchain_core.embeddings import Embeddings
-from langchain_postgres.vectorstores import PGVector
-from sqlalchemy import Engine, create_engine
-from sqlalchemy.ext.asyncio import AsyncEngine
 
-from langconnect import config
+from langconnect import config, metrics, serialization, timing
+
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+    from langchain_postgres.vectorstores import PGVector
+    from sqlalchemy import Engine
+    from sqlalchemy.ext.asyncio import AsyncEngine
 
 logger = logging.getLogger(__name__)
 
 
 _pool: asyncpg.Pool | None = None
+_read_pool: asyncpg.Pool | None = None
+
+# Monotonic time until which each user's reads go to the primary, see
+# `mark_write`.
+_recent_writes: dict[str, float] = {}
+
+
+async def init_connection(conn: asyncpg.Connection) -> None:
+    """Set up a new pool connection.
+
+    json and jsonb values are decoded to Python objects (and encoded from
+    them) by the driver, in binary format for jsonb, so metadata is parsed
+    once per row without an extra ``json.loads`` in the query code. Vectors
+    use the binary pgvector codec, so embeddings are sent as lists of floats
+    instead of being formatted as text.
+    """
+    from pgvector.asyncpg import register_vector
+
+    await conn.set_type_codec(
+        "jsonb",
+        schema="pg_catalog",
+        encoder=serialization.encode_jsonb,
+        decoder=serialization.decode_jsonb,
+        format="binary",
+    )
+    await conn.set_type_codec(
+        "json",
+        schema="pg_catalog",
+        encoder=serialization.dumps_str,
+        decoder=serialization.loads,
+    )
+    await register_vector(conn)
+
+
+def _pool_options() -> dict[str, Any]:
+    """Sizing, timeouts and statement cache of the pool, from the config."""
+    statement_cache_size = config.POSTGRES_STATEMENT_CACHE_SIZE
+    if config.POSTGRES_PGBOUNCER:
+        statement_cache_size = 0
+    return {
+        "min_size": config.POSTGRES_POOL_MIN_SIZE,
+        "max_size": config.POSTGRES_POOL_MAX_SIZE,
+        "max_inactive_connection_lifetime": config.POSTGRES_POOL_MAX_INACTIVE_LIFETIME,
+        "command_timeout": config.POSTGRES_COMMAND_TIMEOUT or None,
+        "statement_cache_size": statement_cache_size,
+        "init": init_connection,
+    }
+
+
+async def ensure_vector_extension(**connect_kwargs: Any) -> None:
+    """Create the pgvector extension if it doesn't exist yet.
+
+    Pool connections register the vector codec as they are opened, which
+    fails without the extension, so it is created before the pool.
+    """
+    conn = await asyncpg.connect(**connect_kwargs)
+    try:
+        exists = await conn.fetchval(
+            "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'vector')"
+        )
+        if not exists:
+            await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            logger.info("Created the vector extension.")
+    finally:
+        await conn.close()
 
 
 async def get_db_pool() -> asyncpg.Pool:
@@ -23,31 +91,149 @@ async def get_db_pool() -> asyncpg.Pool:
     global _pool
     if _pool is None:
         # Use parsed components for asyncpg connection
-        _pool = await asyncpg.create_pool(
-            user=config.POSTGRES_USER,
-            password=config.POSTGRES_PASSWORD,
-            host=config.POSTGRES_HOST,
-            port=config.POSTGRES_PORT,
-            database=config.POSTGRES_DB,
-        )
+        connect_kwargs = {
+            "user": config.POSTGRES_USER,
+            "password": config.POSTGRES_PASSWORD,
+            "host": config.POSTGRES_HOST,
+            "port": config.POSTGRES_PORT,
+            "database": config.POSTGRES_DB,
+        }
+        await ensure_vector_extension(**connect_kwargs)
+        _pool = await asyncpg.create_pool(**connect_kwargs, **_pool_options())
         logger.info("Database connection pool created using parsed URL components.")
     return _pool
 
 
+async def get_read_pool() -> asyncpg.Pool:
+    """Get the read replica connection pool.
+
+    Returns the primary pool when no replica is configured.
+    """
+    global _read_pool
+    if not config.POSTGRES_READ_HOST:
+        return await get_db_pool()
+    if _read_pool is None:
+        options = _pool_options()
+        options["min_size"] = config.POSTGRES_READ_POOL_MIN_SIZE
+        options["max_size"] = config.POSTGRES_READ_POOL_MAX_SIZE
+        _read_pool = await asyncpg.create_pool(
+            user=config.POSTGRES_READ_USER,
+            password=config.POSTGRES_READ_PASSWORD,
+            host=config.POSTGRES_READ_HOST,
+            port=config.POSTGRES_READ_PORT,
+            database=config.POSTGRES_READ_DB,
+            **options,
+        )
+        logger.info(
+            f"Read replica connection pool created for {config.POSTGRES_READ_HOST}."
+        )
+    return _read_pool
+
+
+def mark_write(user_id: str) -> None:
+    """Record that the user just wrote to the primary.
+
+    For ``POSTGRES_READ_YOUR_WRITES_SECONDS`` their reads are served by the
+    primary, so that they see their own writes despite replication lag.
+
+    Writes are tracked in the memory of this worker only: with several
+    workers or replicas of the server, a read balanced to another worker can
+    still hit the replica before it has replayed the write. Clients needing
+    read-your-writes across workers should stick to one worker (e.g. session
+    affinity by user) or not configure ``POSTGRES_READ_HOST``.
+    """
+    if not config.POSTGRES_READ_HOST or config.POSTGRES_READ_YOUR_WRITES_SECONDS <= 0:
+        return
+    now = time.monotonic()
+    if len(_recent_writes) > 10_000:
+        for expired in [u for u, until in _recent_writes.items() if until < now]:
+            del _recent_writes[expired]
+    _recent_writes[user_id] = now + config.POSTGRES_READ_YOUR_WRITES_SECONDS
+
+
+def _wrote_recently(user_id: str | None) -> bool:
+    if user_id is None:
+        return False
+    until = _recent_writes.get(user_id)
+    if until is None:
+        return False
+    if until < time.monotonic():
+        _recent_writes.pop(user_id, None)
+        return False
+    return True
+
+
+async def warm_up_pool(statements: Sequence[tuple[str, Sequence[Any]]]) -> None:
+    """Run statements on each of the initial connections of the pools.
+
+    asyncpg caches prepared statements per connection, so running the hot
+    statements once on every connection removes the parse/plan round trip
+    from the first requests served by each of them. The read replica pool,
+    when configured, is warmed up too.
+
+    Args:
+        statements: Pairs of SQL and arguments. Use arguments that match no
+            rows; only the preparation matters.
+    """
+    pools = [await get_db_pool()]
+    if config.POSTGRES_READ_HOST:
+        pools.append(await get_read_pool())
+    if not config.POSTGRES_STATEMENT_CACHE_SIZE or config.POSTGRES_PGBOUNCER:
+        # Statements are not kept, so only open the connections.
+        statements = []
+
+    async def _prepare(conn: asyncpg.Connection) -> None:
+        for sql, args in statements:
+            await conn.fetch(sql, *args)
+
+    for pool in pools:
+        # Hold the connections at once so that each one is a different one.
+        connections = [await pool.acquire() for _ in range(pool.get_min_size())]
+        try:
+            await asyncio.gather(*(_prepare(conn) for conn in connections))
+        finally:
+            for conn in connections:
+                await pool.release(conn)
+        logger.info(
+            f"Prepared {len(statements)} statements on {len(connections)} connections."
+        )
+
+
 async def close_db_pool():
-    """Close the pg connection pool."""
-    global _pool
+    """Close the pg connection pools."""
+    global _pool, _read_pool
+    if _read_pool:
+        await _read_pool.close()
+        _read_pool = None
     if _pool:
         await _pool.close()
         _pool = None
 
 
 @asynccontextmanager
-async def get_db_connection() -> AsyncGenerator[asyncpg.Connection, None]:
-    """Acquire a connection from the pool and release it when done."""
-    pool = await get_db_pool()
-    async with pool.acquire() as conn:
+async def get_db_connection(
+    *, read_only: bool = False, user_id: str | None = None
+) -> AsyncGenerator[asyncpg.Connection, None]:
+    """Acquire a connection from the pool and release it when done.
+
+    Args:
+        read_only: The connection is only used for reads, so it may come from
+            the read replica pool.
+        user_id: The user the reads are made for. Right after their own
+            writes, their reads go to the primary (see ``mark_write``).
+    """
+    if read_only and config.POSTGRES_READ_HOST and not _wrote_recently(user_id):
+        pool, name = await get_read_pool(), "read"
+    else:
+        pool, name = await get_db_pool(), "primary"
+    with timing.stage("db_acquire", metrics.DB_POOL_ACQUIRE_WAIT.labels(pool=name)):
+        conn = await pool.acquire()
+    metrics.update_pool_gauges(pool, name)
+    try:
         yield conn
+    finally:
+        await pool.release(conn)
+        metrics.update_pool_gauges(pool, name)
 
 
 def get_vectorstore_engine(
@@ -56,25 +242,38 @@ def get_vectorstore_engine(
     user: str = config.POSTGRES_USER,
     password: str = config.POSTGRES_PASSWORD,
     dbname: str = config.POSTGRES_DB,
-) -> Engine:
+) -> "Engine":
     """Creates and returns a sync SQLAlchemy engine for PostgreSQL."""
+    from sqlalchemy import create_engine
+
     connection_string = f"postgresql+psycopg://{user}:{password}@{host}:{port}/{dbname}"
     engine = create_engine(connection_string)
     return engine
 
 
-DBConnection = Union[sqlalchemy.engine.Engine, str]
+DBConnection = Union["Engine", str]
 
 
 def get_vectorstore(
     collection_name: str = config.DEFAULT_COLLECTION_NAME,
-    embeddings: Embeddings = config.DEFAULT_EMBEDDINGS,
-    engine: Optional[Union[DBConnection, Engine, AsyncEngine]] = None,
+    embeddings: Optional["Embeddings"] = None,
+    engine: Optional[Union[DBConnection, "Engine", "AsyncEngine"]] = None,
     collection_metadata: Optional[dict[str, Any]] = None,
-) -> PGVector:
+    embedding_length: Optional[int] = None,
+) -> "PGVector":
     """Initializes and returns a PGVector store for a specific collection,
     using an existing engine or creating one from connection parameters.
+
+    Embeddings default to the shared instance from the config, and the
+    embedding length (used to size the vector column when the tables are
+    created) defaults to its dimension.
     """
+    from langchain_postgres.vectorstores import PGVector
+
+    if embeddings is None:
+        embeddings = config.get_default_embeddings()
+    if embedding_length is None:
+        embedding_length = config.get_embedding_dimension(embeddings)
     if engine is None:
         engine = get_vectorstore_engine()
 
@@ -84,5 +283,6 @@ def get_vectorstore(
         connection=engine,
         use_jsonb=True,
         collection_metadata=collection_metadata,
+        embedding_length=embedding_length,
     )
     return store
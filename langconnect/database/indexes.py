@@ -0,0 +1,305 @@
+"""Approximate nearest neighbor indexes on the embedding table.
+
+pgvector supports HNSW and IVFFlat indexes. Without one, vector search is an
+exact scan of the collection's chunks. Build parameters are set here, search
+parameters (``hnsw.ef_search``, ``ivfflat.probes``) per query, see
+``vector_search_settings``.
+"""
+
+import logging
+from typing import Any, Literal
+
+from langconnect import config
+from langconnect.database import quantization
+from langconnect.database.connection import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+VECTOR_INDEX_NAME = quantization.INDEXES["vector"].name
+# Client-side timeout of an index build, in seconds.
+INDEX_BUILD_TIMEOUT = 24 * 60 * 60
+
+EMBEDDING_TABLE = "langchain_pg_embedding"
+
+IndexMethod = Literal["hnsw", "ivfflat"]
+
+# Whether an index of this name exists but is invalid, e.g. left behind by an
+# interrupted concurrent build.
+INVALID_INDEX_SQL = """
+    SELECT EXISTS (
+        SELECT 1 FROM pg_index WHERE indexrelid = to_regclass($1)
+           AND NOT indisvalid
+    )
+"""
+
+# Session lock of the concurrent build of the index $1.
+BUILD_LOCK_SQL = "SELECT pg_try_advisory_lock(hashtext($1))"
+BUILD_UNLOCK_SQL = "SELECT pg_advisory_unlock(hashtext($1))"
+
+# Partitions of the embedding table without an index attached to the
+# partitioned index $1.
+UNINDEXED_PARTITIONS_SQL = f"""
+    SELECT p.inhrelid::regclass::text AS partition
+      FROM pg_inherits p
+     WHERE p.inhparent = '{EMBEDDING_TABLE}'::regclass
+       AND NOT EXISTS (
+             SELECT 1
+               FROM pg_inherits i
+               JOIN pg_index x ON x.indexrelid = i.inhrelid
+              WHERE i.inhparent = to_regclass($1)
+                AND x.indrelid = p.inhrelid
+           )
+     ORDER BY 1
+"""
+
+# Dimensions of the collections with their own embedding model.
+COLLECTION_DIMENSIONS_SQL = f"""
+    SELECT DISTINCT (cmetadata->>'{quantization.DIMENSION_METADATA_KEY}')::int
+      FROM langchain_pg_collection
+     WHERE cmetadata ? '{quantization.DIMENSION_METADATA_KEY}'
+"""
+
+
+def _index_sql(
+    method: IndexMethod,
+    params: dict[str, Any],
+    storage: str | quantization.StorageIndex = "vector",
+    concurrently: bool = False,
+    *,
+    table: str = EMBEDDING_TABLE,
+    name: str | None = None,
+    only: bool = False,
+) -> str:
+    if method == "hnsw":
+        m = int(params.get("m", 16))
+        ef_construction = int(params.get("ef_construction", 64))
+        options = f"m = {m}, ef_construction = {ef_construction}"
+    elif method == "ivfflat":
+        options = f"lists = {int(params.get('lists', 100))}"
+    else:
+        raise ValueError(f"Unsupported vector index method: {method!r}")
+    index = (
+        storage
+        if isinstance(storage, quantization.StorageIndex)
+        else quantization.INDEXES[storage]
+    )
+    where = f" WHERE {index.where}" if index.where else ""
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}"
+        f"IF NOT EXISTS {name or index.name} "
+        f"ON {'ONLY ' if only else ''}{table} USING {method} "
+        f"({index.column} {index.opclass}) WITH ({options}){where}"
+    )
+
+
+def _partition_index_name(index_name: str, partition: str) -> str:
+    """Name of the index of one partition, within the 63 bytes of identifiers."""
+    return f"{index_name}_{partition.removeprefix(EMBEDDING_TABLE + '_')[:12]}"
+
+
+def _indexed_columns() -> list[str]:
+    if quantization.available():
+        return list(quantization.INDEXES)
+    return [quantization.DEFAULT_STORAGE, "short"]
+
+
+async def create_vector_index(
+    method: IndexMethod,
+    *,
+    concurrently: bool = False,
+    progress: dict[str, Any] | None = None,
+    **params: Any,
+) -> None:
+    """Create the ANN indexes on the embedding columns if they don't exist.
+
+    There is one index per storage mode, one on the short vectors and one per
+    dimension of the collections with their own embedding model (see
+    ``langconnect.database.quantization``), each holding the chunks of the
+    collections searched on it.
+
+    Args:
+        method: ``hnsw`` or ``ivfflat``.
+        concurrently: Build without blocking writes to the embedding table,
+            see `build_index`.
+        progress: Progress of the job building the indexes, counting the
+            ``built_indexes``.
+        **params: Build parameters: ``m`` and ``ef_construction`` for HNSW,
+            ``lists`` for IVFFlat.
+    """
+    for storage in _indexed_columns():
+        await build_index(
+            quantization.INDEXES[storage], method, params, concurrently, progress
+        )
+    async with get_db_connection() as conn:
+        dimensions = [row[0] for row in await conn.fetch(COLLECTION_DIMENSIONS_SQL)]
+    for dimension in dimensions:
+        if quantization.needs_unsized(dimension):
+            await create_dimension_index(
+                dimension,
+                method,
+                concurrently=concurrently,
+                progress=progress,
+                **params,
+            )
+
+
+async def create_dimension_index(
+    dimension: int,
+    method: IndexMethod,
+    *,
+    concurrently: bool = False,
+    progress: dict[str, Any] | None = None,
+    **params: Any,
+) -> None:
+    """Create the ANN index of the collections of one embedding dimension.
+
+    pgvector can't index vectors of more than 2000 dimensions; collections
+    of such models are searched exactly.
+
+    Args:
+        dimension: Embedding dimension of the collections.
+        method: ``hnsw`` or ``ivfflat``.
+        concurrently: Build without blocking writes, see `build_index`.
+        progress: Progress of the job building the index.
+        **params: Build parameters, see `create_vector_index`.
+    """
+    if dimension > quantization.MAX_INDEX_DIMENSIONS:
+        logger.warning(
+            f"Vectors of {dimension} dimensions can't be indexed; searches of "
+            "their collections scan exactly."
+        )
+        return
+    await build_index(
+        quantization.unsized_index(dimension), method, params, concurrently, progress
+    )
+
+
+async def build_index(
+    index: quantization.StorageIndex,
+    method: IndexMethod,
+    params: dict[str, Any],
+    concurrently: bool = False,
+    progress: dict[str, Any] | None = None,
+) -> None:
+    """Build one ANN index of the embedding table if it doesn't exist.
+
+    A plain build blocks writes to the table while it is scanned. With
+    ``concurrently`` it uses ``CREATE INDEX CONCURRENTLY``, which Postgres
+    doesn't support on a partitioned table: the index is then created on the
+    partitioned table only (invalid until complete), built concurrently on
+    each partition and attached, see `_build_partitioned`. Concurrent builds
+    of the same index by several workers are skipped but for one.
+    """
+    from langconnect.database import partitions
+
+    if not concurrently:
+        await _build(_index_sql(method, params, index))
+    else:
+        async with get_db_connection() as lock_conn:
+            # Another worker's build in progress would look like the invalid
+            # leftover of an interrupted one, and be dropped.
+            if not await lock_conn.fetchval(BUILD_LOCK_SQL, index.name):
+                logger.info(f"Vector index {index.name} is built by another worker.")
+                return
+            try:
+                if partitions.enabled():
+                    await _build_partitioned(index, method, params, progress)
+                else:
+                    await _build_concurrently(
+                        _index_sql(method, params, index, True), index.name
+                    )
+            finally:
+                await lock_conn.fetchval(BUILD_UNLOCK_SQL, index.name)
+    if progress is not None:
+        progress["built_indexes"] = progress.get("built_indexes", 0) + 1
+
+
+async def _build_concurrently(sql: str, name: str) -> None:
+    async with get_db_connection() as conn:
+        # An interrupted concurrent build leaves an invalid index behind,
+        # which IF NOT EXISTS would keep.
+        if await conn.fetchval(INVALID_INDEX_SQL, name):
+            await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    try:
+        await _build(sql)
+    except Exception:
+        async with get_db_connection() as conn:
+            await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        raise
+
+
+async def _build_partitioned(
+    index: quantization.StorageIndex,
+    method: IndexMethod,
+    params: dict[str, Any],
+    progress: dict[str, Any] | None,
+) -> None:
+    """Build an index of the partitioned embedding table partition by partition.
+
+    Partitions created meanwhile get their index from the partitioned one.
+    """
+    async with get_db_connection() as conn:
+        await conn.execute(_index_sql(method, params, index, only=True))
+        pending = [
+            row["partition"]
+            for row in await conn.fetch(UNINDEXED_PARTITIONS_SQL, index.name)
+        ]
+    if progress is not None:
+        progress["pending_partitions"] = len(pending)
+    for partition in pending:
+        name = _partition_index_name(index.name, partition)
+        await _build_concurrently(
+            _index_sql(method, params, index, True, table=partition, name=name), name
+        )
+        async with get_db_connection() as conn:
+            await conn.execute(f"ALTER INDEX {index.name} ATTACH PARTITION {name}")
+        if progress is not None:
+            progress["pending_partitions"] -= 1
+
+
+async def index_exists(name: str) -> bool:
+    """Whether a valid index of this name exists."""
+    async with get_db_connection() as conn:
+        return await conn.fetchval(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM pg_index WHERE indexrelid = to_regclass($1)
+                   AND indisvalid
+            )
+            """,
+            name,
+        )
+
+
+async def _build(sql: str) -> None:
+    async with get_db_connection() as conn:
+        # Index builds can take much longer than POSTGRES_COMMAND_TIMEOUT.
+        await conn.execute(sql, timeout=INDEX_BUILD_TIMEOUT)
+    logger.info(f"Vector index ready: {sql}")
+
+
+async def drop_vector_index() -> None:
+    """Drop the ANN indexes, so vector search scans exactly."""
+    async with get_db_connection() as conn:
+        names = [index.name for index in quantization.INDEXES.values()]
+        names += await conn.fetchval(
+            """
+            SELECT COALESCE(array_agg(indexname::text), '{}')
+              FROM pg_indexes
+             WHERE tablename = 'langchain_pg_embedding'
+               AND starts_with(indexname, $1)
+            """,
+            quantization.UNSIZED_INDEX_PREFIX,
+        )
+        for name in names:
+            await conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def vector_search_settings() -> list[str]:
+    """``SET LOCAL`` statements for the configured index search parameters."""
+    settings = []
+    if config.PGVECTOR_HNSW_EF_SEARCH:
+        settings.append(f"SET LOCAL hnsw.ef_search = {int(config.PGVECTOR_HNSW_EF_SEARCH)}")
+    if config.PGVECTOR_IVFFLAT_PROBES:
+        settings.append(f"SET LOCAL ivfflat.probes = {int(config.PGVECTOR_IVFFLAT_PROBES)}")
+    return settings
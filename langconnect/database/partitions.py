@@ -0,0 +1,202 @@
+"""Per-collection partitioning of the embedding table.
+
+With ``PGVECTOR_PARTITION_BY_COLLECTION`` enabled, ``langchain_pg_embedding``
+is list-partitioned by ``collection_id`` with one partition per collection:
+
+* every index (including the ANN index, see ``indexes``) is built per
+  partition, so one large collection doesn't bloat the indexes of the others
+  and vacuum works on one collection at a time;
+* searches only touch the partition of the searched collection;
+* deleting a collection detaches and drops its partition instead of deleting
+  its rows.
+
+The partitioned table is set up at startup when the embedding table is empty.
+An existing table with rows is migrated explicitly with::
+
+    python -m langconnect.database.partitions migrate
+"""
+
+import argparse
+import asyncio
+import logging
+import uuid
+
+import asyncpg
+
+from langconnect import config
+from langconnect.database import quantization
+from langconnect.database.connection import get_db_connection
+from langconnect.database.indexes import INDEX_BUILD_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_TABLE = "langchain_pg_embedding"
+# Serializes concurrent migrations from several workers.
+_MIGRATION_LOCK_ID = 0x6C636F6E6E6563  # "lconnec"
+
+_enabled = False
+
+
+def enabled() -> bool:
+    """Whether the embedding table is partitioned by collection."""
+    return _enabled
+
+
+def partition_name(collection_id: str) -> str:
+    """Name of the partition holding the chunks of a collection."""
+    return f"{EMBEDDING_TABLE}_{uuid.UUID(str(collection_id)).hex}"
+
+
+def _partitioned_table_sql(dimension: int | None) -> str:
+    vector_type = f"vector({int(dimension)})" if dimension else "vector"
+    return f"""
+        CREATE TABLE {EMBEDDING_TABLE} (
+            id varchar NOT NULL,
+            collection_id uuid NOT NULL
+                REFERENCES langchain_pg_collection (uuid) ON DELETE CASCADE,
+            embedding {vector_type},
+            document varchar,
+            cmetadata jsonb,
+            PRIMARY KEY (collection_id, id)
+        ) PARTITION BY LIST (collection_id)
+    """
+
+
+async def _is_partitioned(conn: asyncpg.Connection) -> bool:
+    return await conn.fetchval(
+        """
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table p
+              JOIN pg_class c ON c.oid = p.partrelid
+             WHERE c.relname = $1 AND pg_table_is_visible(c.oid)
+        )
+        """,
+        EMBEDDING_TABLE,
+    )
+
+
+async def create_partition(conn: asyncpg.Connection, collection_id: str) -> None:
+    """Create the partition of a collection if it doesn't exist."""
+    collection_uuid = uuid.UUID(str(collection_id))
+    await conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {partition_name(collection_id)} "
+        f"PARTITION OF {EMBEDDING_TABLE} FOR VALUES IN ('{collection_uuid}')"
+    )
+
+
+async def drop_partition(collection_id: str) -> None:
+    """Detach and drop the partition of a collection.
+
+    The partition is detached concurrently, so searches in other collections
+    are not blocked while it is dropped.
+    """
+    name = partition_name(collection_id)
+    async with get_db_connection() as conn:
+        exists = await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", name)
+        if not exists:
+            return
+        # Neither statement may run inside a transaction block.
+        await conn.execute(
+            f"ALTER TABLE {EMBEDDING_TABLE} DETACH PARTITION {name} CONCURRENTLY"
+        )
+        await conn.execute(f"DROP TABLE IF EXISTS {name}")
+    logger.info(f"Dropped partition {name}.")
+
+
+async def migrate(*, allow_copy: bool = True) -> bool:
+    """Convert the embedding table to a table partitioned by collection.
+
+    The existing table is renamed, a partitioned table with one partition per
+    collection is created, and the chunks are copied over in one transaction.
+
+    Args:
+        allow_copy: When False, only migrate an empty table.
+
+    Returns:
+        Whether the table is partitioned afterwards.
+    """
+    dimension = config.get_embedding_dimension(config.get_default_embeddings())
+    async with get_db_connection() as conn, conn.transaction():
+        await conn.execute("SELECT pg_advisory_xact_lock($1)", _MIGRATION_LOCK_ID)
+        if await _is_partitioned(conn):
+            return True
+        has_rows = await conn.fetchval(
+            f"SELECT EXISTS (SELECT 1 FROM {EMBEDDING_TABLE})"
+        )
+        if has_rows and not allow_copy:
+            return False
+
+        old_table = f"{EMBEDDING_TABLE}_unpartitioned"
+        await conn.execute(f"ALTER TABLE {EMBEDDING_TABLE} RENAME TO {old_table}")
+        # Index names are unique per schema; the old indexes go with the table.
+        for (index_name,) in await conn.fetch(
+            "SELECT indexname FROM pg_indexes WHERE tablename = $1", old_table
+        ):
+            await conn.execute(f"ALTER INDEX {index_name} RENAME TO {index_name}_old")
+        await conn.execute(_partitioned_table_sql(dimension))
+        reduced_columns = await quantization.add_columns(
+            conn, EMBEDDING_TABLE, dimension, config.PGVECTOR_SHORT_DIMENSION
+        )
+        columns = ", ".join(
+            ["id", "collection_id", "embedding", "document", "cmetadata"]
+            + reduced_columns
+        )
+        await conn.execute(
+            f"CREATE INDEX ix_cmetadata_gin ON {EMBEDDING_TABLE} "
+            "USING gin (cmetadata jsonb_path_ops)"
+        )
+        for (collection_id,) in await conn.fetch(
+            "SELECT uuid FROM langchain_pg_collection"
+        ):
+            await create_partition(conn, collection_id)
+        if has_rows:
+            logger.info("Copying chunks into the partitioned embedding table...")
+            await conn.execute(
+                f"""
+                INSERT INTO {EMBEDDING_TABLE} ({columns})
+                SELECT {columns}
+                  FROM {old_table}
+                """,
+                timeout=INDEX_BUILD_TIMEOUT,
+            )
+        await conn.execute(f"DROP TABLE {old_table}")
+    logger.info("The embedding table is partitioned by collection.")
+    return True
+
+
+async def setup() -> None:
+    """Enable partitioning at startup when configured.
+
+    An empty embedding table (as created by PGVector on a new database) is
+    converted on the spot; a table with rows has to be migrated explicitly,
+    and until then the shared table keeps being used.
+    """
+    global _enabled
+    if await migrate(allow_copy=False):
+        _enabled = True
+        return
+    logger.error(
+        "PGVECTOR_PARTITION_BY_COLLECTION is set but the embedding table has rows "
+        "and isn't partitioned. Run `python -m langconnect.database.partitions "
+        "migrate` to convert it. Using the shared table meanwhile."
+    )
+
+
+async def _main() -> None:
+    from langconnect.database.collections import CollectionsManager
+    from langconnect.database.connection import close_db_pool
+
+    parser = argparse.ArgumentParser(prog="python -m langconnect.database.partitions")
+    parser.add_argument("command", choices=["migrate"])
+    parser.parse_args()
+    try:
+        # Creates the tables on a new database
+        await CollectionsManager.setup()
+        await migrate()
+    finally:
+        await close_db_pool()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
@@ -0,0 +1,244 @@
+"""Vector layouts: how the embeddings of a collection are stored.
+
+Embeddings are stored as float32 ``vector`` values by default, 4 bytes per
+dimension. A collection can instead be created with a ``vector_storage``
+(kept in its metadata) that stores less per chunk:
+
+1. ``halfvec``: float16 values in the ``embedding_half`` column, 2 bytes per
+   dimension. Recall is practically unchanged.
+2. ``binary``: the sign of each dimension in the ``embedding_bit`` column, 1
+   bit per dimension, next to the ``halfvec`` values. The ANN index holds the
+   bits only, 32 times less than float32 values, and is searched by Hamming
+   distance; ``PGVECTOR_BINARY_RERANK_FACTOR`` times more candidates than
+   requested are then rescored by cosine distance on the ``halfvec`` values.
+
+The ``embedding`` column of these collections' chunks is NULL, so they don't
+take space in the float32 index, and the ``halfvec`` index skips ``binary``
+chunks. The columns need a known embedding dimension to be indexed; without
+one only ``vector`` storage is available.
+
+Independently, a ``vector`` or ``halfvec`` collection can be created with a
+short vector: the first ``PGVECTOR_SHORT_DIMENSION`` dimensions of each
+embedding in the ``embedding_short`` column. Models trained with Matryoshka
+representation learning (e.g. OpenAI's text-embedding-3) concentrate the
+information in the leading dimensions, so the ANN search runs on the short
+vectors, with a several times smaller index, and
+``PGVECTOR_SHORT_RERANK_FACTOR`` times more candidates than requested are
+rescored with the full vectors. The full vectors of these chunks are left out
+of the full-size indexes.
+
+The typed columns are sized for the default embedding model. Collections
+created with a model of another dimension (see ``CollectionsManager.create``)
+store ``vector`` values in the ``embedding_unsized`` column, which has no
+fixed dimension, and get one partial expression index per dimension.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Literal, NamedTuple
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+VectorStorage = Literal["vector", "halfvec", "binary"]
+
+STORAGE_MODES: tuple[str, ...] = ("vector", "halfvec", "binary")
+DEFAULT_STORAGE = "vector"
+# Collection metadata keys holding the storage mode, the short vector size
+# and the embedding model. They are set at creation and kept by updates.
+METADATA_KEY = "vector_storage"
+SHORT_METADATA_KEY = "short_vector_dimension"
+PROVIDER_METADATA_KEY = "embeddings_provider"
+MODEL_METADATA_KEY = "embeddings_model"
+DIMENSION_METADATA_KEY = "embeddings_dimension"
+METADATA_KEYS = (
+    METADATA_KEY,
+    SHORT_METADATA_KEY,
+    PROVIDER_METADATA_KEY,
+    MODEL_METADATA_KEY,
+    DIMENSION_METADATA_KEY,
+)
+
+# Columns added to the embedding table for the other layouts.
+HALFVEC_COLUMN = "embedding_half"
+BIT_COLUMN = "embedding_bit"
+SHORT_COLUMN = "embedding_short"
+UNSIZED_COLUMN = "embedding_unsized"
+
+# pgvector indexes vector values of at most this many dimensions.
+MAX_INDEX_DIMENSIONS = 2000
+
+_available = False
+# Dimension of the typed columns, when known.
+_dimension: int | None = None
+
+
+class StorageIndex(NamedTuple):
+    """ANN index of one storage mode."""
+
+    name: str
+    column: str
+    opclass: str
+    # Partial index predicate, also added to the search query so it matches
+    where: str | None = None
+
+
+INDEXES: dict[str, StorageIndex] = {
+    "vector": StorageIndex(
+        "ix_langchain_pg_embedding_embedding",
+        "embedding",
+        "vector_cosine_ops",
+        f"{SHORT_COLUMN} IS NULL",
+    ),
+    "halfvec": StorageIndex(
+        "ix_langchain_pg_embedding_embedding_half",
+        HALFVEC_COLUMN,
+        "halfvec_cosine_ops",
+        f"{BIT_COLUMN} IS NULL AND {SHORT_COLUMN} IS NULL",
+    ),
+    "binary": StorageIndex(
+        "ix_langchain_pg_embedding_embedding_bit", BIT_COLUMN, "bit_hamming_ops"
+    ),
+    "short": StorageIndex(
+        "ix_langchain_pg_embedding_embedding_short", SHORT_COLUMN, "vector_cosine_ops"
+    ),
+}
+# Prefix of the names of the per-dimension indexes of the unsized column.
+UNSIZED_INDEX_PREFIX = "ix_langchain_pg_embedding_embedding_d"
+
+
+def unsized_index(dimension: int) -> StorageIndex:
+    """Expression index of the unsized column for one dimension."""
+    dimension = int(dimension)
+    return StorageIndex(
+        f"{UNSIZED_INDEX_PREFIX}{dimension}",
+        f"({UNSIZED_COLUMN}::vector({dimension}))",
+        "vector_cosine_ops",
+        f"vector_dims({UNSIZED_COLUMN}) = {dimension} AND {SHORT_COLUMN} IS NULL",
+    )
+
+
+@dataclass(frozen=True)
+class VectorLayout:
+    """How the vectors of a collection are stored.
+
+    Attributes:
+        storage: ``vector``, ``halfvec`` or ``binary``.
+        short_dimension: Size of the short vector searched first, or None.
+        dimension: Size of the vectors stored in the unsized column, or None
+            when they fit the typed columns.
+    """
+
+    storage: str = DEFAULT_STORAGE
+    short_dimension: int | None = None
+    dimension: int | None = None
+
+    @property
+    def index(self) -> StorageIndex:
+        """Index searched by single-stage searches."""
+        if self.dimension:
+            return unsized_index(self.dimension)
+        return INDEXES[self.storage]
+
+
+DEFAULT_LAYOUT = VectorLayout()
+
+
+def available() -> bool:
+    """Whether the reduced-precision columns exist."""
+    return _available
+
+
+def storage_of(metadata: dict[str, Any] | None) -> str:
+    """Storage mode of a collection, from its metadata."""
+    return (metadata or {}).get(METADATA_KEY) or DEFAULT_STORAGE
+
+
+def typed_dimension() -> int | None:
+    """Dimension of the typed vector columns, when known."""
+    return _dimension
+
+
+def needs_unsized(dimension: int | None) -> bool:
+    """Whether vectors of this dimension go to the unsized column."""
+    return bool(dimension) and dimension != _dimension
+
+
+def layout_of(metadata: dict[str, Any] | None) -> VectorLayout:
+    """Vector layout of a collection, from its metadata."""
+    metadata = metadata or {}
+    short_dimension = metadata.get(SHORT_METADATA_KEY)
+    dimension = metadata.get(DIMENSION_METADATA_KEY)
+    if not needs_unsized(dimension):
+        dimension = None
+    if not (short_dimension or dimension) and storage_of(metadata) == DEFAULT_STORAGE:
+        return DEFAULT_LAYOUT
+    return VectorLayout(
+        storage_of(metadata),
+        int(short_dimension) if short_dimension else None,
+        int(dimension) if dimension else None,
+    )
+
+
+def vector_columns() -> list[str]:
+    """Names of all vector columns of the embedding table."""
+    columns = ["embedding", SHORT_COLUMN, UNSIZED_COLUMN]
+    if _available:
+        columns += [HALFVEC_COLUMN, BIT_COLUMN]
+    return columns
+
+
+def column_definitions(
+    dimension: int | None, short_dimension: int
+) -> list[tuple[str, str]]:
+    """Names and types of the columns of the other layouts.
+
+    The reduced-precision columns need the embedding dimension, the short
+    vector column only its own.
+    """
+    columns = [
+        (SHORT_COLUMN, f"vector({int(short_dimension)})"),
+        (UNSIZED_COLUMN, "vector"),
+    ]
+    if dimension:
+        columns += [
+            (HALFVEC_COLUMN, f"halfvec({int(dimension)})"),
+            (BIT_COLUMN, f"bit({int(dimension)})"),
+        ]
+    return columns
+
+
+async def add_columns(
+    conn: asyncpg.Connection,
+    table: str,
+    dimension: int | None,
+    short_dimension: int,
+) -> list[str]:
+    """Add the columns of the other layouts to an embedding table.
+
+    Returns:
+        The names of the columns.
+    """
+    columns = column_definitions(dimension, short_dimension)
+    for name, column_type in columns:
+        await conn.execute(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {name} {column_type}"
+        )
+    return [name for name, _ in columns]
+
+
+async def setup(
+    conn: asyncpg.Connection, dimension: int | None, short_dimension: int
+) -> None:
+    """Add the columns of the other layouts at startup."""
+    global _available, _dimension
+    await add_columns(conn, "langchain_pg_embedding", dimension, short_dimension)
+    _available = bool(dimension)
+    _dimension = dimension
+    if not _available:
+        logger.warning(
+            "The embedding dimension is unknown; only 'vector' storage is "
+            "available. Set EMBEDDINGS_DIMENSION to enable 'halfvec' and "
+            "'binary' storage."
+        )
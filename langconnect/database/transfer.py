@@ -0,0 +1,365 @@
+"""Collection export and import in Arrow formats.
+
+A collection is exported as a stream of record batches, one row per chunk
+with its id, text, metadata (JSON text) and embedding, in Parquet or in the
+Arrow IPC stream format. The collection's name and metadata, including its
+vector layout and embedding model (see ``quantization.METADATA_KEYS``), are
+kept in the schema metadata, so an import recreates an equivalent collection
+and bulk-loads the chunks with ``COPY`` instead of embedding them again.
+
+Both directions work in batches of ``COLLECTION_TRANSFER_BATCH_SIZE`` chunks:
+exports read the chunks through a cursor and send each batch as soon as it is
+encoded, and imports read the uploaded file (spooled to disk by the server)
+batch by batch, so memory use doesn't grow with the size of the collection.
+Embeddings of ``halfvec`` and ``binary`` collections are exported at float16
+precision, and imported chunks get new ids.
+
+pyarrow is only imported by the first export or import.
+"""
+
+import asyncio
+import io
+import logging
+from collections.abc import AsyncIterator, Iterator
+from typing import IO, Any, Literal
+
+from fastapi import status
+from fastapi.exceptions import HTTPException
+
+from langconnect import config, metrics, serialization
+from langconnect.database import quantization
+from langconnect.database.collections import (
+    CollectionDetails,
+    CollectionsManager,
+    embedding_columns,
+    embedding_expression,
+)
+from langconnect.database.connection import get_db_connection, mark_write
+
+logger = logging.getLogger(__name__)
+
+TransferFormat = Literal["parquet", "arrow"]
+
+MEDIA_TYPES: dict[str, str] = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+FILE_EXTENSIONS: dict[str, str] = {"parquet": "parquet", "arrow": "arrows"}
+
+# Schema metadata key of the collection header, and its version.
+HEADER_KEY = b"langconnect"
+FORMAT_VERSION = 1
+# Collection metadata keys that belong to the exporting deployment.
+_LOCAL_METADATA_KEYS = ("owner_id", "deleted_at")
+_PARQUET_MAGIC = b"PAR1"
+
+_EXPORT_SQL_TEMPLATE = """
+    SELECT e.id, e.document, e.cmetadata, {embedding} AS embedding
+      FROM langchain_pg_embedding e
+     WHERE e.collection_id = $1
+"""
+
+# Each imported batch is copied into a staging table, from which the layout
+# columns are computed as for an upsert (see `embedding_columns`).
+_STAGING_TABLE = "chunk_import"
+_STAGING_DDL = f"""
+    CREATE TEMPORARY TABLE {_STAGING_TABLE} (
+        document varchar,
+        cmetadata jsonb,
+        embedding vector
+    ) ON COMMIT DROP
+"""
+_IMPORT_INSERT_TEMPLATE = """
+    INSERT INTO langchain_pg_embedding
+           (id, collection_id, {columns}, document, cmetadata)
+    SELECT gen_random_uuid()::text, $1, {values}, s.document, s.cmetadata
+      FROM {staging} s
+"""
+
+
+def _pyarrow() -> Any:
+    # Imported on first use, it would add to the server's startup time
+    import pyarrow
+
+    return pyarrow
+
+
+def _schema(pa: Any, header: dict[str, Any]) -> Any:
+    return pa.schema(
+        [
+            pa.field("id", pa.string(), nullable=False),
+            pa.field("document", pa.string()),
+            pa.field("metadata", pa.string()),
+            pa.field("embedding", pa.list_(pa.float32())),
+        ],
+        metadata={HEADER_KEY: serialization.dumps(header)},
+    )
+
+
+def _header(details: CollectionDetails) -> dict[str, Any]:
+    """Collection header of an export."""
+    metadata = {
+        key: value
+        for key, value in details["metadata"].items()
+        if key not in _LOCAL_METADATA_KEYS
+    }
+    layout = quantization.layout_of(metadata)
+    return {
+        "version": FORMAT_VERSION,
+        "name": details["name"],
+        "metadata": metadata,
+        "dimension": layout.dimension or quantization.typed_dimension(),
+    }
+
+
+class _ChunkSink(io.RawIOBase):
+    """Writable file collecting the encoded bytes until they are taken."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class _Writer:
+    """Encodes record batches in one of the transfer formats."""
+
+    def __init__(self, format: TransferFormat, header: dict[str, Any]) -> None:
+        self.pa = _pyarrow()
+        self.schema = _schema(self.pa, header)
+        self.sink = _ChunkSink()
+        if format == "parquet":
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(self.sink, self.schema)
+        else:
+            self._writer = self.pa.ipc.new_stream(self.sink, self.schema)
+
+    def write(self, rows: list[Any]) -> bytes:
+        """Encode a batch of chunk rows and return the bytes written."""
+        # Imported on first use, like pyarrow.
+        import numpy as np
+
+        pa = self.pa
+        batch = pa.record_batch(
+            [
+                pa.array([row["id"] for row in rows], pa.string()),
+                pa.array([row["document"] for row in rows], pa.string()),
+                pa.array(
+                    [serialization.dumps_str(row["cmetadata"]) for row in rows],
+                    pa.string(),
+                ),
+                pa.array(
+                    [
+                        None
+                        if row["embedding"] is None
+                        else np.asarray(row["embedding"], dtype=np.float32)
+                        for row in rows
+                    ],
+                    pa.list_(pa.float32()),
+                ),
+            ],
+            schema=self.schema,
+        )
+        self._writer.write_batch(batch)
+        return self.sink.take()
+
+    def close(self) -> bytes:
+        """Finish the file and return the remaining bytes."""
+        self._writer.close()
+        return self.sink.take()
+
+
+def export_collection(
+    details: CollectionDetails,
+    user_id: str,
+    format: TransferFormat = "parquet",
+) -> AsyncIterator[bytes]:
+    """Encode the chunks of a collection, yielding the file batch by batch.
+
+    Errors such as a missing pyarrow package are raised before the first
+    batch, so they can still be returned as an error response.
+
+    Args:
+        details: The collection, from `CollectionsManager.get`.
+        user_id: The user the chunks are read for.
+        format: ``parquet`` or ``arrow`` (IPC stream).
+    """
+    return _export_batches(_Writer(format, _header(details)), details, user_id)
+
+
+async def _export_batches(
+    writer: _Writer, details: CollectionDetails, user_id: str
+) -> AsyncIterator[bytes]:
+    layout = quantization.layout_of(details["metadata"])
+    sql = _EXPORT_SQL_TEMPLATE.format(embedding=embedding_expression(layout))
+    batch_size = config.COLLECTION_TRANSFER_BATCH_SIZE
+    exported = 0
+    # Cursors only exist inside a transaction. The connection is held until
+    # the export is sent or the client disconnects.
+    async with (
+        get_db_connection(read_only=True, user_id=user_id) as conn,
+        conn.transaction(),
+    ):
+        rows: list[Any] = []
+        async for row in conn.cursor(sql, details["uuid"], prefetch=batch_size):
+            rows.append(row)
+            if len(rows) >= batch_size:
+                yield await asyncio.to_thread(writer.write, rows)
+                exported += len(rows)
+                rows = []
+        if rows:
+            yield await asyncio.to_thread(writer.write, rows)
+            exported += len(rows)
+    yield await asyncio.to_thread(writer.close)
+    logger.info(f"Exported {exported} chunks of collection {details['uuid']}.")
+
+
+def _read_batches(source: IO[bytes]) -> tuple[Any, Iterator[Any]]:
+    """Schema and record batches of an uploaded Parquet or Arrow IPC file."""
+    pa = _pyarrow()
+    magic = source.read(len(_PARQUET_MAGIC))
+    source.seek(0)
+    batch_size = config.COLLECTION_TRANSFER_BATCH_SIZE
+    try:
+        if magic == _PARQUET_MAGIC:
+            import pyarrow.parquet as pq
+
+            parquet = pq.ParquetFile(source)
+            return parquet.schema_arrow, parquet.iter_batches(batch_size=batch_size)
+        reader = pa.ipc.open_stream(source)
+    except (pa.ArrowException, OSError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Not a Parquet or Arrow IPC stream file: {e}",
+        ) from e
+    # Record batches of an IPC stream are read as written.
+    return reader.schema, iter(reader)
+
+
+def _read_header(schema: Any) -> dict[str, Any]:
+    raw = (schema.metadata or {}).get(HEADER_KEY)
+    if raw is None or not {"document", "metadata", "embedding"} <= set(schema.names):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The file is not a collection export.",
+        )
+    header = serialization.loads(raw)
+    if header.get("version") != FORMAT_VERSION:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported export version: {header.get('version')}.",
+        )
+    return header
+
+
+def _records(batch: Any, dimension: int | None) -> list[tuple[Any, ...]]:
+    """Staging table rows of a record batch."""
+    documents = batch.column("document").to_pylist()
+    metadata = batch.column("metadata").to_pylist()
+    embeddings = batch.column("embedding").to_pylist()
+    for embedding in embeddings:
+        if embedding is None or (dimension and len(embedding) != dimension):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Every chunk needs an embedding of {dimension} dimensions.",
+            )
+    return [
+        (document, serialization.loads(meta) if meta else {}, embedding)
+        for document, meta, embedding in zip(
+            documents, metadata, embeddings, strict=True
+        )
+    ]
+
+
+async def import_collection(
+    user_id: str, source: IO[bytes], name: str | None = None
+) -> dict[str, Any]:
+    """Create a collection from an export, without computing embeddings.
+
+    The collection is created with the exported metadata, vector layout and
+    embedding model. If loading the chunks fails, it is deleted again.
+
+    Args:
+        user_id: The owner of the new collection.
+        source: The exported file, seekable.
+        name: Name of the new collection, the exported one by default.
+
+    Returns:
+        Details of the new collection, with its number of chunks.
+    """
+    schema, batches = await asyncio.to_thread(_read_batches, source)
+    header = _read_header(schema)
+    metadata = dict(header.get("metadata") or {})
+    dimension = header.get("dimension")
+    expected = metadata.get(quantization.DIMENSION_METADATA_KEY) or (
+        quantization.typed_dimension()
+    )
+    if dimension and expected and dimension != expected:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"The export has {dimension}-dimensional embeddings, the "
+            f"embedding table {expected}.",
+        )
+    manager = CollectionsManager(user_id)
+    details = await manager.create(
+        name or header.get("name") or "Imported collection",
+        metadata,
+        vector_storage=metadata.get(quantization.METADATA_KEY),
+        short_vector=bool(metadata.get(quantization.SHORT_METADATA_KEY)),
+        embeddings_provider=metadata.get(quantization.PROVIDER_METADATA_KEY),
+        embeddings_model=metadata.get(quantization.MODEL_METADATA_KEY),
+        embeddings_dimension=metadata.get(quantization.DIMENSION_METADATA_KEY),
+    )
+    if not details:
+        raise HTTPException(status_code=500, detail="Failed to create collection")
+    columns = embedding_columns(
+        quantization.layout_of(details["metadata"]), "s.embedding"
+    )
+    insert_sql = _IMPORT_INSERT_TEMPLATE.format(
+        columns=", ".join(columns),
+        values=", ".join(columns.values()),
+        staging=_STAGING_TABLE,
+    )
+    imported = 0
+    try:
+        async with get_db_connection() as conn:
+            while True:
+                batch = await asyncio.to_thread(next, batches, None)
+                if batch is None:
+                    break
+                records = _records(batch, expected)
+                # One transaction per batch keeps locks and WAL bursts short.
+                async with conn.transaction():
+                    await conn.execute(_STAGING_DDL)
+                    await conn.copy_records_to_table(
+                        _STAGING_TABLE,
+                        records=records,
+                        columns=["document", "cmetadata", "embedding"],
+                    )
+                    await conn.execute(insert_sql, details["uuid"])
+                imported += len(records)
+                metrics.UPSERT_CHUNKS.inc(len(records))
+    except Exception:
+        logger.exception(f"Import into collection {details['uuid']} failed.")
+        await manager.delete(details["uuid"])
+        raise
+    mark_write(user_id)
+    logger.info(f"Imported {imported} chunks into collection {details['uuid']}.")
+    return {**details, "chunk_count": imported}
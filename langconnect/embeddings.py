@@ -0,0 +1,360 @@
+"""Embedding provider registry.
+
+Providers are selected with the ``EMBEDDINGS_PROVIDER`` environment variable:
+
+1. ``openai``: OpenAI embeddings API (default).
+2. ``local``: a sentence-transformers model running on the local CPU.
+3. ``fake``: deterministic hash-based embeddings for tests and benchmarks.
+
+Register additional providers with ``register_embeddings_provider``.
+"""
+
+import asyncio
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from langchain_core.embeddings import Embeddings
+
+from langconnect import metrics
+
+EmbeddingsFactory = Callable[[str, int | None], Embeddings]
+
+# Known output sizes for models that don't expose their dimension.
+OPENAI_MODEL_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+DEFAULT_MODELS = {
+    "openai": "text-embedding-3-small",
+    "local": "sentence-transformers/all-MiniLM-L6-v2",
+    "fake": "hash",
+}
+
+FAKE_DEFAULT_DIMENSION = 256
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic embeddings based on feature hashing of word tokens.
+
+    Texts that share words get similar vectors, so search results are
+    meaningful enough for benchmarks, while no model or network access is needed.
+    """
+
+    def __init__(self, dimension: int = FAKE_DEFAULT_DIMENSION) -> None:
+        """Initialize the hash embeddings.
+
+        Args:
+            dimension: Size of the produced vectors.
+        """
+        if dimension <= 0:
+            raise ValueError("dimension must be a positive integer")
+        self.dimension = dimension
+
+    def _embed(self, text: str) -> list[float]:
+        vector = [0.0] * self.dimension
+        for token in _TOKEN_RE.findall(text.lower()):
+            digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            index = value % self.dimension
+            sign = 1.0 if (value >> 63) & 1 else -1.0
+            vector[index] += sign
+        norm = math.sqrt(sum(v * v for v in vector))
+        if norm == 0:
+            # Empty text: return a fixed unit vector so cosine distance is defined.
+            vector[0] = 1.0
+            return vector
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed a list of documents."""
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embed a query."""
+        return self._embed(text)
+
+
+class LocalEmbeddings(Embeddings):
+    """Embeddings computed by a sentence-transformers model on the local CPU.
+
+    The model is loaded on first use. Documents are encoded in batches, and the
+    async methods run the encoding in a dedicated thread pool so the event loop
+    stays responsive.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        *,
+        batch_size: int = 32,
+        max_workers: int = 1,
+        backend: str = "torch",
+        device: str = "cpu",
+        dimension: int | None = None,
+    ) -> None:
+        """Initialize the local embeddings.
+
+        Args:
+            model: Name or path of a sentence-transformers model.
+            batch_size: Number of texts encoded per forward pass.
+            max_workers: Size of the thread pool used by the async methods.
+            backend: Inference backend, ``torch`` or ``onnx``.
+            device: Device to run the model on.
+            dimension: Truncate the vectors to this size (for Matryoshka
+                models), or None for the model's own size.
+        """
+        self.model_name = model
+        self.truncate_dim = dimension
+        self.batch_size = batch_size
+        self.backend = backend
+        self.device = device
+        self._model: Any = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="local-embeddings"
+        )
+
+    @property
+    def model(self) -> Any:
+        """Return the underlying model, loading it if needed."""
+        if self._model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError as e:
+                raise ImportError(
+                    "The 'local' embeddings provider requires the "
+                    "sentence-transformers package. Install it with "
+                    "`pip install sentence-transformers`."
+                ) from e
+            model = SentenceTransformer(
+                self.model_name,
+                device=self.device,
+                backend=self.backend,
+                truncate_dim=self.truncate_dim,
+            )
+            dimension = model.get_sentence_embedding_dimension()
+            if self.truncate_dim and dimension != self.truncate_dim:
+                raise ValueError(
+                    f"The local model {self.model_name!r} produces "
+                    f"{dimension}-dimensional vectors, it can't be extended to "
+                    f"the requested {self.truncate_dim} dimensions."
+                )
+            self._model = model
+        return self._model
+
+    @property
+    def dimension(self) -> int:
+        """Return the size of the vectors produced by the model."""
+        return int(self.model.get_sentence_embedding_dimension())
+
+    def _encode(self, texts: list[str]) -> list[list[float]]:
+        vectors = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return vectors.tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed a list of documents."""
+        if not texts:
+            return []
+        return self._encode(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embed a query."""
+        return self._encode([text])[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed a list of documents in the thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        """Embed a query in the thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.embed_query, text)
+
+
+class InstrumentedEmbeddings(Embeddings):
+    """Wrap an embeddings instance with metrics and a query embedding cache.
+
+    Agents often repeat the same queries (e.g. multi-query fan-out), so query
+    embeddings are kept in a small LRU cache keyed by the query text.
+    """
+
+    def __init__(self, embeddings: Embeddings, *, query_cache_size: int = 1024) -> None:
+        """Initialize the wrapper.
+
+        Args:
+            embeddings: The embeddings instance to wrap.
+            query_cache_size: Maximum number of cached query embeddings.
+                Zero disables the cache.
+        """
+        self.embeddings = embeddings
+        self.query_cache_size = query_cache_size
+        # Vectors are cached as tuples and returned as new lists, so callers
+        # can't alter the cached copy.
+        self._query_cache: OrderedDict[str, tuple[float, ...]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def dimension(self) -> int | None:
+        """Return the vector size of the wrapped embeddings, if known."""
+        return get_embedding_dimension(self.embeddings)
+
+    def _cached_query(self, text: str) -> list[float] | None:
+        if not self.query_cache_size:
+            return None
+        with self._lock:
+            vector = self._query_cache.get(text)
+            if vector is not None:
+                self._query_cache.move_to_end(text)
+        metrics.record_cache("query_embedding", hit=vector is not None)
+        return None if vector is None else list(vector)
+
+    def _cache_query(self, text: str, vector: list[float]) -> None:
+        if not self.query_cache_size:
+            return
+        with self._lock:
+            self._query_cache[text] = tuple(vector)
+            self._query_cache.move_to_end(text)
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+
+    @staticmethod
+    def _observe(operation: str, batch_size: int, start: float) -> None:
+        metrics.EMBEDDING_LATENCY.labels(operation=operation).observe(
+            time.perf_counter() - start
+        )
+        metrics.EMBEDDING_BATCH_SIZE.labels(operation=operation).observe(batch_size)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed a list of documents."""
+        start = time.perf_counter()
+        vectors = self.embeddings.embed_documents(texts)
+        self._observe("documents", len(texts), start)
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embed a query."""
+        vector = self._cached_query(text)
+        if vector is not None:
+            return vector
+        start = time.perf_counter()
+        vector = self.embeddings.embed_query(text)
+        self._observe("query", 1, start)
+        self._cache_query(text, vector)
+        return vector
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed a list of documents asynchronously."""
+        start = time.perf_counter()
+        vectors = await self.embeddings.aembed_documents(texts)
+        self._observe("documents", len(texts), start)
+        return vectors
+
+    async def aembed_query(self, text: str) -> list[float]:
+        """Embed a query asynchronously."""
+        vector = self._cached_query(text)
+        if vector is not None:
+            return vector
+        start = time.perf_counter()
+        vector = await self.embeddings.aembed_query(text)
+        self._observe("query", 1, start)
+        self._cache_query(text, vector)
+        return vector
+
+
+def _openai_factory(model: str, dimension: int | None) -> Embeddings:
+    from langchain_openai import OpenAIEmbeddings
+
+    if dimension and dimension != OPENAI_MODEL_DIMENSIONS.get(model):
+        return OpenAIEmbeddings(model=model, dimensions=dimension)
+    return OpenAIEmbeddings(model=model)
+
+
+def _local_factory(model: str, dimension: int | None) -> Embeddings:
+    from langconnect import config
+
+    return LocalEmbeddings(
+        model,
+        batch_size=config.EMBEDDINGS_BATCH_SIZE,
+        max_workers=config.EMBEDDINGS_MAX_WORKERS,
+        backend=config.EMBEDDINGS_LOCAL_BACKEND,
+        dimension=dimension,
+    )
+
+
+def _fake_factory(model: str, dimension: int | None) -> Embeddings:
+    return HashEmbeddings(dimension or FAKE_DEFAULT_DIMENSION)
+
+
+_PROVIDERS: dict[str, EmbeddingsFactory] = {
+    "openai": _openai_factory,
+    "local": _local_factory,
+    "fake": _fake_factory,
+}
+
+
+def register_embeddings_provider(name: str, factory: EmbeddingsFactory) -> None:
+    """Register an embeddings provider.
+
+    Args:
+        name: Value of ``EMBEDDINGS_PROVIDER`` that selects this provider.
+        factory: Callable taking ``(model, dimension)`` and returning an
+            ``Embeddings`` instance. ``dimension`` is None when not configured.
+    """
+    _PROVIDERS[name] = factory
+
+
+def available_providers() -> list[str]:
+    """Return the names of all registered providers."""
+    return sorted(_PROVIDERS)
+
+
+def create_embeddings(
+    provider: str, model: str = "", dimension: int | None = None
+) -> Embeddings:
+    """Create an embeddings instance from the registry.
+
+    Args:
+        provider: Registered provider name.
+        model: Model name. Uses the provider default when empty.
+        dimension: Requested vector size, or None for the model default.
+
+    Raises:
+        ValueError: If the provider is not registered.
+    """
+    try:
+        factory = _PROVIDERS[provider]
+    except KeyError:
+        raise ValueError(
+            f"Unknown embeddings provider {provider!r}. "
+            f"Available providers: {', '.join(available_providers())}."
+        )
+    return factory(model or DEFAULT_MODELS.get(provider, ""), dimension)
+
+
+def get_embedding_dimension(embeddings: Embeddings) -> int | None:
+    """Return the vector size produced by an embeddings instance, if known."""
+    dimension = getattr(embeddings, "dimension", None)
+    if dimension:
+        return int(dimension)
+    # OpenAIEmbeddings exposes the requested size as `dimensions`.
+    dimensions = getattr(embeddings, "dimensions", None)
+    if dimensions:
+        return int(dimensions)
+    return OPENAI_MODEL_DIMENSIONS.get(getattr(embeddings, "model", ""))
@@ -0,0 +1,124 @@
+"""In-process background jobs.
+
+Long running operations (purging a deleted collection, ...) run as asyncio
+tasks on the worker that started them, and report their progress through a
+``Job``. Jobs are kept in memory: their status is visible on the worker that
+runs them (``GET /jobs/{job_id}``) until it restarts, and operations that have
+to survive a restart resume from state stored in the database instead.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass, field
+from typing import Any, Literal
+
+logger = logging.getLogger(__name__)
+
+JobStatus = Literal["running", "succeeded", "failed", "cancelled"]
+
+# Finished jobs kept for status queries; the oldest are forgotten first.
+MAX_FINISHED_JOBS = 1000
+
+
+@dataclass
+class Job:
+    """A background job and its progress."""
+
+    id: str
+    kind: str
+    owner_id: str
+    status: JobStatus = "running"
+    progress: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize the job for API responses."""
+        return asdict(self)
+
+
+_jobs: dict[str, Job] = {}
+_tasks: dict[str, asyncio.Task] = {}
+
+
+def _forget_finished() -> None:
+    finished = [job for job in _jobs.values() if job.finished_at is not None]
+    if len(finished) <= MAX_FINISHED_JOBS:
+        return
+    finished.sort(key=lambda job: job.finished_at)
+    for job in finished[: len(finished) - MAX_FINISHED_JOBS]:
+        del _jobs[job.id]
+
+
+async def _run(job: Job, fn: Callable[[Job], Awaitable[Any]]) -> None:
+    try:
+        await fn(job)
+        job.status = "succeeded"
+    except asyncio.CancelledError:
+        job.status = "cancelled"
+        raise
+    except Exception as e:
+        logger.exception(f"{job.kind} job {job.id} failed.")
+        job.status = "failed"
+        job.error = str(e)
+    finally:
+        job.finished_at = time.time()
+        _tasks.pop(job.id, None)
+        _forget_finished()
+
+
+def start(
+    kind: str,
+    owner_id: str,
+    fn: Callable[[Job], Awaitable[Any]],
+    **progress: Any,
+) -> Job:
+    """Start a background job.
+
+    Args:
+        kind: Type of job, e.g. ``purge_collection``.
+        owner_id: User the job is visible to.
+        fn: Coroutine function running the job. It receives the job and may
+            update ``job.progress`` as it goes.
+        **progress: Initial progress fields.
+
+    Returns:
+        The running job.
+    """
+    job = Job(id=str(uuid.uuid4()), kind=kind, owner_id=owner_id, progress=progress)
+    _jobs[job.id] = job
+    _tasks[job.id] = asyncio.create_task(_run(job, fn), name=f"{kind}:{job.id}")
+    return job
+
+
+def get(job_id: str, owner_id: str) -> Job | None:
+    """Get a job of the given user."""
+    job = _jobs.get(job_id)
+    if job is None or job.owner_id != owner_id:
+        return None
+    return job
+
+
+def list_jobs(owner_id: str) -> list[Job]:
+    """List the jobs of the given user, newest first."""
+    jobs = [job for job in _jobs.values() if job.owner_id == owner_id]
+    return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+
+async def wait(job_id: str) -> None:
+    """Wait for a job to finish (no-op when it isn't running)."""
+    task = _tasks.get(job_id)
+    if task is not None:
+        await asyncio.gather(task, return_exceptions=True)
+
+
+async def shutdown() -> None:
+    """Cancel the running jobs, e.g. before the database pool is closed."""
+    tasks = list(_tasks.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,377 @@
+"""Prometheus-style metrics.
+
+A minimal registry rendering the Prometheus text exposition format, so the
+server can expose ``/metrics`` without extra dependencies. Metrics for the
+hot paths (requests, embeddings, queries, parsing, the connection pool and
+caches) are defined at the bottom of this module.
+"""
+
+import math
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from typing import Any
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return "{" + inner + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric") -> None:
+        """Add a metric to the registry."""
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name!r} is already registered")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: list[str] = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Registry | None = REGISTRY,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, **labels: Any) -> Any:
+        """Return the child metric for the given label values."""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"Expected labels {self.labelnames} for {self.name}, got {tuple(labels)}"
+            )
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self) -> Any:
+        if self.labelnames:
+            raise ValueError(f"Metric {self.name} requires labels {self.labelnames}")
+        return self.labels()
+
+    def _items(self) -> list[tuple[dict[str, str], Any]]:
+        with self._lock:
+            items = list(self._children.items())
+        return [(dict(zip(self.labelnames, key, strict=True)), c) for key, c in items]
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class _Value:
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = value
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    type = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the counter."""
+        self._default().inc(amount)
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}_total{_format_labels(labels)} {_format_value(child.value)}"
+            for labels, child in self._items()
+        ]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    type = "gauge"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def set(self, value: float) -> None:
+        """Set the gauge."""
+        self._default().set(value)
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(labels)} {_format_value(child.value)}"
+            for labels, child in self._items()
+        ]
+
+
+class _HistogramValue:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Registry | None = REGISTRY,
+    ) -> None:
+        """Initialize the histogram.
+
+        Args:
+            name: Metric name.
+            documentation: Help text.
+            labelnames: Names of the labels.
+            buckets: Upper bounds of the buckets. +Inf is added automatically.
+            registry: Registry to add the metric to, or None.
+        """
+        bounds = sorted(float(b) for b in buckets)
+        if not bounds or not math.isinf(bounds[-1]):
+            bounds.append(math.inf)
+        self.buckets = tuple(bounds)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Record an observation."""
+        self._default().observe(value)
+
+    def time(self) -> Any:
+        """Context manager observing the elapsed time in seconds."""
+        return self._default().time()
+
+    def samples(self) -> list[str]:
+        lines: list[str] = []
+        for labels, child in self._items():
+            with child._lock:
+                counts = list(child.counts)
+                count, total = child.count, child.sum
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts, strict=True):
+                cumulative += bucket_count
+                bucket_labels = {**labels, "le": _format_value(bound)}
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+def render() -> str:
+    """Render the default registry."""
+    return REGISTRY.render()
+
+
+# =====================
+# Hot path metrics
+# =====================
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+
+REQUEST_LATENCY = Histogram(
+    "langconnect_request_duration_seconds",
+    "HTTP request latency by route.",
+    ["method", "route", "status"],
+)
+EMBEDDING_LATENCY = Histogram(
+    "langconnect_embedding_duration_seconds",
+    "Time spent computing embeddings.",
+    ["operation"],
+)
+EMBEDDING_BATCH_SIZE = Histogram(
+    "langconnect_embedding_batch_size",
+    "Number of texts per embedding call.",
+    ["operation"],
+    buckets=BATCH_SIZE_BUCKETS,
+)
+VECTOR_QUERY_LATENCY = Histogram(
+    "langconnect_vector_query_duration_seconds",
+    "Time spent in vector similarity queries.",
+)
+KEYWORD_QUERY_LATENCY = Histogram(
+    "langconnect_keyword_query_duration_seconds",
+    "Time spent in full-text search queries.",
+)
+SEARCH_LATENCY = Histogram(
+    "langconnect_search_duration_seconds",
+    "End to end latency of Collection.search.",
+    ["search_type"],
+)
+UPSERT_LATENCY = Histogram(
+    "langconnect_upsert_duration_seconds",
+    "End to end latency of Collection.upsert.",
+)
+UPSERT_CHUNKS = Counter(
+    "langconnect_upserted_chunks",
+    "Number of chunks written by Collection.upsert.",
+)
+DEDUP_DROPPED_CHUNKS = Counter(
+    "langconnect_dedup_dropped_chunks",
+    "Number of near-duplicate chunks dropped at ingest.",
+)
+RERANK_LATENCY = Histogram(
+    "langconnect_rerank_duration_seconds",
+    "Time spent scoring search candidates with the reranker.",
+)
+RERANK_SKIPPED = Counter(
+    "langconnect_rerank_skipped",
+    "Searches returned without reranking, by reason (budget, timeout, error).",
+    ["reason"],
+)
+PARSE_LATENCY = Histogram(
+    "langconnect_parse_duration_seconds",
+    "Time spent parsing uploaded files.",
+    ["mime_type"],
+)
+DB_POOL_ACQUIRE_WAIT = Histogram(
+    "langconnect_db_pool_acquire_seconds",
+    "Time spent waiting to acquire a connection from the pool.",
+    ["pool"],
+)
+DB_POOL_SIZE = Gauge(
+    "langconnect_db_pool_size",
+    "Number of open connections in the pool.",
+    ["pool"],
+)
+DB_POOL_IN_USE = Gauge(
+    "langconnect_db_pool_in_use",
+    "Number of connections currently acquired from the pool.",
+    ["pool"],
+)
+DB_POOL_SATURATION = Gauge(
+    "langconnect_db_pool_saturation",
+    "Ratio of acquired connections to the maximum pool size.",
+    ["pool"],
+)
+CACHE_REQUESTS = Counter(
+    "langconnect_cache_requests",
+    "Cache lookups by cache and result (hit or miss).",
+    ["cache", "result"],
+)
+
+
+def record_cache(cache: str, *, hit: bool) -> None:
+    """Count a cache lookup."""
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def update_pool_gauges(pool: Any, name: str = "primary") -> None:
+    """Refresh the connection pool gauges from an asyncpg pool.
+
+    Args:
+        pool: The asyncpg pool.
+        name: Value of the ``pool`` label, ``primary`` or ``read``.
+    """
+    size = pool.get_size()
+    in_use = size - pool.get_idle_size()
+    max_size = pool.get_max_size()
+    DB_POOL_SIZE.labels(pool=name).set(size)
+    DB_POOL_IN_USE.labels(pool=name).set(in_use)
+    DB_POOL_SATURATION.labels(pool=name).set(in_use / max_size if max_size else 0.0)
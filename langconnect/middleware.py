@@ -0,0 +1,52 @@
+"""ASGI middleware."""
+
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from langconnect import metrics, timing
+
+
+class RequestMetricsMiddleware:
+    """Record the latency of every HTTP request by route template.
+
+    Routes are labeled with their path template (e.g.
+    ``/collections/{collection_id}``) rather than the raw path, to keep the
+    number of label values bounded.
+
+    Every response also carries a ``Server-Timing`` header with the stages
+    recorded through ``langconnect.timing.stage`` while serving the request.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Wrap an ASGI application."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle an ASGI call."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        request_timing = timing.start()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", request_timing.header_value())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            metrics.REQUEST_LATENCY.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status_code,
+            ).observe(time.perf_counter() - start)
@@ -1,4 +1,5 @@
 from langconnect.models.collection import (
+    CollectionClone,
     CollectionCreate,
     CollectionResponse,
     CollectionUpdate,
@@ -7,19 +8,28 @@ from langconnect.models.document import (
     DocumentCreate,
     DocumentResponse,
     DocumentUpdate,
+    SearchDebugResponse,
     SearchQuery,
     SearchResult,
+    SearchStreamQuery,
     DocumentDelete,
+    DocumentRechunk,
 )
+from langconnect.models.job import JobResponse
 
 __all__ = [
+    "CollectionClone",
     "CollectionCreate",
     "CollectionResponse",
     "CollectionUpdate",
     "DocumentCreate",
     "DocumentResponse",
     "DocumentUpdate",
+    "SearchDebugResponse",
     "SearchQuery",
     "SearchResult",
+    "SearchStreamQuery",
     "DocumentDelete",
+    "DocumentRechunk",
+    "JobResponse",
 ]
@@ -1,5 +1,5 @@
 import datetime
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
@@ -15,6 +15,40 @@ class CollectionCreate(BaseModel):
     metadata: dict[str, Any] = Field(
         default_factory=dict, description="Optional metadata for the collection."
     )
+    vector_storage: Literal["vector", "halfvec", "binary"] | None = Field(
+        None,
+        description=(
+            "How embeddings are stored: float32 `vector`, float16 `halfvec`, or "
+            "`binary` (1 bit per dimension, rescored on float16 values). "
+            "Defaults to PGVECTOR_DEFAULT_STORAGE."
+        ),
+    )
+    short_vector: bool = Field(
+        False,
+        description=(
+            "Also store the first PGVECTOR_SHORT_DIMENSION dimensions of each "
+            "embedding, search those and rescore with the full vectors. For "
+            "models trained for shortened embeddings (e.g. text-embedding-3)."
+        ),
+    )
+    embeddings_provider: str | None = Field(
+        None,
+        description=(
+            "Embeddings provider of the collection (`openai`, `local`, `fake`). "
+            "Defaults to the EMBEDDINGS_PROVIDER model shared by all collections."
+        ),
+    )
+    embeddings_model: str | None = Field(
+        None, description="Model of the embeddings provider, its default if empty."
+    )
+    embeddings_dimension: int | None = Field(
+        None,
+        gt=0,
+        description=(
+            "Vector size requested from the model. Models of another dimension "
+            "than the default one only support `vector` storage."
+        ),
+    )
 
 
 class CollectionUpdate(BaseModel):
@@ -26,6 +60,17 @@ class CollectionUpdate(BaseModel):
     )
 
 
+class CollectionClone(BaseModel):
+    """Schema for cloning a collection."""
+
+    name: str | None = Field(
+        None, description="Name of the clone. Defaults to the source's name."
+    )
+    metadata: dict[str, Any] | None = Field(
+        None, description="Metadata merged over the source collection's metadata."
+    )
+
+
 class CollectionResponse(BaseModel):
     """Schema for representing a collection from PGVector."""
 
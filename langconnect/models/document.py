@@ -20,19 +20,114 @@ class DocumentResponse(BaseModel):
     updated_at: str | None = None
 
 
+SearchField = Literal["id", "page_content", "metadata", "score", "snippet"]
+
+
 class SearchQuery(BaseModel):
     query: str
     limit: int | None = 10
     filter: dict[str, Any] | None = None
     search_type: Literal["semantic", "keyword", "hybrid"] = "semantic"
+    debug: bool = Field(
+        False, description="Return a per-stage timing breakdown with the results."
+    )
+    explain: bool = Field(
+        False,
+        description=(
+            "Also return the Postgres EXPLAIN (ANALYZE, BUFFERS) plan of each "
+            "query stage. Implies debug."
+        ),
+    )
+    fields: list[SearchField] | None = Field(
+        None,
+        description=(
+            "Fields to include in each result (default: all but snippet). "
+            "The id is always included."
+        ),
+    )
+    snippet_chars: int | None = Field(
+        None,
+        ge=1,
+        description=(
+            "Add a snippet of about this many characters to each result. For "
+            "keyword matches the matched terms are highlighted with <b>."
+        ),
+    )
+    diversify: bool = Field(
+        False,
+        description=(
+            "Pick results with maximal marginal relevance among more candidates, "
+            "so near-identical chunks don't fill the results."
+        ),
+    )
+    mmr_lambda: float = Field(
+        0.5,
+        ge=0,
+        le=1,
+        description="Relevance vs. diversity when diversifying; 1 is relevance only.",
+    )
+    max_per_file: int | None = Field(
+        None, ge=1, description="Return at most this many chunks of the same file."
+    )
+    rerank: bool = Field(
+        False,
+        description=(
+            "Reorder more candidates with the configured reranker. Skipped when "
+            "it would not finish within the latency budget."
+        ),
+    )
+    rerank_budget_ms: float | None = Field(
+        None,
+        gt=0,
+        description=(
+            "Milliseconds since the start of the request by which reranking "
+            "must be done. Defaults to RERANKER_BUDGET_MS."
+        ),
+    )
+
+
+class SearchStreamQuery(SearchQuery):
+    format: Literal["ndjson", "sse"] = Field(
+        "ndjson",
+        description=(
+            "Newline-delimited JSON, one result per line, or server-sent "
+            "events with a `result` event per result and a final `end` event."
+        ),
+    )
+    max_content_chars: int | None = Field(
+        None, ge=0, description="Truncate page_content to this many characters."
+    )
 
 
 class SearchResult(BaseModel):
     id: str
-    page_content: str
+    page_content: str | None = None
     metadata: dict[str, Any] | None = None
-    score: float
+    snippet: str | None = None
+    score: float | None = None
+
+
+class SearchDebugResponse(BaseModel):
+    results: list[SearchResult]
+    timings: dict[str, float] = Field(
+        ..., description="Duration of each search stage in milliseconds."
+    )
+    plans: dict[str, Any] | None = Field(
+        None, description="Query plan of each stage, when explain was requested."
+    )
 
 class DocumentDelete(BaseModel):
     document_ids: Optional[list[str]] = Field(None, description="List of document IDs to delete.")
     file_ids: Optional[list[str]] = Field(None, description="List of file IDs to delete all associated documents.")
+
+
+class DocumentRechunk(BaseModel):
+    chunk_size: int = Field(
+        ..., gt=0, description="Maximum number of characters in each chunk."
+    )
+    chunk_overlap: int = Field(
+        ..., ge=0, description="Number of overlapping characters between chunks."
+    )
+    file_ids: list[str] | None = Field(
+        None, description="Files to split again (default: all files)."
+    )
@@ -0,0 +1,21 @@
+from typing import Any, Literal
+
+from pydantic import BaseModel, Field
+
+# =====================
+# Job Schemas
+# =====================
+
+
+class JobResponse(BaseModel):
+    """Schema for representing a background job and its progress."""
+
+    id: str = Field(..., description="The unique identifier of the job.")
+    kind: str = Field(..., description="The type of job, e.g. purge_collection.")
+    status: Literal["running", "succeeded", "failed", "cancelled"]
+    progress: dict[str, Any] = Field(
+        default_factory=dict, description="Job specific progress counters."
+    )
+    error: str | None = Field(None, description="The error of a failed job.")
+    created_at: float = Field(..., description="Start time (Unix timestamp).")
+    finished_at: float | None = Field(None, description="End time (Unix timestamp).")
@@ -0,0 +1,319 @@
+"""Reranker registry.
+
+A reranker scores (query, chunk) pairs jointly, which ranks candidates better
+than the similarity of independently computed embeddings. Searches with
+``rerank`` retrieve more candidates and reorder them with the reranker
+selected by the ``RERANKER_PROVIDER`` environment variable:
+
+1. ``cross-encoder``: a sentence-transformers cross-encoder on the local CPU.
+2. ``fake``: word overlap between query and chunk, for tests and benchmarks.
+
+Register additional providers with ``register_reranker_provider``.
+"""
+
+import asyncio
+import functools
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from langconnect import metrics
+
+DEFAULT_MODELS = {
+    "cross-encoder": "cross-encoder/ms-marco-MiniLM-L-6-v2",
+    "fake": "overlap",
+}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class Reranker:
+    """Base class of rerankers: higher scores are more relevant."""
+
+    def score(self, query: str, texts: list[str]) -> list[float]:
+        """Score each text for the query."""
+        raise NotImplementedError
+
+    async def ascore(self, query: str, texts: list[str]) -> list[float]:
+        """Score each text for the query without blocking the event loop."""
+        return await asyncio.to_thread(self.score, query, texts)
+
+
+class OverlapReranker(Reranker):
+    """Fraction of the query words found in the text."""
+
+    def score(self, query: str, texts: list[str]) -> list[float]:
+        """Score each text for the query."""
+        words = set(_TOKEN_RE.findall(query.lower()))
+        if not words:
+            return [0.0] * len(texts)
+        return [
+            len(words.intersection(_TOKEN_RE.findall(text.lower()))) / len(words)
+            for text in texts
+        ]
+
+
+class CrossEncoderReranker(Reranker):
+    """A sentence-transformers cross-encoder running on the local CPU.
+
+    The model is loaded on first use. Pairs are scored in batches, and the
+    async method runs the model in a dedicated thread pool so the event loop
+    stays responsive.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        *,
+        batch_size: int = 32,
+        max_workers: int = 1,
+        device: str = "cpu",
+    ) -> None:
+        """Initialize the cross-encoder reranker.
+
+        Args:
+            model: Name or path of a sentence-transformers cross-encoder.
+            batch_size: Number of pairs scored per forward pass.
+            max_workers: Size of the thread pool used by the async method.
+            device: Device to run the model on.
+        """
+        self.model_name = model
+        self.batch_size = batch_size
+        self.device = device
+        self._model: Any = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="reranker"
+        )
+
+    @property
+    def model(self) -> Any:
+        """Return the underlying model, loading it if needed."""
+        if self._model is None:
+            try:
+                from sentence_transformers import CrossEncoder
+            except ImportError as e:
+                raise ImportError(
+                    "The 'cross-encoder' reranker requires the "
+                    "sentence-transformers package. Install it with "
+                    "`pip install sentence-transformers`."
+                ) from e
+            self._model = CrossEncoder(self.model_name, device=self.device)
+        return self._model
+
+    def score(self, query: str, texts: list[str]) -> list[float]:
+        """Score each text for the query."""
+        if not texts:
+            return []
+        scores = self.model.predict(
+            [(query, text) for text in texts],
+            batch_size=self.batch_size,
+            show_progress_bar=False,
+        )
+        return [float(score) for score in scores]
+
+    async def ascore(self, query: str, texts: list[str]) -> list[float]:
+        """Score each text for the query in the thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.score, query, texts)
+
+
+class CachedReranker(Reranker):
+    """Wrap a reranker with a score cache and a latency estimate.
+
+    Agents repeat queries, and the candidates of a repeated query mostly
+    overlap, so scores are cached per (query, text) pair and only the pairs
+    missing from the cache are scored. The average scoring time per pair is
+    tracked to predict whether reranking fits a latency budget.
+    """
+
+    def __init__(self, reranker: Reranker, *, cache_size: int = 10000) -> None:
+        """Initialize the wrapper.
+
+        Args:
+            reranker: The reranker to wrap.
+            cache_size: Maximum number of cached pair scores. Zero disables
+                the cache.
+        """
+        self.reranker = reranker
+        self.cache_size = cache_size
+        self._cache: OrderedDict[bytes, float] = OrderedDict()
+        self._lock = threading.Lock()
+        # Exponential moving average of the seconds per scored pair.
+        self.seconds_per_pair: float | None = None
+
+    @staticmethod
+    def _key(query: str, text: str) -> bytes:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(query.encode())
+        digest.update(b"\0")
+        digest.update(text.encode())
+        return digest.digest()
+
+    def missing(self, query: str, texts: list[str]) -> int:
+        """Number of texts whose score for the query isn't cached."""
+        with self._lock:
+            return sum(self._key(query, text) not in self._cache for text in texts)
+
+    def estimate_seconds(self, pairs: int) -> float:
+        """Predicted time to score this many uncached pairs."""
+        if not pairs or self.seconds_per_pair is None:
+            return 0.0
+        return pairs * self.seconds_per_pair
+
+    def _lookup(self, keys: list[bytes]) -> list[float | None]:
+        with self._lock:
+            scores = []
+            for key in keys:
+                score = self._cache.get(key)
+                if score is not None:
+                    self._cache.move_to_end(key)
+                scores.append(score)
+        return scores
+
+    def _store(self, keys: list[bytes], scores: list[float]) -> None:
+        if not self.cache_size:
+            return
+        with self._lock:
+            for key, score in zip(keys, scores, strict=True):
+                self._cache[key] = score
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _observe(self, pairs: int, start: float) -> None:
+        elapsed = time.perf_counter() - start
+        metrics.RERANK_LATENCY.observe(elapsed)
+        self._update_estimate(elapsed / pairs)
+
+    def _update_estimate(self, per_pair: float) -> None:
+        if self.seconds_per_pair is None:
+            self.seconds_per_pair = per_pair
+        else:
+            self.seconds_per_pair = 0.8 * self.seconds_per_pair + 0.2 * per_pair
+
+    def _finish(
+        self, keys: list[bytes], start: float, task: "asyncio.Future[list[float]]"
+    ) -> None:
+        """Record the scores of a finished batch, even if nobody awaits them."""
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._observe(len(keys), start)
+        self._store(keys, task.result())
+
+    def _cached(
+        self, query: str, texts: list[str]
+    ) -> tuple[list[bytes], list[float | None], list[int]]:
+        keys = [self._key(query, text) for text in texts]
+        scores = self._lookup(keys)
+        for score in scores:
+            metrics.record_cache("rerank", hit=score is not None)
+        todo = [i for i, score in enumerate(scores) if score is None]
+        return keys, scores, todo
+
+    @staticmethod
+    def _fill(
+        scores: list[float | None], todo: list[int], computed: list[float]
+    ) -> list[float]:
+        for i, score in zip(todo, computed, strict=True):
+            scores[i] = score
+        return scores
+
+    def score(self, query: str, texts: list[str]) -> list[float]:
+        """Score each text for the query."""
+        keys, scores, todo = self._cached(query, texts)
+        if not todo:
+            return scores
+        start = time.perf_counter()
+        computed = self.reranker.score(query, [texts[i] for i in todo])
+        self._observe(len(todo), start)
+        self._store([keys[i] for i in todo], computed)
+        return self._fill(scores, todo, computed)
+
+    async def ascore(self, query: str, texts: list[str]) -> list[float]:
+        """Score each text for the query without blocking the event loop.
+
+        When the caller stops waiting (e.g. a timeout), the scoring thread
+        still runs to the end: its scores are then cached and its duration
+        observed, and the time spent so far already counts in the estimate.
+        """
+        keys, scores, todo = self._cached(query, texts)
+        if not todo:
+            return scores
+        start = time.perf_counter()
+        task = asyncio.ensure_future(
+            self.reranker.ascore(query, [texts[i] for i in todo])
+        )
+        task.add_done_callback(
+            functools.partial(self._finish, [keys[i] for i in todo], start)
+        )
+        try:
+            computed = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done():
+                # The batch takes at least this long
+                self._update_estimate((time.perf_counter() - start) / len(todo))
+            raise
+        return self._fill(scores, todo, computed)
+
+
+RerankerFactory = Callable[[str], Reranker]
+
+
+def _cross_encoder_factory(model: str) -> Reranker:
+    from langconnect import config
+
+    return CrossEncoderReranker(
+        model,
+        batch_size=config.RERANKER_BATCH_SIZE,
+        max_workers=config.RERANKER_MAX_WORKERS,
+    )
+
+
+def _fake_factory(model: str) -> Reranker:
+    return OverlapReranker()
+
+
+_PROVIDERS: dict[str, RerankerFactory] = {
+    "cross-encoder": _cross_encoder_factory,
+    "fake": _fake_factory,
+}
+
+
+def register_reranker_provider(name: str, factory: RerankerFactory) -> None:
+    """Register a reranker provider.
+
+    Args:
+        name: Value of ``RERANKER_PROVIDER`` that selects this provider.
+        factory: Callable taking the model name and returning a ``Reranker``.
+    """
+    _PROVIDERS[name] = factory
+
+
+def available_providers() -> list[str]:
+    """Return the names of all registered providers."""
+    return sorted(_PROVIDERS)
+
+
+def create_reranker(provider: str, model: str = "") -> Reranker:
+    """Create a reranker from the registry.
+
+    Args:
+        provider: Registered provider name.
+        model: Model name. Uses the provider default when empty.
+
+    Raises:
+        ValueError: If the provider is not registered.
+    """
+    try:
+        factory = _PROVIDERS[provider]
+    except KeyError:
+        raise ValueError(
+            f"Unknown reranker provider {provider!r}. "
+            f"Available providers: {', '.join(available_providers())}."
+        )
+    return factory(model or DEFAULT_MODELS.get(provider, ""))
@@ -0,0 +1,66 @@
+"""JSON encoding for responses and database codecs.
+
+Uses orjson, which serializes large search and list responses several times
+faster than the standard library, and falls back to the standard library
+when it is missing.
+"""
+
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse as _JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+if orjson is not None:
+
+    def dumps(obj: Any) -> bytes:
+        """Serialize an object to JSON bytes."""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def dumps_str(obj: Any) -> str:
+        """Serialize an object to a JSON string."""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(data: str | bytes) -> Any:
+        """Deserialize JSON text or bytes."""
+        return orjson.loads(data)
+
+else:
+
+    def dumps(obj: Any) -> bytes:
+        """Serialize an object to JSON bytes."""
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+    def dumps_str(obj: Any) -> str:
+        """Serialize an object to a JSON string."""
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+    def loads(data: str | bytes) -> Any:
+        """Deserialize JSON text or bytes."""
+        return json.loads(data)
+
+
+# jsonb values in the binary protocol are the JSON text prefixed by a version.
+_JSONB_VERSION = b"\x01"
+
+
+def encode_jsonb(obj: Any) -> bytes:
+    """Encode a value for a jsonb column (binary format)."""
+    return _JSONB_VERSION + dumps(obj)
+
+
+def decode_jsonb(data: bytes) -> Any:
+    """Decode a jsonb column value (binary format)."""
+    return loads(data[1:])
+
+
+class JSONResponse(_JSONResponse):
+    """JSON response rendered with orjson when available."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
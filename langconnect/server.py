@@ -1,13 +1,28 @@
+import asyncio
 import logging
+import time
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-
-from langconnect.api import auth_router, collections_router, documents_router
+from fastapi.responses import JSONResponse, Response
+
+from langconnect import config, jobs, metrics, serialization
+from langconnect.api import (
+    auth_router,
+    collections_router,
+    documents_router,
+    jobs_router,
+)
 from langconnect.config import ALLOWED_ORIGINS
 from langconnect.database.collections import CollectionsManager
+from langconnect.database.connection import (
+    close_db_pool,
+    get_db_connection,
+    get_db_pool,
+)
+from langconnect.middleware import RequestMetricsMiddleware
 
 # Configure logging
 logging.basicConfig(
@@ -21,13 +36,38 @@ logger = logging.getLogger(__name__)
 # Initialize FastAPI app
 
 
+async def warm_up() -> None:
+    """Open the pool, prepare hot statements and warm the embeddings client.
+
+    Run before the app reports ready, so that the first requests routed to
+    this worker are as fast as steady state ones.
+    """
+    start = time.perf_counter()
+    await get_db_pool()
+    await CollectionsManager.warm_up()
+    if config.WARMUP_EMBEDDINGS:
+        try:
+            await config.get_default_embeddings().aembed_query("warm up")
+        except Exception as e:
+            # Keyword search and listing still work without embeddings.
+            logger.warning(f"Embeddings warm-up failed: {e}")
+    logger.info(f"Warm-up completed in {time.perf_counter() - start:.2f}s.")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Lifespan context manager for FastAPI application."""
     logger.info("App is starting up. Creating background worker...")
+    app.state.ready = False
     await CollectionsManager.setup()
+    await warm_up()
+    await CollectionsManager.resume_purges()
+    app.state.ready = True
     yield
     logger.info("App is shutting down. Stopping background worker...")
+    app.state.ready = False
+    await jobs.shutdown()
+    await close_db_pool()
 
 
 APP = FastAPI(
@@ -35,6 +75,7 @@ APP = FastAPI(
     description="A REST API for a RAG system using FastAPI and LangChain",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=serialization.JSONResponse,
 )
 
 # Add CORS middleware
@@ -44,12 +85,17 @@ APP.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Record request latency per route
+APP.add_middleware(RequestMetricsMiddleware)
+
 # Include API routers
 APP.include_router(auth_router)
 APP.include_router(collections_router)
 APP.include_router(documents_router)
+APP.include_router(jobs_router)
 
 
 @APP.get("/health")
@@ -58,6 +104,36 @@ async def health_check() -> dict:
     return {"status": "ok"}
 
 
+async def _ping_database() -> None:
+    async with get_db_connection() as conn:
+        await conn.fetchval("SELECT 1")
+
+
+@APP.get("/ready")
+async def readiness_check(request: Request) -> JSONResponse:
+    """Readiness endpoint for load balancers.
+
+    Unlike /health, it reports 503 until the startup warm-up has finished and
+    whenever the database cannot be reached.
+    """
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse({"status": "starting"}, status_code=503)
+    try:
+        # A saturated pool would hold the probe past the load balancer's own
+        # timeout: waiting for a connection is part of the budget.
+        await asyncio.wait_for(_ping_database(), timeout=config.READY_DB_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Readiness check failed: {e}")
+        return JSONResponse({"status": "unavailable"}, status_code=503)
+    return JSONResponse({"status": "ready"})
+
+
+@APP.get("/metrics", include_in_schema=False)
+async def metrics_endpoint() -> Response:
+    """Prometheus metrics endpoint."""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
 
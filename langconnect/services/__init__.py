@@ -1,6 +1,21 @@
 from langconnect.services.document_processor import (
     SUPPORTED_MIMETYPES,
+    compress_parsed,
+    content_hash,
+    decompress_parsed,
+    metadata_hash,
     process_document,
+    source_file_id,
+    split_documents,
 )
 
-__all__ = ["SUPPORTED_MIMETYPES", "process_document"]
+__all__ = [
+    "SUPPORTED_MIMETYPES",
+    "compress_parsed",
+    "content_hash",
+    "decompress_parsed",
+    "metadata_hash",
+    "process_document",
+    "source_file_id",
+    "split_documents",
+]
@@ -0,0 +1,110 @@
+"""Near-duplicate chunk detection with MinHash and locality sensitive hashing.
+
+Each chunk gets a MinHash signature of its word shingles: the fraction of
+equal signature values of two chunks estimates the Jaccard similarity of
+their shingle sets. Signatures are split into bands, and chunks sharing a
+band key are candidate duplicates, whose similarity is then estimated from the
+full signatures. Band keys are stored per chunk (see ``Collection``), so new
+chunks are also compared with the chunks already in the collection.
+"""
+
+import hashlib
+import re
+
+import numpy as np
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+
+# Universal hash functions h(x) = (a * x + b) mod p over 32-bit shingle hashes.
+# With a, b, x < 2**32, a * x + b fits in 64 bits.
+_PRIME = np.uint64(4294967311)
+_rng = np.random.default_rng(20240517)
+_A = _rng.integers(1, 2**32, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 2**32, size=NUM_PERM, dtype=np.uint64)
+
+_WORD = re.compile(r"\w+")
+
+
+def _shingle_hashes(text: str) -> np.ndarray:
+    words = _WORD.findall(text.lower())
+    if len(words) <= SHINGLE_WORDS:
+        shingles = {" ".join(words)} if words else set()
+    else:
+        shingles = {
+            " ".join(words[i : i + SHINGLE_WORDS])
+            for i in range(len(words) - SHINGLE_WORDS + 1)
+        }
+    return np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest())
+            for s in shingles
+        ),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+
+
+def minhash(text: str) -> np.ndarray | None:
+    """MinHash signature (``NUM_PERM`` uint32 values) of a text.
+
+    Returns:
+        The signature, or None for a text without words.
+    """
+    hashes = _shingle_hashes(text)
+    if not hashes.size:
+        return None
+    permuted = (_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray) -> list[int]:
+    """LSH band keys of a signature, as signed 64-bit integers."""
+    return [
+        int.from_bytes(
+            hashlib.blake2b(
+                bytes([band]) + band_values.tobytes(), digest_size=8
+            ).digest(),
+            signed=True,
+        )
+        for band, band_values in enumerate(signature.reshape(BANDS, ROWS_PER_BAND))
+    ]
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the texts of two signatures."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+class NearDuplicateIndex:
+    """In-memory LSH index of signatures.
+
+    Args:
+        threshold: Estimated Jaccard similarity from which two texts are
+            near-duplicates.
+    """
+
+    def __init__(self, threshold: float) -> None:
+        self.threshold = threshold
+        self._buckets: dict[int, list[str]] = {}
+        self._signatures: dict[str, np.ndarray] = {}
+
+    def add(self, key: str, signature: np.ndarray) -> None:
+        """Add a signature under a key (e.g. a chunk id)."""
+        self._signatures[key] = signature
+        for band_key in band_keys(signature):
+            self._buckets.setdefault(band_key, []).append(key)
+
+    def find(self, signature: np.ndarray) -> str | None:
+        """Key of a near-duplicate of the signature, if any."""
+        seen = set()
+        for band_key in band_keys(signature):
+            for key in self._buckets.get(band_key, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                if similarity(signature, self._signatures[key]) >= self.threshold:
+                    return key
+        return None
@@ -0,0 +1,74 @@
+"""Result diversification with maximal marginal relevance (MMR).
+
+MMR picks results one at a time, scoring each candidate by its relevance
+minus its highest cosine similarity to the results already picked::
+
+    lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+
+All pairwise similarities of the candidates are computed at once with NumPy,
+so picking k results out of n candidates costs one n x n matrix product and
+k vector updates.
+"""
+
+from collections.abc import Hashable, Sequence
+
+import numpy as np
+
+
+def select(
+    relevance: Sequence[float],
+    k: int,
+    *,
+    embeddings: Sequence[Sequence[float]] | np.ndarray | None = None,
+    lambda_mult: float = 0.5,
+    groups: Sequence[Hashable] | None = None,
+    max_per_group: int | None = None,
+) -> list[int]:
+    """Pick up to k candidates, trading relevance for diversity.
+
+    Args:
+        relevance: Relevance of each candidate, higher is better.
+        k: Number of candidates to pick.
+        embeddings: Embedding of each candidate. Without them, candidates are
+            picked by relevance only.
+        lambda_mult: Weight of relevance vs. diversity, 1 is relevance only.
+        groups: Group of each candidate (e.g. its file id).
+        max_per_group: Pick at most this many candidates of a group.
+
+    Returns:
+        Indexes of the picked candidates, in pick order.
+    """
+    n = len(relevance)
+    scores = np.asarray(relevance, dtype=np.float64)
+    if embeddings is not None and n and lambda_mult < 1:
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        similarities = vectors @ vectors.T
+    else:
+        similarities = None
+        lambda_mult = 1.0
+
+    available = np.ones(n, dtype=bool)
+    max_similarity = np.zeros(n, dtype=np.float64)
+    group_counts: dict[Hashable, int] = {}
+    picked: list[int] = []
+    while len(picked) < k and available.any():
+        mmr = lambda_mult * scores - (1 - lambda_mult) * max_similarity
+        mmr[~available] = -np.inf
+        index = int(np.argmax(mmr))
+        available[index] = False
+        if groups is not None and max_per_group is not None:
+            group = groups[index]
+            group_counts[group] = group_counts.get(group, 0) + 1
+            if group_counts[group] >= max_per_group:
+                available &= np.fromiter(
+                    (g != group for g in groups), dtype=bool, count=n
+                )
+        if similarities is not None:
+            if picked:
+                np.maximum(max_similarity, similarities[index], out=max_similarity)
+            else:
+                max_similarity = similarities[index].astype(np.float64)
+        picked.append(index)
+    return picked
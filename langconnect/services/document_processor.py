@@ -1,38 +1,118 @@
+import functools
+import hashlib
+import json
 import logging
 import uuid
+import zlib
+from collections.abc import Callable
 
 from fastapi import UploadFile
-from langchain_community.document_loaders.parsers import (
-    BS4HTMLParser,
-    PDFPlumberParser,
-)
-from langchain_community.document_loaders.parsers.generic import MimeTypeBasedParser
-from langchain_community.document_loaders.parsers.msword import MsWordParser
-from langchain_community.document_loaders.parsers.txt import TextParser
+from langchain_core.document_loaders import BaseBlobParser
 from langchain_core.documents.base import Blob, Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from langconnect import metrics, serialization
 
 LOGGER = logging.getLogger(__name__)
 
+
+# Parsers pull in heavy dependencies (pdfplumber, BeautifulSoup, unstructured),
+# so they are imported and constructed on first use of their mime type.
+def _pdf_parser() -> BaseBlobParser:
+    from langchain_community.document_loaders.parsers import PDFPlumberParser
+
+    return PDFPlumberParser()
+
+
+def _text_parser() -> BaseBlobParser:
+    from langchain_community.document_loaders.parsers.txt import TextParser
+
+    return TextParser()
+
+
+def _html_parser() -> BaseBlobParser:
+    from langchain_community.document_loaders.parsers import BS4HTMLParser
+
+    return BS4HTMLParser()
+
+
+def _msword_parser() -> BaseBlobParser:
+    from langchain_community.document_loaders.parsers.msword import MsWordParser
+
+    return MsWordParser()
+
+
 # Document Parser Configuration
-HANDLERS = {
-    "application/pdf": PDFPlumberParser(),
-    "text/plain": TextParser(),
-    "text/html": BS4HTMLParser(),
-    "text/markdown": TextParser(),  # Markdown files
-    "text/x-markdown": TextParser(),  # Alternative markdown MIME type
-    "application/msword": MsWordParser(),
+HANDLERS: dict[str, Callable[[], BaseBlobParser]] = {
+    "application/pdf": _pdf_parser,
+    "text/plain": _text_parser,
+    "text/html": _html_parser,
+    "text/markdown": _text_parser,  # Markdown files
+    "text/x-markdown": _text_parser,  # Alternative markdown MIME type
+    "application/msword": _msword_parser,
     "application/vnd.openxmlformats-officedocument.wordprocessingml.document": (
-        MsWordParser()
+        _msword_parser
     ),
 }
 
 SUPPORTED_MIMETYPES = sorted(HANDLERS.keys())
 
-MIMETYPE_BASED_PARSER = MimeTypeBasedParser(
-    handlers=HANDLERS,
-    fallback_parser=None,
-)
+# Namespace of the file ids derived from a stable source identifier.
+SOURCE_NAMESPACE = uuid.UUID("5c3b2f0e-8f6a-4d7e-9b1a-6e2d4c8f0a13")
+
+
+def content_hash(data: bytes | str) -> str:
+    """SHA-256 hex digest of file contents or chunk text."""
+    if isinstance(data, str):
+        data = data.encode()
+    return hashlib.sha256(data).hexdigest()
+
+
+def metadata_hash(metadata: dict | None) -> str:
+    """SHA-256 hex digest of the metadata given with an upload."""
+    return content_hash(json.dumps(metadata or {}, sort_keys=True, default=str))
+
+
+def source_file_id(source_id: str) -> str:
+    """Stable file id for a source identifier (path, URL, external id...).
+
+    Re-uploads of the same source get the same file id, so their chunks can be
+    diffed against the previous version (see `Collection.sync_file`).
+    """
+    return str(uuid.uuid5(SOURCE_NAMESPACE, source_id))
+
+
+@functools.cache
+def get_parser(mime_type: str) -> BaseBlobParser:
+    """Get the parser for a mime type, constructing it on first use.
+
+    Raises:
+        ValueError: If the mime type is not supported.
+    """
+    try:
+        factory = HANDLERS[mime_type]
+    except KeyError:
+        raise ValueError(f"Unsupported mime type: {mime_type}")
+    return factory()
+
+
+def compress_parsed(docs: list[Document]) -> bytes:
+    """Serialize parsed documents to compressed JSON, to store them."""
+    return zlib.compress(
+        serialization.dumps(
+            [
+                {"page_content": doc.page_content, "metadata": doc.metadata}
+                for doc in docs
+            ]
+        )
+    )
+
+
+def decompress_parsed(data: bytes) -> list[Document]:
+    """Parsed documents stored by `compress_parsed`."""
+    return [
+        Document(page_content=doc["page_content"], metadata=doc["metadata"])
+        for doc in serialization.loads(zlib.decompress(data))
+    ]
 
 
 async def process_document(
@@ -40,12 +120,33 @@ async def process_document(
     metadata: dict | None = None,
     chunk_size: int = 1000,
     chunk_overlap: int = 200,
+    file_id: str | None = None,
+    parsed: list[Document] | None = None,
 ) -> list[Document]:
-    """Process an uploaded file into LangChain documents."""
+    """Process an uploaded file into LangChain documents.
+
+    Every chunk's metadata gets the ``file_id``, the ``file_hash`` of the
+    uploaded contents, the ``metadata_hash`` of the given metadata, the
+    ``chunk_hash`` of its text and the splitter parameters, which are what
+    incremental re-ingestion compares.
+
+    Args:
+        file: The uploaded file.
+        metadata: Metadata added to every chunk.
+        chunk_size: Maximum number of characters in each chunk.
+        chunk_overlap: Number of overlapping characters between chunks.
+        file_id: Id of the file, e.g. from `source_file_id`. A new random id
+            by default.
+        parsed: If given, the parsed documents (with the metadata, before
+            splitting) are appended to it, so they can be stored and split
+            again with other parameters (see `split_documents`).
+    """
     # Generate a unique ID for this file processing instance
-    file_id = uuid.uuid4()
+    if file_id is None:
+        file_id = uuid.uuid4()
 
     contents = await file.read()
+    file_hash = content_hash(contents)
 
     # Determine the actual mime type
     mime_type = file.content_type or "text/plain"
@@ -68,16 +169,50 @@ async def process_document(
 
     blob = Blob(data=contents, mimetype=mime_type)
 
-    docs = MIMETYPE_BASED_PARSER.parse(blob)
+    parser = get_parser(mime_type)
+    with metrics.PARSE_LATENCY.labels(mime_type=mime_type).time():
+        docs = parser.parse(blob)
 
     # Add provided metadata to each document
-    if metadata:
-        for doc in docs:
-            # Ensure metadata attribute exists and is a dict
-            if not hasattr(doc, "metadata") or not isinstance(doc.metadata, dict):
-                doc.metadata = {}
-            # Update with provided metadata, preserving existing keys if not overridden
-            doc.metadata.update(metadata)
+    user_metadata_hash = metadata_hash(metadata)
+    for doc in docs:
+        # Ensure metadata attribute exists and is a dict
+        if not hasattr(doc, "metadata") or not isinstance(doc.metadata, dict):
+            doc.metadata = {}
+        # Update with provided metadata, preserving existing keys if not overridden
+        doc.metadata.update(metadata or {})
+        # Kept in the parsed documents, so chunks split again keep it too
+        doc.metadata["metadata_hash"] = user_metadata_hash
+    if parsed is not None:
+        parsed.extend(docs)
+
+    return split_documents(
+        docs,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        file_id=str(file_id),
+        file_hash=file_hash,
+    )
+
+
+def split_documents(
+    docs: list[Document],
+    *,
+    chunk_size: int,
+    chunk_overlap: int,
+    file_id: str,
+    file_hash: str,
+) -> list[Document]:
+    """Split the parsed documents of a file into chunks.
+
+    Args:
+        docs: The parsed documents of the file.
+        chunk_size: Maximum number of characters in each chunk.
+        chunk_overlap: Number of overlapping characters between chunks.
+        file_id: Id of the file.
+        file_hash: Hash of the uploaded contents of the file.
+    """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
 
     # Create text splitter with provided parameters
     text_splitter = RecursiveCharacterTextSplitter(
@@ -96,5 +231,9 @@ async def process_document(
         split_doc.metadata["file_id"] = str(
             file_id
         )  # Store as string for compatibility
+        split_doc.metadata["file_hash"] = file_hash
+        split_doc.metadata["chunk_hash"] = content_hash(split_doc.page_content)
+        split_doc.metadata["chunk_size"] = chunk_size
+        split_doc.metadata["chunk_overlap"] = chunk_overlap
 
     return split_docs
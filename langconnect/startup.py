@@ -0,0 +1,107 @@
+"""Startup time report based on ``python -X importtime``.
+
+The server module is imported in a fresh interpreter so the measurement
+reflects a cold start, then the per-module timings are aggregated by
+top-level package.
+"""
+
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, field
+
+DEFAULT_MODULE = "langconnect.server"
+
+
+@dataclass
+class ImportTiming:
+    """Import time of a single module in microseconds."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class ImportTimeReport:
+    """Aggregated import timings for a module."""
+
+    module: str
+    timings: list[ImportTiming] = field(default_factory=list)
+
+    @property
+    def total_us(self) -> int:
+        """Total time to import the module, including its dependencies."""
+        for timing in self.timings:
+            if timing.module == self.module:
+                return timing.cumulative_us
+        return sum(t.self_us for t in self.timings)
+
+    def by_package(self) -> dict[str, int]:
+        """Self time summed per top-level package, slowest first."""
+        totals: dict[str, int] = {}
+        for timing in self.timings:
+            package = timing.module.split(".", 1)[0]
+            totals[package] = totals.get(package, 0) + timing.self_us
+        return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+    def slowest(self, top: int = 20) -> list[ImportTiming]:
+        """Modules with the largest self time."""
+        return sorted(self.timings, key=lambda t: t.self_us, reverse=True)[:top]
+
+    def format(self, top: int = 20) -> str:
+        """Render the report as plain text tables."""
+        lines = [f"Import time of {self.module}: {self.total_us / 1000:.1f} ms", ""]
+        lines.append(f"{'package':<40} {'self ms':>10}")
+        for package, self_us in list(self.by_package().items())[:top]:
+            lines.append(f"{package:<40} {self_us / 1000:>10.1f}")
+        lines.append("")
+        lines.append(f"{'module':<60} {'self ms':>10} {'cumul ms':>10}")
+        for timing in self.slowest(top):
+            lines.append(
+                f"{timing.module:<60} {timing.self_us / 1000:>10.1f} "
+                f"{timing.cumulative_us / 1000:>10.1f}"
+            )
+        return "\n".join(lines)
+
+
+def parse_importtime(output: str) -> list[ImportTiming]:
+    """Parse the stderr output of ``python -X importtime``.
+
+    Lines look like ``import time:       123 |        456 |   package.module``,
+    where the indentation of the module name encodes the nesting depth.
+    """
+    timings: list[ImportTiming] = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3:
+            continue
+        self_part, cumulative_part, name_part = parts
+        try:
+            self_us = int(self_part.strip())
+            cumulative_us = int(cumulative_part.strip())
+        except ValueError:
+            # Header line: "self [us] | cumulative | imported package"
+            continue
+        name = name_part.rstrip()
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        timings.append(ImportTiming(stripped, self_us, cumulative_us, depth))
+    return timings
+
+
+def measure_import_time(module: str = DEFAULT_MODULE) -> ImportTimeReport:
+    """Import a module in a fresh interpreter and collect its import timings."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=os.environ.copy(),
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Failed to import {module}:\n{result.stderr}")
+    return ImportTimeReport(module=module, timings=parse_importtime(result.stderr))
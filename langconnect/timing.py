@@ -0,0 +1,95 @@
+"""Per-request stage timings, reported in the ``Server-Timing`` header.
+
+``RequestMetricsMiddleware`` starts a ``RequestTiming`` for every HTTP request.
+Code on the request path wraps its stages in ``stage(...)``, which records the
+duration in the current request timing (if any) and optionally in a metrics
+histogram.
+"""
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from langconnect.metrics import Histogram
+
+
+class RequestTiming:
+    """Stage durations and query plans collected while serving a request."""
+
+    def __init__(self) -> None:
+        """Start timing a request."""
+        self.start = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        self.plans: dict[str, Any] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        """Add a stage duration. Repeated stages are summed."""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds * 1000
+
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the request started."""
+        return (time.perf_counter() - self.start) * 1000
+
+    def as_dict(self) -> dict[str, float]:
+        """Stage durations in milliseconds, including the total so far."""
+        timings = {name: round(ms, 3) for name, ms in self.stages.items()}
+        timings["total"] = round(self.elapsed_ms(), 3)
+        return timings
+
+    def header_value(self) -> str:
+        """Format the stages as a ``Server-Timing`` header value."""
+        return ", ".join(
+            f"{name};dur={ms:.1f}" for name, ms in self.as_dict().items()
+        )
+
+
+_current: ContextVar[RequestTiming | None] = ContextVar(
+    "langconnect_request_timing", default=None
+)
+
+
+def current() -> RequestTiming | None:
+    """Return the timing of the request being served, if any."""
+    return _current.get()
+
+
+def start() -> RequestTiming:
+    """Start timing a request in the current context."""
+    timing = RequestTiming()
+    _current.set(timing)
+    return timing
+
+
+def current_or_start() -> RequestTiming:
+    """Return the current request timing, starting one if needed."""
+    return current() or start()
+
+
+@contextmanager
+def stage(name: str, histogram: Histogram | None = None) -> Iterator[None]:
+    """Time a stage of the current request.
+
+    Args:
+        name: Stage name used in the ``Server-Timing`` header.
+        histogram: Optional histogram, or labeled histogram child, to observe
+            the duration in.
+    """
+    begin = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - begin
+        if histogram is not None:
+            histogram.observe(elapsed)
+        timing = _current.get()
+        if timing is not None:
+            timing.add(name, elapsed)
+
+
+def add_plan(name: str, plan: Any) -> None:
+    """Attach a query plan to the current request timing."""
+    timing = _current.get()
+    if timing is not None:
+        timing.plans[name] = plan
@@ -129,6 +129,8 @@ async def search_documents(
     limit: int = 5,
     search_type: str = "semantic",
     filter_json: Optional[str] = None,
+    diversify: bool = False,
+    max_per_file: Optional[int] = None,
 ) -> str:
     """Search documents in a collection using semantic, keyword, or hybrid search.
 
@@ -150,8 +152,15 @@ async def search_documents(
         filter_json: Optional JSON string containing metadata filters to narrow down the search scope.
                     Example: '{"source": "sample.pdf", "category": "technical"}'
                     This helps focus the search on specific document types or sources.
+        diversify: Prefer results that add new information over near-identical chunks
+                  (maximal marginal relevance). Useful when results repeat each other.
+        max_per_file: Return at most this many chunks from the same file.
     """
     search_data = {"query": query, "limit": limit, "search_type": search_type}
+    if diversify:
+        search_data["diversify"] = True
+    if max_per_file:
+        search_data["max_per_file"] = max_per_file
 
     if filter_json:
         try:
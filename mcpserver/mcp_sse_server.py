@@ -220,9 +220,15 @@ async def search_documents(
     limit: int = 5,
     search_type: str = "semantic",
     filter_json: Optional[str] = None,
+    diversify: bool = False,
+    max_per_file: Optional[int] = None,
 ) -> str:
     """Search documents in a collection using semantic, keyword, or hybrid search."""
     search_data = {"query": query, "limit": limit, "search_type": search_type}
+    if diversify:
+        search_data["diversify"] = True
+    if max_per_file:
+        search_data["max_per_file"] = max_per_file
 
     if filter_json:
         try:
@@ -0,0 +1,110 @@
+"""Tests for the benchmark helpers."""
+
+import math
+
+from benchmarks.compare import compare
+from benchmarks.corpus import SyntheticCorpus
+from benchmarks.evaluate import parse_args
+from benchmarks.load import Recorder, histogram_totals, parse_mix
+from benchmarks.stats import ndcg_at_k, percentile, recall_at_k, summarize
+
+
+def test_corpus_is_reproducible() -> None:
+    """Test that the same seed yields the same documents and queries."""
+    first = SyntheticCorpus(seed=7)
+    second = SyntheticCorpus(seed=7)
+
+    assert [d.text for d in first.documents(5)] == [
+        d.text for d in second.documents(5)
+    ]
+    assert first.queries(5) == second.queries(5)
+    assert first.queries(5) != SyntheticCorpus(seed=8).queries(5)
+
+
+def test_corpus_document_size() -> None:
+    """Test that documents have the requested number of words."""
+    corpus = SyntheticCorpus(seed=1)
+    document = corpus.documents(1, words_per_document=100)[0]
+
+    assert len(document.text.split()) == 100
+    assert document.filename == "doc_000000.txt"
+
+
+def test_percentile_and_summary() -> None:
+    """Test latency statistics."""
+    values = [0.001 * i for i in range(1, 101)]
+
+    assert math.isclose(percentile(values, 50), 0.0505)
+    assert math.isclose(percentile(values, 100), 0.1)
+    assert math.isnan(percentile([], 50))
+
+    summary = summarize(values, wall_time=2.0)
+    assert summary["count"] == 100
+    assert summary["qps"] == 50.0
+    assert summary["p99_ms"] == 99.01
+
+
+def test_compare_results() -> None:
+    """Test the relative change between two result files."""
+    base = {"meta": {"commit": "a"}, "search": {"semantic": {"p50_ms": 10.0}}}
+    new = {"meta": {"commit": "b"}, "search": {"semantic": {"p50_ms": 12.0}}}
+
+    assert compare(base, new) == [("search.semantic.p50_ms", 10.0, 12.0, 20.0)]
+
+
+def test_recall_and_ndcg() -> None:
+    """Test the retrieval quality metrics against exact results."""
+    relevant = ["a", "b", "c", "d"]
+
+    assert recall_at_k(["a", "b", "c", "d"], relevant, 4) == 1.0
+    assert recall_at_k(["a", "x", "c", "y"], relevant, 4) == 0.5
+    assert ndcg_at_k(["a", "b", "c", "d"], relevant, 4) == 1.0
+    # The same hits ranked lower score less.
+    assert ndcg_at_k(["x", "a", "b", "c"], relevant, 4) < ndcg_at_k(
+        ["a", "b", "c", "x"], relevant, 4
+    )
+    assert math.isnan(recall_at_k(["a"], [], 4))
+
+
+def test_load_helpers() -> None:
+    """Test mix parsing and pool wait scraping of the load test."""
+    assert parse_mix("search=0.6,list=0.4") == {"search": 0.6, "list": 0.4}
+    assert parse_mix("search_documents") == {"search_documents": 1.0}
+
+    exposition = "\n".join(
+        [
+            "# TYPE langconnect_db_pool_acquire_seconds histogram",
+            'langconnect_db_pool_acquire_seconds_bucket{le="0.1"} 3',
+            "langconnect_db_pool_acquire_seconds_sum 0.25",
+            "langconnect_db_pool_acquire_seconds_count 4",
+        ]
+    )
+    assert histogram_totals(exposition, "langconnect_db_pool_acquire_seconds") == (
+        0.25,
+        4.0,
+    )
+
+
+async def test_load_recorder() -> None:
+    """Test that the recorder counts errors separately from latencies."""
+    recorder = Recorder()
+
+    async def ok() -> str:
+        return "ok"
+
+    async def fail() -> None:
+        raise RuntimeError("boom")
+
+    assert await recorder.measure("search", ok()) == "ok"
+    assert await recorder.measure("search", fail()) is None
+
+    report = recorder.report(wall_time=1.0)
+    assert report["operations"]["search"]["count"] == 1
+    assert report["operations"]["search"]["errors"] == 1
+    assert report["overall"]["error_rate"] == 0.5
+
+
+def test_evaluate_keeps_indexes_by_default() -> None:
+    """Test that the shared indexes are only rebuilt on request."""
+    assert not parse_args([]).rebuild_indexes
+    assert parse_args(["--rebuild-indexes"]).rebuild_indexes
@@ -1,3 +1,4 @@
+import asyncio
 from uuid import UUID
 
 from tests.unit_tests.fixtures import get_async_test_client
@@ -152,6 +153,12 @@ async def test_delete_collection_and_nonexistent() -> None:
             f"/collections/{collection_id}", headers=USER_1_HEADERS
         )
         assert r2.status_code == 204
+        # The chunks are purged by a background job
+        job_url = r2.headers["location"]
+        assert job_url.startswith("/jobs/")
+        job = await client.get(job_url, headers=USER_1_HEADERS)
+        assert job.status_code == 200
+        assert job.json()["kind"] == "purge_collection"
 
         # Try to get it again by ID
         r3 = await client.get(f"/collections/{collection_id}", headers=USER_1_HEADERS)
@@ -296,6 +303,29 @@ async def test_update_nonexistent_collection() -> None:
         assert r.status_code == 404
 
 
+async def test_metadata_cannot_mark_collection_deleted() -> None:
+    """A deleted_at key in caller metadata is ignored."""
+    async with get_async_test_client() as client:
+        r = await client.post(
+            "/collections",
+            json={"name": "kept", "metadata": {"deleted_at": "2024-01-01"}},
+            headers=USER_1_HEADERS,
+        )
+        assert r.status_code == 201
+        collection_id = r.json()["uuid"]
+        assert "deleted_at" not in r.json()["metadata"]
+
+        r = await client.patch(
+            f"/collections/{collection_id}",
+            json={"metadata": {"deleted_at": "2024-01-01"}},
+            headers=USER_1_HEADERS,
+        )
+        assert r.status_code == 200
+        assert "deleted_at" not in r.json()["metadata"]
+
+        r = await client.get(f"/collections/{collection_id}", headers=USER_1_HEADERS)
+        assert r.status_code == 200
+
 async def test_list_empty_and_multiple_collections() -> None:
     """Listing when empty and after multiple creates."""
     async with get_async_test_client() as client:
@@ -368,3 +398,117 @@ async def test_ownership() -> None:
             f"/collections/{collection_id}", headers=USER_1_HEADERS
         )
         assert r5.status_code == 204
+
+
+async def test_clone_collection() -> None:
+    """Test that a clone gets the source's chunks through a background job."""
+    async with get_async_test_client() as client:
+        r = await client.post(
+            "/collections",
+            json={"name": "source", "metadata": {"team": "docs", "stage": "prod"}},
+            headers=USER_1_HEADERS,
+        )
+        assert r.status_code == 201
+        source_id = r.json()["uuid"]
+        files = [
+            ("files", ("a.txt", b"Cloned document one.", "text/plain")),
+            ("files", ("b.txt", b"Cloned document two.", "text/plain")),
+        ]
+        r = await client.post(
+            f"/collections/{source_id}/documents",
+            files=files,
+            headers=USER_1_HEADERS,
+        )
+        assert r.status_code == 200
+
+        r = await client.post(
+            f"/collections/{source_id}/clone",
+            json={"name": "experiment", "metadata": {"stage": "test"}},
+            headers=USER_1_HEADERS,
+        )
+        assert r.status_code == 202
+        clone = r.json()
+        assert clone["name"] == "experiment"
+        assert clone["metadata"]["team"] == "docs"
+        assert clone["metadata"]["stage"] == "test"
+
+        job_url = r.headers["location"]
+        for _ in range(100):
+            job = (await client.get(job_url, headers=USER_1_HEADERS)).json()
+            if job["status"] != "running":
+                break
+            await asyncio.sleep(0.05)
+        assert job["kind"] == "clone_collection"
+        assert job["status"] == "succeeded"
+        assert job["progress"]["copied_chunks"] == 2
+
+        collections = (await client.get("/collections", headers=USER_1_HEADERS)).json()
+        counts = {c["name"]: c["chunk_count"] for c in collections}
+        assert counts == {"source": 2, "experiment": 2}
+
+        r = await client.post(
+            f"/collections/{source_id}/clone", headers=USER_2_HEADERS
+        )
+        assert r.status_code == 404
+
+
+async def test_export_and_import_collection() -> None:
+    """Test that an exported collection is imported with its chunks."""
+    async with get_async_test_client() as client:
+        r = await client.post(
+            "/collections",
+            json={"name": "exported", "metadata": {"team": "docs"}},
+            headers=USER_1_HEADERS,
+        )
+        assert r.status_code == 201
+        collection_id = r.json()["uuid"]
+        files = [
+            ("files", ("a.txt", b"Exported document one.", "text/plain")),
+            ("files", ("b.txt", b"Exported document two.", "text/plain")),
+        ]
+        r = await client.post(
+            f"/collections/{collection_id}/documents",
+            files=files,
+            headers=USER_1_HEADERS,
+        )
+        assert r.status_code == 200
+
+        for format in ["parquet", "arrow"]:
+            export = await client.get(
+                f"/collections/{collection_id}/export",
+                params={"format": format},
+                headers=USER_1_HEADERS,
+            )
+            assert export.status_code == 200
+
+            r = await client.post(
+                "/collections/import",
+                files={"file": ("export", export.content)},
+                data={"name": f"imported_{format}"},
+                headers=USER_1_HEADERS,
+            )
+            assert r.status_code == 201, r.text
+            imported = r.json()
+            assert imported["name"] == f"imported_{format}"
+            assert imported["metadata"]["team"] == "docs"
+            assert imported["chunk_count"] == 2
+
+            r = await client.post(
+                f"/collections/{imported['uuid']}/documents/search",
+                json={"query": "exported document", "limit": 2},
+                headers=USER_1_HEADERS,
+            )
+            assert r.status_code == 200
+            assert len(r.json()) == 2
+
+        r = await client.post(
+            "/collections/import",
+            files={"file": ("export", b"not an export")},
+            headers=USER_1_HEADERS,
+        )
+        assert r.status_code == 400
+
+        r = await client.get(
+            f"/collections/{collection_id}/export", headers=USER_2_HEADERS
+        )
+        assert r.status_code == 404
@@ -0,0 +1,189 @@
+"""Tests for the database pool configuration."""
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from langconnect import config, server
+from langconnect.database import connection
+from langconnect.database.connection import _pool_options, init_connection
+
+
+def test_pool_options_from_config(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that pool sizing, timeouts and the statement cache follow the config."""
+    monkeypatch.setattr(config, "POSTGRES_POOL_MIN_SIZE", 2)
+    monkeypatch.setattr(config, "POSTGRES_POOL_MAX_SIZE", 8)
+    monkeypatch.setattr(config, "POSTGRES_COMMAND_TIMEOUT", 0.0)
+    monkeypatch.setattr(config, "POSTGRES_STATEMENT_CACHE_SIZE", 50)
+    monkeypatch.setattr(config, "POSTGRES_PGBOUNCER", False)
+
+    options = _pool_options()
+
+    assert options["min_size"] == 2
+    assert options["max_size"] == 8
+    assert options["command_timeout"] is None
+    assert options["statement_cache_size"] == 50
+    assert options["init"] is init_connection
+
+
+def test_pool_options_behind_pgbouncer(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the statement cache is disabled behind PgBouncer."""
+    monkeypatch.setattr(config, "POSTGRES_STATEMENT_CACHE_SIZE", 100)
+    monkeypatch.setattr(config, "POSTGRES_PGBOUNCER", True)
+
+    assert _pool_options()["statement_cache_size"] == 0
+
+
+def test_reads_go_to_primary_after_own_writes(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test the read-your-writes window of the read replica routing."""
+    monkeypatch.setattr(config, "POSTGRES_READ_HOST", "replica")
+    monkeypatch.setattr(config, "POSTGRES_READ_YOUR_WRITES_SECONDS", 5.0)
+    monkeypatch.setattr(connection, "_recent_writes", {})
+
+    assert not connection._wrote_recently("user1")
+    connection.mark_write("user1")
+    assert connection._wrote_recently("user1")
+    assert not connection._wrote_recently("user2")
+    assert not connection._wrote_recently(None)
+
+    monkeypatch.setattr(config, "POSTGRES_READ_YOUR_WRITES_SECONDS", -1.0)
+    connection.mark_write("user2")
+    assert not connection._wrote_recently("user2")
+
+
+class FakeConnection:
+    """Connection recording the statements it runs."""
+
+    def __init__(self, extension_exists: bool = True, fail: bool = False) -> None:
+        self.extension_exists = extension_exists
+        self.fail = fail
+        self.executed: list[str] = []
+        self.fetched: list[str] = []
+        self.closed = False
+
+    async def fetchval(self, sql: str, *args, **kwargs) -> bool:
+        if self.fail:
+            raise OSError("connection refused")
+        return self.extension_exists
+
+    async def fetch(self, sql: str, *args) -> list:
+        self.fetched.append(sql)
+        return []
+
+    async def execute(self, sql: str) -> None:
+        self.executed.append(sql)
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class FakePool:
+    """Pool of fake connections."""
+
+    def __init__(self, size: int) -> None:
+        self.connections = [FakeConnection() for _ in range(size)]
+        self.free = list(self.connections)
+
+    def get_min_size(self) -> int:
+        return len(self.connections)
+
+    async def acquire(self) -> FakeConnection:
+        return self.free.pop()
+
+    async def release(self, conn: FakeConnection) -> None:
+        self.free.append(conn)
+
+
+@pytest.mark.parametrize("exists", [True, False])
+async def test_ensure_vector_extension(
+    monkeypatch: pytest.MonkeyPatch, exists: bool
+) -> None:
+    """Test that the vector extension is created only when missing."""
+    conn = FakeConnection(extension_exists=exists)
+
+    async def connect(**kwargs) -> FakeConnection:
+        return conn
+
+    monkeypatch.setattr(connection.asyncpg, "connect", connect)
+    await connection.ensure_vector_extension(host="db")
+
+    expected = [] if exists else ["CREATE EXTENSION IF NOT EXISTS vector"]
+    assert conn.executed == expected
+    assert conn.closed
+
+
+@pytest.mark.parametrize("pgbouncer", [False, True])
+async def test_warm_up_pool(monkeypatch: pytest.MonkeyPatch, pgbouncer: bool) -> None:
+    """Test that every initial connection prepares the statements."""
+    pool = FakePool(3)
+
+    async def get_db_pool() -> FakePool:
+        return pool
+
+    monkeypatch.setattr(connection, "get_db_pool", get_db_pool)
+    monkeypatch.setattr(config, "POSTGRES_READ_HOST", "")
+    monkeypatch.setattr(config, "POSTGRES_STATEMENT_CACHE_SIZE", 100)
+    monkeypatch.setattr(config, "POSTGRES_PGBOUNCER", pgbouncer)
+
+    await connection.warm_up_pool([("SELECT 1", []), ("SELECT 2", [])])
+
+    # Statements aren't kept behind PgBouncer, so they are skipped
+    expected = [] if pgbouncer else ["SELECT 1", "SELECT 2"]
+    assert [conn.fetched for conn in pool.connections] == [expected] * 3
+    assert len(pool.free) == 3
+
+
+@pytest.mark.parametrize(
+    ("ready", "fail", "status_code", "status"),
+    [
+        (False, False, 503, "starting"),
+        (True, False, 200, "ready"),
+        (True, True, 503, "unavailable"),
+    ],
+)
+async def test_readiness_check(
+    monkeypatch: pytest.MonkeyPatch,
+    ready: bool,
+    fail: bool,
+    status_code: int,
+    status: str,
+) -> None:
+    """Test /ready before warm-up, with a working and with a failing pool."""
+
+    @asynccontextmanager
+    async def get_db_connection() -> AsyncIterator[FakeConnection]:
+        yield FakeConnection(fail=fail)
+
+    monkeypatch.setattr(server, "get_db_connection", get_db_connection)
+    monkeypatch.setattr(server.APP.state, "ready", ready, raising=False)
+    transport = ASGITransport(app=server.APP)
+    async with AsyncClient(base_url="http://localhost", transport=transport) as client:
+        response = await client.get("/ready")
+
+    assert response.status_code == status_code
+    assert response.json() == {"status": status}
+
+
+async def test_readiness_check_saturated_pool(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that /ready gives up when no pooled connection frees up in time."""
+
+    class SaturatedPool(FakePool):
+        async def acquire(self) -> FakeConnection:
+            await asyncio.Event().wait()
+            raise AssertionError("unreachable")
+
+    async def get_db_pool() -> SaturatedPool:
+        return SaturatedPool(0)
+
+    monkeypatch.setattr(connection, "get_db_pool", get_db_pool)
+    monkeypatch.setattr(config, "READY_DB_TIMEOUT", 0.05)
+    monkeypatch.setattr(server.APP.state, "ready", True, raising=False)
+    transport = ASGITransport(app=server.APP)
+    async with AsyncClient(base_url="http://localhost", transport=transport) as client:
+        response = await asyncio.wait_for(client.get("/ready"), timeout=5)
+
+    assert response.status_code == 503
+    assert response.json() == {"status": "unavailable"}
@@ -0,0 +1,41 @@
+"""Tests for MinHash near-duplicate detection."""
+
+from langconnect.services.dedup import (
+    BANDS,
+    NUM_PERM,
+    NearDuplicateIndex,
+    band_keys,
+    minhash,
+    similarity,
+)
+
+BOILERPLATE = (
+    "This policy applies to all employees, contractors and temporary staff of "
+    "the company and its subsidiaries, and must be reviewed every year by the "
+    "compliance team before it is published on the intranet."
+)
+
+
+def test_minhash_signature() -> None:
+    """Test that signatures are deterministic and sized as configured."""
+    signature = minhash(BOILERPLATE)
+    assert signature.shape == (NUM_PERM,)
+    assert (signature == minhash(BOILERPLATE)).all()
+    assert len(band_keys(signature)) == BANDS
+    assert minhash("  ...  ") is None
+
+
+def test_near_duplicates_are_found() -> None:
+    """Test that near-identical texts match and unrelated ones don't."""
+    index = NearDuplicateIndex(threshold=0.8)
+    index.add("original", minhash(BOILERPLATE))
+
+    variant = minhash(BOILERPLATE.replace("every year", "every  year."))
+    assert similarity(variant, minhash(BOILERPLATE)) == 1.0
+    assert index.find(variant) == "original"
+
+    edited = minhash(BOILERPLATE.replace("compliance team", "legal department"))
+    assert 0.5 < similarity(edited, minhash(BOILERPLATE)) < 1.0
+
+    unrelated = minhash("Vector search returns the chunks closest to the query.")
+    assert index.find(unrelated) is None
@@ -0,0 +1,24 @@
+"""Tests for maximal marginal relevance result selection."""
+
+from langconnect.services.diversity import select
+
+
+def test_select_by_relevance_without_embeddings() -> None:
+    """Test that candidates are picked by relevance without embeddings."""
+    assert select([0.2, 0.9, 0.5], 2) == [1, 2]
+
+
+def test_mmr_skips_near_identical_candidates() -> None:
+    """Test that MMR prefers a diverse candidate over a near-copy."""
+    embeddings = [[1.0, 0.0], [0.99, 0.01], [0.0, 1.0]]
+    relevance = [0.9, 0.89, 0.6]
+    assert select(relevance, 2, embeddings=embeddings) == [0, 2]
+    assert select(relevance, 2, embeddings=embeddings, lambda_mult=1.0) == [0, 1]
+
+
+def test_max_per_group() -> None:
+    """Test that at most max_per_group candidates of a group are picked."""
+    groups = ["a", "a", "a", "b"]
+    picked = select([0.9, 0.8, 0.7, 0.1], 3, groups=groups, max_per_group=2)
+    assert picked == [0, 1, 3]
+    assert select([0.9, 0.8], 3, groups=["a", "a"], max_per_group=1) == [0]
@@ -6,7 +6,14 @@ import pytest
 from fastapi import UploadFile
 from langchain_core.documents import Document
 
-from langconnect.services.document_processor import process_document
+from langconnect.services.document_processor import (
+    compress_parsed,
+    content_hash,
+    decompress_parsed,
+    process_document,
+    source_file_id,
+    split_documents,
+)
 
 
 @pytest.mark.asyncio
@@ -191,3 +198,61 @@ async def test_process_document_octet_stream_with_extension():
 
     assert len(documents) >= 1
     assert documents[0].page_content == "Markdown content with unknown mimetype"
+
+
+@pytest.mark.asyncio
+async def test_process_document_hashes_and_stable_file_id():
+    """Test the hashes and the explicit file id used by sync uploads."""
+    file = MagicMock(spec=UploadFile)
+    file.read = AsyncMock(return_value=b"Same content")
+    file.filename = "test.txt"
+    file.content_type = "text/plain"
+
+    file_id = source_file_id("docs/test.txt")
+    assert file_id == source_file_id("docs/test.txt")
+    documents = await process_document(file, file_id=file_id)
+
+    metadata = documents[0].metadata
+    assert metadata["file_id"] == file_id
+    assert metadata["file_hash"] == content_hash(b"Same content")
+    assert metadata["chunk_hash"] == content_hash(documents[0].page_content)
+    assert metadata["chunk_size"] == 1000
+    assert metadata["chunk_overlap"] == 200
+
+
+@pytest.mark.asyncio
+async def test_process_document_parsed_text_splits_again():
+    """Test that the stored parsed text splits into chunks like the upload."""
+    content = b"This is a test document. " * 50
+    file = MagicMock(spec=UploadFile)
+    file.read = AsyncMock(return_value=content)
+    file.filename = "test.txt"
+    file.content_type = "text/plain"
+
+    parsed: list[Document] = []
+    documents = await process_document(file, chunk_size=300, parsed=parsed)
+    assert parsed
+    assert "file_id" not in parsed[0].metadata
+
+    restored = decompress_parsed(compress_parsed(parsed))
+    assert restored == parsed
+    metadata = documents[0].metadata
+    chunks = split_documents(
+        restored,
+        chunk_size=300,
+        chunk_overlap=200,
+        file_id=metadata["file_id"],
+        file_hash=metadata["file_hash"],
+    )
+    assert [c.page_content for c in chunks] == [d.page_content for d in documents]
+    assert [c.metadata for c in chunks] == [d.metadata for d in documents]
+
+    larger = split_documents(
+        restored,
+        chunk_size=600,
+        chunk_overlap=0,
+        file_id=metadata["file_id"],
+        file_hash=metadata["file_hash"],
+    )
+    assert len(larger) < len(chunks)
+    assert larger[0].metadata["chunk_size"] == 600
@@ -1,6 +1,13 @@
+import asyncio
 import json
+from typing import Any
 from uuid import UUID
 
+import pytest
+
+from langconnect import config, metrics
+from langconnect.database.connection import get_db_connection
+from langconnect.embeddings import HashEmbeddings, register_embeddings_provider
 from tests.unit_tests.fixtures import (
     get_async_test_client,
 )
@@ -546,3 +553,665 @@ async def test_documents_bulk_delete() -> None:
         list_resp_after_file_delete = await client.get(f"/collections/{collection_id}/documents", headers=USER_1_HEADERS)
         assert list_resp_after_file_delete.json() == []
 
+
+
+async def test_documents_search_stream() -> None:
+    """Test streaming search results as NDJSON and server-sent events."""
+    async with get_async_test_client() as client:
+        collection_response = await client.post(
+            "/collections",
+            json={"name": "stream_test_col", "metadata": {}},
+            headers=USER_1_HEADERS,
+        )
+        assert collection_response.status_code == 201
+        collection_id = collection_response.json()["uuid"]
+
+        files = [
+            ("files", ("a.txt", b"Streaming search test document.", "text/plain")),
+            ("files", ("b.txt", b"Another document about search.", "text/plain")),
+        ]
+        resp = await client.post(
+            f"/collections/{collection_id}/documents",
+            files=files,
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 200
+
+        resp = await client.post(
+            f"/collections/{collection_id}/documents/search/stream",
+            json={
+                "query": "search document",
+                "limit": 5,
+                "search_type": "keyword",
+                "fields": ["id", "page_content", "score"],
+                "max_content_chars": 9,
+            },
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in resp.text.splitlines()]
+        assert len(lines) == 2
+        for line in lines:
+            assert set(line) == {"id", "page_content", "score"}
+            assert len(line["page_content"]) <= 9
+
+        resp = await client.post(
+            f"/collections/{collection_id}/documents/search/stream",
+            json={"query": "search document", "limit": 1, "format": "sse"},
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        events = resp.text.strip().split("\n\n")
+        assert events[0].startswith("event: result\ndata: ")
+        assert events[-1] == 'event: end\ndata: {"count":1}'
+
+        # Timings and plans are only reported by the regular search
+        resp = await client.post(
+            f"/collections/{collection_id}/documents/search/stream",
+            json={"query": "search document", "debug": True},
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 400
+
+        # Errors before the first result are regular HTTP errors
+        resp = await client.post(
+            "/collections/12345678-1234-5678-1234-567812345678/documents/search/stream",
+            json={"query": "foo"},
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 404
+
+
+async def test_documents_search_and_list_projection() -> None:
+    """Test field projection and snippets in search and list responses."""
+    async with get_async_test_client() as client:
+        collection_response = await client.post(
+            "/collections",
+            json={"name": "projection_test_col", "metadata": {}},
+            headers=USER_1_HEADERS,
+        )
+        assert collection_response.status_code == 201
+        collection_id = collection_response.json()["uuid"]
+
+        text = b"Postgres full text search highlights the matching words in snippets."
+        resp = await client.post(
+            f"/collections/{collection_id}/documents",
+            files=[("files", ("a.txt", text, "text/plain"))],
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 200
+
+        resp = await client.post(
+            f"/collections/{collection_id}/documents/search",
+            json={
+                "query": "highlights",
+                "search_type": "keyword",
+                "fields": ["score", "snippet"],
+                "snippet_chars": 60,
+            },
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 200
+        results = resp.json()
+        assert len(results) == 1
+        assert set(results[0]) == {"id", "score", "snippet"}
+        assert "<b>highlights</b>" in results[0]["snippet"]
+
+        resp = await client.post(
+            f"/collections/{collection_id}/documents/search",
+            json={"query": "postgres", "fields": ["id"], "snippet_chars": 8},
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 200
+        assert resp.json()[0]["snippet"] == "Postgres"
+        assert set(resp.json()[0]) == {"id", "snippet"}
+
+        resp = await client.get(
+            f"/collections/{collection_id}/documents",
+            params={"fields": "content", "snippet_chars": 8},
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 200
+        doc = resp.json()[0]
+        assert doc["content"] == "Postgres"
+        assert doc["metadata"] is None
+
+        resp = await client.get(
+            f"/collections/{collection_id}/documents",
+            params={"fields": "content,nope"},
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 400
+
+
+async def test_documents_sync_mode() -> None:
+    """Sync uploads skip unchanged files and only re-embed changed chunks."""
+    async with get_async_test_client() as client:
+        create_col = await client.post(
+            "/collections", json={"name": "sync_col"}, headers=USER_1_HEADERS
+        )
+        collection_id = create_col.json()["uuid"]
+        url = f"/collections/{collection_id}/documents"
+        data = {"mode": "sync", "chunk_size": "20", "chunk_overlap": "0"}
+
+        def upload(content: bytes) -> list:
+            return [("files", ("notes.txt", content, "text/plain"))]
+
+        resp = await client.post(
+            url,
+            files=upload(b"First part.\n\nSecond part."),
+            data=data,
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 200
+        [created] = resp.json()["files"]
+        assert created["status"] == "created"
+        assert created["added"] == 2
+
+        resp = await client.post(
+            url,
+            files=upload(b"First part.\n\nSecond part."),
+            data=data,
+            headers=USER_1_HEADERS,
+        )
+        assert resp.json()["files"][0]["status"] == "skipped"
+        assert resp.json()["added_chunk_ids"] == []
+
+        resp = await client.post(
+            url,
+            files=upload(b"First part.\n\nThird part."),
+            data=data,
+            headers=USER_1_HEADERS,
+        )
+        [updated] = resp.json()["files"]
+        assert updated["status"] == "updated"
+        assert updated["added"] == 1
+        assert updated["deleted"] == 1
+        assert updated["file_id"] == created["file_id"]
+
+        resp = await client.get(url, headers=USER_1_HEADERS)
+        assert sorted(doc["content"] for doc in resp.json()) == [
+            "First part.",
+            "Third part.",
+        ]
+
+        # Dropping a metadata key is a change too
+        content = b"First part.\n\nThird part."
+        for metadata in ({"team": "docs"}, {}):
+            resp = await client.post(
+                url,
+                files=upload(content),
+                data={**data, "metadatas_json": json.dumps([metadata])},
+                headers=USER_1_HEADERS,
+            )
+            [synced] = resp.json()["files"]
+            assert synced["status"] == "updated"
+            assert synced["added"] == 0
+
+
+
+async def test_documents_rechunk() -> None:
+    """Rechunking splits the stored text again and keeps unchanged chunks."""
+    async with get_async_test_client() as client:
+        create_col = await client.post(
+            "/collections", json={"name": "rechunk_col"}, headers=USER_1_HEADERS
+        )
+        collection_id = create_col.json()["uuid"]
+        url = f"/collections/{collection_id}/documents"
+        resp = await client.post(
+            url,
+            files=[
+                ("files", ("a.txt", b"First part.\n\nSecond part.", "text/plain")),
+                ("files", ("b.txt", b"Short.", "text/plain")),
+            ],
+            data={"chunk_size": "20", "chunk_overlap": "0"},
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 200
+        assert len(resp.json()["added_chunk_ids"]) == 3
+
+        resp = await client.post(
+            f"{url}/rechunk",
+            json={"chunk_size": 10, "chunk_overlap": 20},
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 400
+
+        resp = await client.post(
+            f"{url}/rechunk",
+            json={"chunk_size": 100, "chunk_overlap": 0},
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 202
+        job_url = resp.headers["location"]
+        for _ in range(100):
+            job = (await client.get(job_url, headers=USER_1_HEADERS)).json()
+            if job["status"] != "running":
+                break
+            await asyncio.sleep(0.05)
+        assert job["kind"] == "rechunk_collection"
+        assert job["status"] == "succeeded"
+        progress = job["progress"]
+        assert progress["rechunked_files"] == 2
+        assert progress["missing_files"] == []
+        # "Short." is the same chunk with new metadata, the other file is merged
+        assert progress["reused_chunks"] == 1
+        assert progress["embedded_chunks"] == 1
+        assert progress["deleted_chunks"] == 2
+
+        resp = await client.get(url, headers=USER_1_HEADERS)
+        docs = resp.json()
+        assert sorted(doc["content"] for doc in docs) == [
+            "First part.\n\nSecond part.",
+            "Short.",
+        ]
+        assert {doc["metadata"]["chunk_size"] for doc in docs} == {100}
+
+        resp = await client.post(
+            "/collections/00000000-0000-0000-0000-000000000000/documents/rechunk",
+            json={"chunk_size": 100, "chunk_overlap": 0},
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 404
+
+async def test_documents_search_quantized_storage() -> None:
+    """Collections with halfvec and binary storage are searchable."""
+    async with get_async_test_client() as client:
+        for storage in ["halfvec", "binary"]:
+            create_col = await client.post(
+                "/collections",
+                json={"name": f"{storage}_col", "vector_storage": storage},
+                headers=USER_1_HEADERS,
+            )
+            assert create_col.status_code == 201, create_col.text
+            collection = create_col.json()
+            assert collection["metadata"]["vector_storage"] == storage
+            collection_id = collection["uuid"]
+
+            files = [
+                ("files", ("a.txt", b"Quantized storage document.", "text/plain")),
+                ("files", ("b.txt", b"Another stored document.", "text/plain")),
+            ]
+            resp = await client.post(
+                f"/collections/{collection_id}/documents",
+                files=files,
+                headers=USER_1_HEADERS,
+            )
+            assert resp.status_code == 200
+
+            resp = await client.post(
+                f"/collections/{collection_id}/documents/search",
+                json={"query": "quantized storage", "limit": 2},
+                headers=USER_1_HEADERS,
+            )
+            assert resp.status_code == 200
+            assert len(resp.json()) == 2
+
+            # Metadata updates keep the storage mode
+            resp = await client.patch(
+                f"/collections/{collection_id}",
+                json={"metadata": {"purpose": "test"}},
+                headers=USER_1_HEADERS,
+            )
+            assert resp.status_code == 200
+            assert resp.json()["metadata"]["vector_storage"] == storage
+
+        resp = await client.post(
+            "/collections",
+            json={"name": "bad_storage_col", "vector_storage": "int8"},
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 422
+
+
+async def test_documents_search_collection_model() -> None:
+    """Collections with their own embedding model are searched with it."""
+    async with get_async_test_client() as client:
+        create_col = await client.post(
+            "/collections",
+            json={
+                "name": "model_col",
+                "embeddings_provider": "fake",
+                "embeddings_dimension": 64,
+            },
+            headers=USER_1_HEADERS,
+        )
+        assert create_col.status_code == 201, create_col.text
+        collection = create_col.json()
+        assert collection["metadata"]["embeddings_provider"] == "fake"
+        assert collection["metadata"]["embeddings_dimension"] == 64
+        collection_id = collection["uuid"]
+
+        files = [
+            ("files", ("a.txt", b"Small model document.", "text/plain")),
+            ("files", ("b.txt", b"Another embedded document.", "text/plain")),
+        ]
+        resp = await client.post(
+            f"/collections/{collection_id}/documents",
+            files=files,
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 200
+
+        resp = await client.post(
+            f"/collections/{collection_id}/documents/search",
+            json={"query": "small model", "limit": 2},
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 200
+        assert len(resp.json()) == 2
+
+        # Metadata updates keep the model
+        resp = await client.patch(
+            f"/collections/{collection_id}",
+            json={"metadata": {"embeddings_dimension": 128}},
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 200
+        assert resp.json()["metadata"]["embeddings_dimension"] == 64
+
+        resp = await client.post(
+            "/collections",
+            json={"name": "bad_model_col", "embeddings_provider": "missing"},
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 400
+
+
+async def test_collection_model_dimension_mismatch() -> None:
+    """A dimension the model doesn't produce is rejected."""
+    register_embeddings_provider(
+        "fixed-size-test", lambda model, dimension: HashEmbeddings(32)
+    )
+    async with get_async_test_client() as client:
+        resp = await client.post(
+            "/collections",
+            json={
+                "name": "mismatch_col",
+                "embeddings_provider": "fixed-size-test",
+                "embeddings_dimension": 64,
+            },
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 400
+        assert "32-dimensional" in resp.json()["detail"]
+
+async def test_documents_response_schemas() -> None:
+    """Responses returned without validation still document their models."""
+    async with get_async_test_client() as client:
+        schema = (await client.get("/openapi.json")).json()
+    paths = schema["paths"]
+    list_schema = paths["/collections/{collection_id}/documents"]["get"]
+    search_schema = paths["/collections/{collection_id}/documents/search"]["post"]
+    assert "DocumentResponse" in json.dumps(list_schema["responses"]["200"])
+    search_response = json.dumps(search_schema["responses"]["200"])
+    assert "SearchResult" in search_response
+    assert "SearchDebugResponse" in search_response
+
+
+async def test_documents_dedup() -> None:
+    """Near-duplicate chunks are dropped, and their signatures go with them."""
+    text = (
+        b"Minhash signatures find chunks that share most of their word shingles, "
+        b"so the same paragraph uploaded twice is stored only once."
+    )
+    async with get_async_test_client() as client:
+        create_col = await client.post(
+            "/collections", json={"name": "dedup_col"}, headers=USER_1_HEADERS
+        )
+        collection_id = create_col.json()["uuid"]
+        url = f"/collections/{collection_id}/documents"
+
+        resp = await client.post(
+            url,
+            files=[
+                ("files", ("a.txt", text, "text/plain")),
+                ("files", ("b.txt", text, "text/plain")),
+            ],
+            data={"dedup": "true"},
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["dropped_duplicates"] == 1
+        [kept] = body["added_chunk_ids"]
+        assert body["duplicates"][0]["duplicate_of"] == kept
+
+        # Against the stored chunks too
+        resp = await client.post(
+            url,
+            files=[("files", ("c.txt", text, "text/plain"))],
+            data={"dedup": "true"},
+            headers=USER_1_HEADERS,
+        )
+        assert resp.json()["dropped_duplicates"] == 1
+        assert resp.json()["added_chunk_ids"] == []
+
+        resp = await client.delete(
+            url, json={"document_ids": [kept]}, headers=USER_1_HEADERS
+        )
+        assert resp.json()["deleted_count"] == 1
+        async with get_db_connection() as conn:
+            signatures = await conn.fetchval(
+                "SELECT COUNT(*) FROM langconnect_chunk_signature "
+                "WHERE collection_id = $1",
+                collection_id,
+            )
+        assert signatures == 0
+
+
+async def test_documents_search_diversity(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Diversified searches pick among more candidates, by their embeddings."""
+    from langconnect.services import diversity
+
+    calls: list[dict[str, Any]] = []
+    select = diversity.select
+
+    def spy(relevance: list[float], k: int, **kwargs: Any) -> list[int]:
+        calls.append({"relevance": relevance, **kwargs})
+        return select(relevance, k, **kwargs)
+
+    monkeypatch.setattr(diversity, "select", spy)
+    dimension = config.get_embedding_dimension(config.get_default_embeddings())
+    async with get_async_test_client() as client:
+        create_col = await client.post(
+            "/collections", json={"name": "diversity_col"}, headers=USER_1_HEADERS
+        )
+        collection_id = create_col.json()["uuid"]
+        content = b"Alpha part one.\n\nAlpha part two.\n\nAlpha part three."
+        resp = await client.post(
+            f"/collections/{collection_id}/documents",
+            files=[
+                ("files", (f"{name}.txt", content, "text/plain"))
+                for name in ("a", "b", "c")
+            ],
+            data={"chunk_size": "20", "chunk_overlap": "0"},
+            headers=USER_1_HEADERS,
+        )
+        assert len(resp.json()["added_chunk_ids"]) == 9
+        url = f"/collections/{collection_id}/documents/search"
+
+        resp = await client.post(
+            url,
+            json={"query": "alpha part", "limit": 2, "diversify": True},
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 200
+        assert len(resp.json()) == 2
+        [call] = calls
+        assert len(call["relevance"]) == 2 * config.SEARCH_MMR_FETCH_FACTOR
+        assert [len(vector) for vector in call["embeddings"]] == [dimension] * 8
+        assert call["groups"] is None
+        # The embeddings are read to diversify, not returned
+        assert all("embedding" not in result for result in resp.json())
+
+        calls.clear()
+        resp = await client.post(
+            url,
+            json={"query": "alpha part", "limit": 3, "max_per_file": 1},
+            headers=USER_1_HEADERS,
+        )
+        results = resp.json()
+        assert len(calls[0]["relevance"]) > 3
+        assert calls[0]["embeddings"] is None
+        assert len({result["metadata"]["file_id"] for result in results}) == 3
+
+        resp = await client.post(
+            url,
+            json={"query": "alpha part", "diversify": True, "mmr_lambda": 1.5},
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 422
+
+
+async def test_documents_search_rerank(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Reranked searches reorder by reranker score, unless over budget."""
+    async with get_async_test_client() as client:
+        create_col = await client.post(
+            "/collections", json={"name": "rerank_col"}, headers=USER_1_HEADERS
+        )
+        collection_id = create_col.json()["uuid"]
+        resp = await client.post(
+            f"/collections/{collection_id}/documents",
+            files=[
+                ("files", ("a.txt", b"Unrelated words about gardening.", "text/plain")),
+                ("files", ("b.txt", b"Reranking sorts search results.", "text/plain")),
+                ("files", ("c.txt", b"Search results of a query.", "text/plain")),
+            ],
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 200
+        url = f"/collections/{collection_id}/documents/search"
+        query = {"query": "reranking sorts search results", "limit": 3, "rerank": True}
+
+        # No reranker configured
+        resp = await client.post(url, json=query, headers=USER_1_HEADERS)
+        assert resp.status_code == 400
+
+        monkeypatch.setattr(config, "RERANKER_PROVIDER", "fake")
+        config.get_default_reranker.cache_clear()
+        try:
+            resp = await client.post(url, json=query, headers=USER_1_HEADERS)
+            assert resp.status_code == 200
+            results = resp.json()
+            # The fake reranker scores the fraction of query words in the text
+            assert [result["score"] for result in results] == [1.0, 0.5, 0.0]
+            assert results[0]["page_content"] == "Reranking sorts search results."
+
+            skipped = metrics.RERANK_SKIPPED.labels(reason="budget")
+            before = skipped.value
+            resp = await client.post(
+                url,
+                json={**query, "rerank_budget_ms": 0.001},
+                headers=USER_1_HEADERS,
+            )
+            assert resp.status_code == 200
+            # Retrieval order: cosine distances, ascending
+            scores = [result["score"] for result in resp.json()]
+            assert scores == sorted(scores)
+            assert skipped.value == before + 1
+        finally:
+            config.get_default_reranker.cache_clear()
+
+
+async def test_documents_search_short_vector(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The two-stage short vector search finds the full-vector top-k."""
+    dimension = config.get_embedding_dimension(config.get_default_embeddings())
+    if config.PGVECTOR_SHORT_DIMENSION >= dimension:
+        pytest.skip("PGVECTOR_SHORT_DIMENSION isn't below the embedding dimension")
+    # Every chunk is a short vector candidate, so the rerank on the full
+    # vectors sees the same chunks as the exact search.
+    monkeypatch.setattr(config, "PGVECTOR_SHORT_RERANK_FACTOR", 5)
+    texts = [
+        b"Short vectors select the candidates.",
+        b"Full vectors rerank the candidates.",
+        b"Matryoshka embeddings keep their prefix meaningful.",
+        b"Postgres stores both columns of a chunk.",
+        b"Gardening has nothing to do with this.",
+        b"Search results are reranked by full distance.",
+    ]
+    async with get_async_test_client() as client:
+        results = {}
+        for short_vector in (False, True):
+            create_col = await client.post(
+                "/collections",
+                json={"name": f"short_{short_vector}", "short_vector": short_vector},
+                headers=USER_1_HEADERS,
+            )
+            assert create_col.status_code == 201, create_col.text
+            collection = create_col.json()
+            assert ("short_vector_dimension" in collection["metadata"]) is short_vector
+            collection_id = collection["uuid"]
+            resp = await client.post(
+                f"/collections/{collection_id}/documents",
+                files=[
+                    ("files", (f"{i}.txt", text, "text/plain"))
+                    for i, text in enumerate(texts)
+                ],
+                headers=USER_1_HEADERS,
+            )
+            assert resp.status_code == 200
+            resp = await client.post(
+                f"/collections/{collection_id}/documents/search",
+                json={"query": "rerank candidates with full vectors", "limit": 2},
+                headers=USER_1_HEADERS,
+            )
+            assert resp.status_code == 200
+            results[short_vector] = resp.json()
+
+        full, short = results[False], results[True]
+        assert [r["page_content"] for r in short] == [r["page_content"] for r in full]
+        assert [r["score"] for r in short] == pytest.approx(
+            [r["score"] for r in full]
+        )
+
+
+def _metric_samples(text: str) -> dict[str, float]:
+    """Samples of a /metrics response by series."""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            series, value = line.rsplit(" ", 1)
+            samples[series] = float(value)
+    return samples
+
+
+async def test_metrics_endpoint_records_requests() -> None:
+    """An upload and a search are recorded in the /metrics series."""
+    search_route = "/collections/{collection_id}/documents/search"
+    series = [
+        'langconnect_parse_duration_seconds_count{mime_type="text/plain"}',
+        "langconnect_upsert_duration_seconds_count",
+        'langconnect_search_duration_seconds_count{search_type="semantic"}',
+        'langconnect_db_pool_acquire_seconds_count{pool="primary"}',
+        "langconnect_request_duration_seconds_count"
+        f'{{method="POST",route="{search_route}",status="200"}}',
+    ]
+    async with get_async_test_client() as client:
+        resp = await client.get("/metrics")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain")
+        before = _metric_samples(resp.text)
+
+        create_col = await client.post(
+            "/collections", json={"name": "metrics_col"}, headers=USER_1_HEADERS
+        )
+        collection_id = create_col.json()["uuid"]
+        resp = await client.post(
+            f"/collections/{collection_id}/documents",
+            files=[("files", ("a.txt", b"Measured document.", "text/plain"))],
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 200
+        resp = await client.post(
+            f"/collections/{collection_id}/documents/search",
+            json={"query": "measured"},
+            headers=USER_1_HEADERS,
+        )
+        assert resp.status_code == 200
+
+        after = _metric_samples((await client.get("/metrics")).text)
+    for name in series:
+        assert after[name] > before.get(name, 0), name
@@ -0,0 +1,88 @@
+"""Tests for the embeddings provider registry."""
+
+import math
+import sys
+import types
+
+import pytest
+
+from langconnect.embeddings import (
+    HashEmbeddings,
+    InstrumentedEmbeddings,
+    create_embeddings,
+    get_embedding_dimension,
+    register_embeddings_provider,
+)
+
+
+def test_hash_embeddings_are_deterministic_and_normalized() -> None:
+    """Test that the fake provider returns stable unit vectors."""
+    embeddings = create_embeddings("fake", dimension=64)
+    first = embeddings.embed_query("The quick brown fox")
+    second = embeddings.embed_documents(["The quick brown fox"])[0]
+
+    assert first == second
+    assert len(first) == 64
+    assert math.isclose(math.sqrt(sum(v * v for v in first)), 1.0)
+    assert get_embedding_dimension(embeddings) == 64
+
+
+def test_hash_embeddings_similarity_follows_shared_words() -> None:
+    """Test that texts sharing words are closer than unrelated texts."""
+    embeddings = HashEmbeddings(dimension=256)
+    query = embeddings.embed_query("postgres vector search")
+    related = embeddings.embed_query("vector search in postgres databases")
+    unrelated = embeddings.embed_query("banana bread recipe")
+
+    def dot(a: list[float], b: list[float]) -> float:
+        return sum(x * y for x, y in zip(a, b, strict=True))
+
+    assert dot(query, related) > dot(query, unrelated)
+
+
+def test_unknown_provider_raises() -> None:
+    """Test that an unknown provider name is rejected."""
+    with pytest.raises(ValueError, match="Unknown embeddings provider"):
+        create_embeddings("no-such-provider")
+
+
+def test_register_custom_provider() -> None:
+    """Test registering a custom provider."""
+    register_embeddings_provider(
+        "custom-test", lambda model, dimension: HashEmbeddings(dimension or 8)
+    )
+    embeddings = create_embeddings("custom-test", dimension=16)
+    assert get_embedding_dimension(embeddings) == 16
+
+
+def test_local_embeddings_dimension(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that local vectors are truncated to the requested size or rejected."""
+
+    class FakeSentenceTransformer:
+        def __init__(self, model: str, truncate_dim: int | None = None, **_) -> None:
+            self.truncate_dim = truncate_dim
+
+        def get_sentence_embedding_dimension(self) -> int:
+            return min(384, self.truncate_dim or 384)
+
+    module = types.ModuleType("sentence_transformers")
+    module.SentenceTransformer = FakeSentenceTransformer
+    monkeypatch.setitem(sys.modules, "sentence_transformers", module)
+
+    assert get_embedding_dimension(create_embeddings("local")) == 384
+    assert get_embedding_dimension(create_embeddings("local", dimension=256)) == 256
+    with pytest.raises(ValueError, match="requested 512 dimensions"):
+        get_embedding_dimension(create_embeddings("local", dimension=512))
+
+
+def test_query_cache_returns_copies() -> None:
+    """Test that callers mutating a query vector don't alter the cache."""
+    embeddings = InstrumentedEmbeddings(HashEmbeddings(8), query_cache_size=4)
+    first = embeddings.embed_query("cached query")
+    expected = list(first)
+    first[0] = 42.0
+    second = embeddings.embed_query("cached query")
+    second[1] = 42.0
+
+    assert embeddings.embed_query("cached query") == expected
+    assert second is not first
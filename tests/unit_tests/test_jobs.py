@@ -0,0 +1,81 @@
+"""Tests for the in-process background job registry."""
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+import pytest
+
+from langconnect import jobs
+from langconnect.database import collections
+
+
+async def test_job_progress_and_status() -> None:
+    """Test that a job reports its progress and finishes as succeeded."""
+    release = asyncio.Event()
+
+    async def work(job: jobs.Job) -> None:
+        job.progress["done"] = 1
+        await release.wait()
+        job.progress["done"] = 2
+
+    job = jobs.start("test", "user1", work, done=0)
+    await asyncio.sleep(0)
+    assert jobs.get(job.id, "user1").status == "running"
+    assert job.progress == {"done": 1}
+
+    release.set()
+    await jobs.wait(job.id)
+    assert job.status == "succeeded"
+    assert job.progress == {"done": 2}
+    assert job.finished_at is not None
+
+
+async def test_job_failure_and_ownership() -> None:
+    """Test that failures are recorded and jobs are only visible to their owner."""
+
+    async def fail(job: jobs.Job) -> None:
+        raise RuntimeError("boom")
+
+    job = jobs.start("test", "user1", fail)
+    await jobs.wait(job.id)
+    assert job.status == "failed"
+    assert job.error == "boom"
+    assert jobs.get(job.id, "user2") is None
+    assert job in jobs.list_jobs("user1")
+    assert job not in jobs.list_jobs("user2")
+
+
+async def test_cancelled_clone_is_deleted(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a clone interrupted by the shutdown doesn't look complete."""
+    copying = asyncio.Event()
+    deleted: list[str] = []
+
+    class StalledConnection:
+        async def fetchval(self, *args: Any) -> int:
+            copying.set()
+            await asyncio.Event().wait()
+            return 0
+
+    @asynccontextmanager
+    async def fake_connection() -> AsyncIterator[StalledConnection]:
+        yield StalledConnection()
+
+    async def fake_delete(
+        self: collections.CollectionsManager, collection_id: str
+    ) -> None:
+        deleted.append(collection_id)
+
+    monkeypatch.setattr(collections, "get_db_connection", fake_connection)
+    monkeypatch.setattr(collections.CollectionsManager, "delete", fake_delete)
+
+    async def clone(job: jobs.Job) -> None:
+        await collections.clone_collection("source", "target", "user1", job)
+
+    job = jobs.start("clone_collection", "user1", clone, copied_chunks=0)
+    await copying.wait()
+    await jobs.shutdown()
+
+    assert job.status == "cancelled"
+    assert deleted == ["target"]
@@ -0,0 +1,54 @@
+"""Tests for the Prometheus-style metrics registry."""
+
+from langconnect.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    """Test the text format of a labeled histogram."""
+    registry = Registry()
+    histogram = Histogram(
+        "test_latency_seconds",
+        "Test latency.",
+        ["route"],
+        buckets=(0.1, 1.0),
+        registry=registry,
+    )
+    histogram.labels(route="/a").observe(0.05)
+    histogram.labels(route="/a").observe(0.5)
+    histogram.labels(route="/a").observe(5)
+
+    output = registry.render()
+
+    assert "# TYPE test_latency_seconds histogram" in output
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in output
+    assert 'test_latency_seconds_bucket{route="/a",le="1"} 2' in output
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in output
+    assert 'test_latency_seconds_count{route="/a"} 3' in output
+    assert 'test_latency_seconds_sum{route="/a"} 5.55' in output
+
+
+def test_counter_and_gauge() -> None:
+    """Test counters and gauges with and without labels."""
+    registry = Registry()
+    counter = Counter("test_hits", "Hits.", ["cache"], registry=registry)
+    gauge = Gauge("test_pool_size", "Pool size.", registry=registry)
+
+    counter.labels(cache="query").inc()
+    counter.labels(cache="query").inc(2)
+    gauge.set(4)
+
+    output = registry.render()
+
+    assert 'test_hits_total{cache="query"} 3' in output
+    assert "test_pool_size 4" in output
+
+
+def test_histogram_timer_records_observation() -> None:
+    """Test the time() context manager."""
+    registry = Registry()
+    histogram = Histogram("test_timer_seconds", "Timer.", registry=registry)
+
+    with histogram.time():
+        pass
+
+    assert "test_timer_seconds_count 1" in registry.render()
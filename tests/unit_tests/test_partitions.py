@@ -0,0 +1,87 @@
+"""Tests for the per-collection partitioning of the embedding table."""
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+import pytest
+
+from langconnect.database import indexes, partitions, quantization
+from langconnect.database.collections import (
+    EMBEDDING_UPSERT_PARTITIONED_SQL,
+    EMBEDDING_UPSERT_SQL,
+)
+
+
+def test_partition_name() -> None:
+    """Test that partition names are derived from the collection UUID."""
+    name = partitions.partition_name("0b7f5e2c-3a6d-4a8e-9c1f-2d4e6f8a0b1c")
+    assert name == "langchain_pg_embedding_0b7f5e2c3a6d4a8e9c1f2d4e6f8a0b1c"
+
+
+def test_partition_name_rejects_non_uuid() -> None:
+    """Test that only UUIDs end up in partition DDL."""
+    with pytest.raises(ValueError):
+        partitions.partition_name("x'); DROP TABLE langchain_pg_collection; --")
+
+
+def test_upsert_conflict_target() -> None:
+    """Test that the partitioned upsert conflicts on the partitioned key."""
+    assert "ON CONFLICT (id)" in EMBEDDING_UPSERT_SQL
+    assert "ON CONFLICT (collection_id, id)" in EMBEDDING_UPSERT_PARTITIONED_SQL
+
+
+class FakeConnection:
+    """Connection with two unindexed partitions, recording its statements."""
+
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    async def execute(self, sql: str, *args: Any, **kwargs: Any) -> None:
+        self.statements.append(sql)
+
+    async def fetch(self, sql: str, *args: Any) -> list[dict[str, str]]:
+        return [
+            {"partition": partitions.partition_name(collection_id)}
+            for collection_id in (
+                "0b7f5e2c-3a6d-4a8e-9c1f-2d4e6f8a0b1c",
+                "5d1c9a3e-7b2f-4c6d-8e0a-1f3b5d7c9e2a",
+            )
+        ]
+
+    async def fetchval(self, sql: str, *args: Any) -> bool:
+        # Takes the build lock, finds no invalid index left behind.
+        return "pg_try_advisory_lock" in sql
+
+
+async def test_concurrent_index_build_on_partitions(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that concurrent builds go partition by partition.
+
+    Postgres rejects ``CREATE INDEX CONCURRENTLY`` on a partitioned table.
+    """
+    conn = FakeConnection()
+
+    @asynccontextmanager
+    async def fake_connection() -> AsyncIterator[FakeConnection]:
+        yield conn
+
+    monkeypatch.setattr(indexes, "get_db_connection", fake_connection)
+    monkeypatch.setattr(partitions, "_enabled", True)
+    progress: dict[str, Any] = {"built_indexes": 0}
+    index = quantization.unsized_index(768)
+
+    await indexes.build_index(index, "hnsw", {}, concurrently=True, progress=progress)
+
+    parent, *statements = conn.statements
+    assert parent.startswith(f"CREATE INDEX IF NOT EXISTS {index.name} ")
+    assert " ON ONLY langchain_pg_embedding " in parent
+    assert len(statements) == 4
+    for create, attach in zip(statements[::2], statements[1::2], strict=True):
+        assert create.startswith("CREATE INDEX CONCURRENTLY IF NOT EXISTS ")
+        assert " ON langchain_pg_embedding_" in create
+        child = create.split()[6]
+        assert len(child) <= 63
+        assert attach == f"ALTER INDEX {index.name} ATTACH PARTITION {child}"
+    assert progress == {"built_indexes": 1, "pending_partitions": 0}
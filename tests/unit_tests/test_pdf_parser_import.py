@@ -5,11 +5,11 @@ def test_pdf_plumber_parser_configured() -> None:
     """Test that PDFPlumberParser is correctly configured in document_processor."""
     from langchain_community.document_loaders.parsers import PDFPlumberParser
 
-    from langconnect.services.document_processor import HANDLERS
+    from langconnect.services.document_processor import HANDLERS, get_parser
 
     # Verify PDFPlumberParser is used for PDFs
     assert "application/pdf" in HANDLERS
-    assert isinstance(HANDLERS["application/pdf"], PDFPlumberParser)
+    assert isinstance(get_parser("application/pdf"), PDFPlumberParser)
 
 
 def test_pdf_plumber_import() -> None:
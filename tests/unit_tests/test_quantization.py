@@ -0,0 +1,75 @@
+"""Tests for the reduced-precision and reduced-dimension vector layouts."""
+
+from langconnect.database import quantization
+from langconnect.database.collections import (
+    embedding_upsert_sql,
+    vector_search_template,
+)
+from langconnect.database.indexes import _index_sql
+from langconnect.database.quantization import VectorLayout
+
+
+def test_layout_of() -> None:
+    """Test that collections without a layout use float32 vectors."""
+    assert quantization.layout_of(None) == quantization.DEFAULT_LAYOUT
+    assert quantization.layout_of({"name": "a"}) == quantization.DEFAULT_LAYOUT
+    assert quantization.layout_of(
+        {"vector_storage": "halfvec", "short_vector_dimension": 256}
+    ) == VectorLayout("halfvec", 256)
+
+
+def test_upsert_writes_layout_columns() -> None:
+    """Test that each layout writes only its own columns."""
+    assert "embedding_half" not in embedding_upsert_sql()
+    assert "(id, collection_id, embedding_half, document" in embedding_upsert_sql(
+        VectorLayout("halfvec")
+    )
+    assert "binary_quantize($3::vector)" in embedding_upsert_sql(
+        VectorLayout("binary")
+    )
+    assert "subvector($3::vector, 1, 64)" in embedding_upsert_sql(
+        VectorLayout("vector", 64)
+    )
+
+
+def test_vector_search_template() -> None:
+    """Test that single-stage searches match the partial indexes."""
+    assert "AND embedding_short IS NULL" in vector_search_template()
+    two_stage = vector_search_template(VectorLayout("vector", 64), 5)
+    assert "ORDER BY e.embedding_short <=> subvector($1::vector, 1, 64)" in two_stage
+    assert "LIMIT $4 * 5" in two_stage
+    assert "e.embedding <=> $1::vector AS score" in two_stage
+
+
+def test_index_sql() -> None:
+    """Test the per-layout index definitions."""
+    vector = _index_sql("hnsw", {})
+    assert "(embedding vector_cosine_ops)" in vector
+    assert vector.endswith("WHERE embedding_short IS NULL")
+    halfvec = _index_sql("hnsw", {}, "halfvec")
+    assert "(embedding_half halfvec_cosine_ops)" in halfvec
+    assert halfvec.endswith("WHERE embedding_bit IS NULL AND embedding_short IS NULL")
+    assert "(embedding_bit bit_hamming_ops)" in _index_sql(
+        "ivfflat", {"lists": 10}, "binary"
+    )
+    assert "(embedding_short vector_cosine_ops)" in _index_sql("hnsw", {}, "short")
+
+
+def test_unsized_layout() -> None:
+    """Test that collections of another model dimension use the unsized column."""
+    layout = quantization.layout_of({"embeddings_dimension": 64})
+    assert layout == VectorLayout(dimension=64)
+    assert "(id, collection_id, embedding_unsized, document" in embedding_upsert_sql(
+        layout
+    )
+    search = vector_search_template(layout)
+    assert "ORDER BY e.embedding_unsized::vector(64) <=> $1::vector(64)" in search
+    assert "AND vector_dims(embedding_unsized) = 64" in search
+    index = _index_sql("hnsw", {}, quantization.unsized_index(64))
+    assert "((embedding_unsized::vector(64)) vector_cosine_ops)" in index
+    assert index.endswith(
+        "WHERE vector_dims(embedding_unsized) = 64 AND embedding_short IS NULL"
+    )
+    assert _index_sql(
+        "hnsw", {}, quantization.unsized_index(64), concurrently=True
+    ).startswith("CREATE INDEX CONCURRENTLY IF NOT EXISTS")
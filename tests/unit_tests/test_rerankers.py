@@ -0,0 +1,91 @@
+"""Tests for the reranker registry and score cache."""
+
+import asyncio
+import time
+
+import pytest
+
+from langconnect.rerankers import (
+    CachedReranker,
+    OverlapReranker,
+    Reranker,
+    available_providers,
+    create_reranker,
+    register_reranker_provider,
+)
+
+
+class CountingReranker(OverlapReranker):
+    """Overlap reranker counting the scored pairs."""
+
+    def __init__(self) -> None:
+        self.scored = 0
+
+    def score(self, query: str, texts: list[str]) -> list[float]:
+        self.scored += len(texts)
+        return super().score(query, texts)
+
+
+def test_overlap_reranker() -> None:
+    """Test that texts with more query words score higher."""
+    scores = OverlapReranker().score("red apple", ["green apple", "red apple", "pear"])
+    assert scores == [0.5, 1.0, 0.0]
+
+
+async def test_cached_reranker_scores_missing_pairs_only() -> None:
+    """Test that cached pairs are not scored again."""
+    inner = CountingReranker()
+    reranker = CachedReranker(inner, cache_size=10)
+    assert reranker.estimate_seconds(2) == 0.0
+
+    first = await reranker.ascore("apple", ["apple pie", "pear"])
+    assert inner.scored == 2
+    assert reranker.missing("apple", ["apple pie", "banana"]) == 1
+    second = await reranker.ascore("apple", ["pear", "banana", "apple pie"])
+    assert inner.scored == 3
+    assert second == [first[1], 0.0, first[0]]
+    assert reranker.seconds_per_pair is not None
+
+
+
+class SlowReranker(CountingReranker):
+    """Counting reranker taking 0.2 seconds per call."""
+
+    def score(self, query: str, texts: list[str]) -> list[float]:
+        time.sleep(0.2)
+        return super().score(query, texts)
+
+
+async def test_cached_reranker_timeout_keeps_scores() -> None:
+    """Test that a batch outliving its caller is cached and observed."""
+    inner = SlowReranker()
+    reranker = CachedReranker(inner, cache_size=10)
+    with pytest.raises(TimeoutError):
+        await asyncio.wait_for(reranker.ascore("q", ["a", "b"]), timeout=0.05)
+    # The time spent until the timeout already counts
+    estimate = reranker.estimate_seconds(2)
+    assert estimate >= 0.05
+
+    await asyncio.sleep(0.3)
+    assert reranker.missing("q", ["a", "b"]) == 0
+    assert reranker.estimate_seconds(2) > estimate
+    await reranker.ascore("q", ["a", "b"])
+    assert inner.scored == 2
+
+def test_cache_size_is_bounded() -> None:
+    """Test that the least recently used scores are evicted."""
+    inner = CountingReranker()
+    reranker = CachedReranker(inner, cache_size=2)
+    reranker.score("q", ["a", "b", "c"])
+    assert reranker.missing("q", ["a", "b", "c"]) == 1
+
+
+def test_registry() -> None:
+    """Test that providers are created from the registry."""
+    assert isinstance(create_reranker("fake"), OverlapReranker)
+    with pytest.raises(ValueError, match="Unknown reranker provider"):
+        create_reranker("missing")
+
+    register_reranker_provider("test", lambda model: OverlapReranker())
+    assert "test" in available_providers()
+    assert isinstance(create_reranker("test"), Reranker)
@@ -0,0 +1,67 @@
+"""Tests for the cursor-backed streamed search."""
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+import pytest
+
+from langconnect import metrics
+from langconnect.database import collections
+from langconnect.database.collections import FULL_PROJECTION, Collection
+
+ROWS = [
+    {"id": f"chunk{i}", "page_content": "text", "metadata": {"i": i}, "score": 0.5}
+    for i in range(5)
+]
+
+
+class FakeConnection:
+    """Connection whose cursor yields `ROWS`."""
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        yield
+
+    async def execute(self, sql: str) -> None:
+        pass
+
+    async def cursor(self, sql: str, *args: Any, prefetch: int) -> AsyncIterator:
+        for row in ROWS:
+            yield row
+
+
+async def test_stream_releases_connection_before_client_reads(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that a slow consumer doesn't hold the database connection."""
+    released = asyncio.Event()
+
+    @asynccontextmanager
+    async def fake_connection(**kwargs: Any) -> AsyncIterator[FakeConnection]:
+        try:
+            yield FakeConnection()
+        finally:
+            released.set()
+
+    monkeypatch.setattr(collections, "get_db_connection", fake_connection)
+    latency = metrics.SEARCH_LATENCY.labels(search_type="semantic")
+    count = latency.count
+
+    results = Collection("collection", "user1")._stream_rows(
+        "SELECT",
+        [],
+        settings=[],
+        limit=3,
+        filter={"i": 2},
+        projection=FULL_PROJECTION,
+        search_type="semantic",
+        started=0.0,
+    )
+    first = await anext(results)
+    await asyncio.wait_for(released.wait(), timeout=1)
+    rest = [result async for result in results]
+
+    assert [first["id"]] + [result["id"] for result in rest] == ["chunk2"]
+    assert latency.count == count + 1
@@ -0,0 +1,21 @@
+"""Tests for the JSON serialization helpers."""
+
+from langconnect import serialization
+
+
+def test_jsonb_round_trip() -> None:
+    """Test the binary jsonb codec."""
+    value = {"name": "doc", "tags": ["a", "é"], "page": 3, "nested": {"x": None}}
+
+    encoded = serialization.encode_jsonb(value)
+
+    assert encoded[:1] == b"\x01"
+    assert serialization.decode_jsonb(encoded) == value
+
+
+def test_json_response_render() -> None:
+    """Test that responses are rendered as compact UTF-8 JSON."""
+    response = serialization.JSONResponse([{"id": "1", "page_content": "café"}])
+
+    assert response.body == '[{"id":"1","page_content":"café"}]'.encode()
+    assert response.headers["content-type"] == "application/json"
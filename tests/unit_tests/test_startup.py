@@ -0,0 +1,61 @@
+"""Tests for the startup import time report."""
+
+import subprocess
+import sys
+
+from langconnect.startup import ImportTimeReport, parse_importtime
+
+SAMPLE_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |   _io
+import time:       300 |        300 |       langchain_core.embeddings
+import time:       200 |        500 |     langconnect.config
+import time:        50 |        550 |   langconnect
+import time:      1000 |       1600 | langconnect.server
+"""
+
+
+def test_parse_importtime() -> None:
+    """Test parsing of -X importtime output."""
+    timings = parse_importtime(SAMPLE_OUTPUT)
+
+    assert [t.module for t in timings] == [
+        "_io",
+        "langchain_core.embeddings",
+        "langconnect.config",
+        "langconnect",
+        "langconnect.server",
+    ]
+    assert timings[1].self_us == 300
+    assert timings[2].cumulative_us == 500
+    assert timings[1].depth == 3
+    assert timings[-1].depth == 0
+
+
+def test_import_time_report_aggregation() -> None:
+    """Test totals and per-package aggregation."""
+    report = ImportTimeReport(
+        module="langconnect.server", timings=parse_importtime(SAMPLE_OUTPUT)
+    )
+
+    assert report.total_us == 1600
+    assert report.by_package() == {
+        "langconnect": 1250,
+        "langchain_core": 300,
+        "_io": 100,
+    }
+    assert report.slowest(1)[0].module == "langconnect.server"
+    assert "langconnect.server" in report.format()
+
+
+def test_transfer_imports_numpy_lazily() -> None:
+    """Test that importing the export/import module skips numpy and pyarrow."""
+    code = (
+        "import sys, langconnect.database.transfer; "
+        "print('numpy' in sys.modules, 'pyarrow' in sys.modules)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.splitlines()[-1] == "False False"
@@ -0,0 +1,35 @@
+"""Tests for per-request stage timings."""
+
+from langconnect import timing
+from langconnect.metrics import Histogram, Registry
+
+
+def test_stage_records_into_current_request() -> None:
+    """Test that stages are summed in the current request timing."""
+    request_timing = timing.start()
+    registry = Registry()
+    histogram = Histogram("test_stage_seconds", "Stage.", registry=registry)
+
+    with timing.stage("embed", histogram):
+        pass
+    with timing.stage("embed"):
+        pass
+    with timing.stage("vector"):
+        pass
+    timing.add_plan("vector", [{"Plan": {}}])
+
+    assert timing.current() is request_timing
+    assert set(request_timing.as_dict()) == {"embed", "vector", "total"}
+    assert request_timing.plans == {"vector": [{"Plan": {}}]}
+    assert "test_stage_seconds_count 1" in registry.render()
+
+
+def test_server_timing_header_format() -> None:
+    """Test the Server-Timing header value."""
+    request_timing = timing.RequestTiming()
+    request_timing.add("embed", 0.0123)
+    request_timing.add("vector", 0.004)
+
+    header = request_timing.header_value()
+
+    assert header.startswith("embed;dur=12.3, vector;dur=4.0, total;dur=")